@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+日报生成脚本的性能基准
+合成指定期数的日报归档（与手工日报相同的 article-card / 📱 / ⏰ 结构），
+测量 parse_html_file()、generate_index_html() 与端到端 main()（冷缓存 / 热缓存）的耗时，
+结果保存为 JSON，并与之前保存的基线逐项对比
+
+用法：
+    python benchmark.py                                # 默认 1000 期
+    python benchmark.py --sizes 1000 10000 100000
+    python benchmark.py --save-baseline                # 把本次结果保存为基线
+"""
+
+import io
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+from datetime import date, timedelta
+from contextlib import redirect_stdout
+from pathlib import Path
+
+import generate_index
+from generate_index import Article, parse_html_file, generate_index_html, render_daily_html, write_output
+
+BENCH_DIR = Path(__file__).parent / '.cache' / 'bench'
+DEFAULT_BASELINE = BENCH_DIR / 'baseline.json'
+DEFAULT_RESULTS = BENCH_DIR / 'latest.json'
+
+# 合成归档的格式版本，修改生成逻辑后递增，旧的合成归档会被重新生成
+SYNTH_VERSION = 1
+LAST_DAY = date(2025, 11, 15)
+
+SOURCES = [
+    '量子位', '机器之心', '新智元', 'AI科技评论', '极客公园', '36氪', '虎嗅APP', '晚点LatePost',
+    '硅星人Pro', '数字生命卡兹克', '歸藏的AI工具箱', '赛博禅心', '卡尔的AI沃茨', '夕小瑶科技说',
+    'APPSO', '差评', '爱范儿', '腾讯科技', '甲子光年', '智东西', '财经十一人', '半导体行业观察',
+]
+TAGS = ['大模型', 'AI产品', '芯片', '开源', '智能体', '多模态', '融资', '机器人', '自动驾驶',
+        '算力', '创业', '编程', '行业观察', '政策', '教育', '医疗']
+WORDS = [
+    '模型', '推理', '训练', '算力', '存储芯片', '数据中心', '开发者', '用户', '产品', '发布',
+    '开源', '成本', '效率', '团队', '公司', '市场', '增长', '能力', '评测', '应用', '场景',
+    '生态', '合作', '价格', '硬件', '软件', '平台', '工具', '智能体', '工作流', '上下文',
+    '多模态', '视频生成', '语音', '搜索', '编程', '机器人', '自动驾驶', '芯片', '云服务',
+]
+PHRASES = ['正在', '已经', '大幅', '显著', '首次', '持续', '全面', '进一步', '逐步', '明显']
+VERBS = ['提升', '降低', '改变', '推动', '重塑', '加速', '挑战', '扩展', '优化', '整合']
+
+def synth_sentence(rng, min_words=4, max_words=9):
+    """用固定词表拼出一句中文"""
+    words = [rng.choice(WORDS) for _ in range(rng.randint(min_words, max_words))]
+    pos = rng.randrange(1, len(words))
+    words[pos:pos] = [rng.choice(PHRASES), rng.choice(VERBS)]
+    return ''.join(words) + '。'
+
+def synth_article(rng, day, index):
+    """合成一篇字段齐全的文章"""
+    summary = [''.join(synth_sentence(rng) for _ in range(rng.randint(2, 4))) for _ in range(rng.randint(2, 3))]
+    return Article(
+        title=synth_sentence(rng, 3, 6).rstrip('。'),
+        published=f'{day.isoformat()} {rng.randint(6, 23):02d}:{rng.randint(0, 59):02d}',
+        source=rng.choice(SOURCES),
+        tags=rng.sample(TAGS, rng.randint(1, 3)),
+        summary=summary,
+        highlights=[summary[0].split('。')[0] + '。'],
+        benefit=synth_sentence(rng),
+        action=synth_sentence(rng),
+        url=f'https://mp.weixin.qq.com/s/{day.strftime("%Y%m%d")}{index:02d}{rng.getrandbits(32):08x}',
+    )
+
+def synthesize_archive(src_dir, count, seed=0, fresh=False):
+    """在 src_dir 生成 count 期日报（从 LAST_DAY 往前逐日），已存在且参数一致时直接复用
+
+    Returns:
+        合成耗时（秒），复用时为 None
+    """
+    marker_path = src_dir.parent / 'archive.json'
+    marker = {'version': SYNTH_VERSION, 'count': count, 'seed': seed}
+    if not fresh and src_dir.exists():
+        try:
+            with open(marker_path, 'r', encoding='utf-8') as f:
+                if json.load(f) == marker:
+                    return None
+        except (OSError, ValueError):
+            pass
+
+    if src_dir.parent.exists():
+        shutil.rmtree(src_dir.parent)
+    src_dir.mkdir(parents=True)
+
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    for offset in range(count):
+        day = LAST_DAY - timedelta(days=offset)
+        articles = [synth_article(rng, day, i) for i in range(rng.randint(3, 12))]
+        with open(src_dir / f'{day.isoformat()}.html', 'w', encoding='utf-8') as f:
+            f.write(render_daily_html(articles))
+    elapsed = time.perf_counter() - started
+    write_output(marker_path, json.dumps(marker))
+    return elapsed
+
+def remove_generated(src_dir):
+    """删除 main() 生成的首页、分页与归档页，保证冷启动从零生成"""
+    for name in generate_index.GENERATED_ROOT_PAGES:
+        if (src_dir / name).exists():
+            (src_dir / name).unlink()
+    for sub in ('page', 'archive'):
+        if (src_dir / sub).exists():
+            shutil.rmtree(src_dir / sub)
+
+def run_main(argv):
+    """运行一次 main()，屏蔽其逐期输出，返回耗时（秒）"""
+    started = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        generate_index.main(argv)
+    return time.perf_counter() - started
+
+def bench_size(count, args):
+    """对一个归档规模执行全部测量，返回指标字典（时间单位为秒）"""
+    work_dir = BENCH_DIR / str(count)
+    src_dir = work_dir / 'src'
+    print(f"\n📦 {count} 期")
+    synth_seconds = synthesize_archive(src_dir, count, args.seed, args.fresh)
+    if synth_seconds is None:
+        print(f"  复用已合成的归档: {src_dir}")
+    else:
+        print(f"  合成归档: {synth_seconds:.2f}s")
+
+    files = sorted(p for p in src_dir.glob('*.html') if p.name not in generate_index.GENERATED_ROOT_PAGES)
+    total_bytes = sum(p.stat().st_size for p in files)
+    result = {'files': len(files), 'bytes': total_bytes}
+
+    # parse_html_file()：串行解析全部文件
+    started = time.perf_counter()
+    dailies = [parse_html_file(p) for p in files]
+    result['parse'] = time.perf_counter() - started
+    result['parse_per_file_ms'] = result['parse'] * 1000 / len(files)
+    print(f"  parse_html_file: {result['parse']:.3f}s（每个 {result['parse_per_file_ms']:.3f}ms，"
+          f"{total_bytes / 1048576 / result['parse']:.1f} MB/s）")
+
+    # generate_index_html()：把全部日报渲染到一个页面，取多次中的最小值
+    dailies.sort(key=generate_index.daily_sort_key, reverse=True)
+    timings = []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        html = generate_index_html(dailies)
+        timings.append(time.perf_counter() - started)
+    result['render'] = min(timings)
+    result['render_bytes'] = len(html.encode('utf-8'))
+    print(f"  generate_index_html: {result['render']:.3f}s（{result['render_bytes']} 字节）")
+
+    # 端到端 main()：先清空缓存与生成页（冷），再原样运行一次（热）
+    cache_path = work_dir / 'parse_cache.json'
+    main_argv = ['--src', str(src_dir), '--cache', str(cache_path), '-j', str(args.workers)]
+    if cache_path.exists():
+        cache_path.unlink()
+    remove_generated(src_dir)
+    result['main_cold'] = run_main(main_argv)
+    result['main_warm'] = run_main(main_argv)
+    print(f"  main(): 冷缓存 {result['main_cold']:.3f}s，热缓存 {result['main_warm']:.3f}s")
+    return result
+
+# 参与基线对比的指标（越小越好）
+COMPARED_METRICS = ['parse', 'render', 'main_cold', 'main_warm']
+
+def compare_with_baseline(results, baseline, threshold):
+    """打印与基线的逐项对比，返回变慢超过 threshold 的指标数"""
+    regressions = 0
+    print(f"\n📊 与基线对比（{baseline.get('python', '?')}，{baseline.get('machine', '?')}）")
+    for size, metrics in results['results'].items():
+        base = baseline.get('results', {}).get(size)
+        if not base:
+            print(f"  {size} 期: 基线中没有该规模")
+            continue
+        for name in COMPARED_METRICS:
+            if name not in base:
+                continue
+            change = metrics[name] / base[name] - 1 if base[name] else 0
+            flag = ''
+            if change > threshold:
+                flag = '  ⚠️ 变慢'
+                regressions += 1
+            elif change < -threshold:
+                flag = '  ✅ 变快'
+            print(f"  {size} 期 {name}: {base[name]:.3f}s → {metrics[name]:.3f}s（{change:+.1%}）{flag}")
+    return regressions
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='日报生成脚本性能基准')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000],
+                        help='合成归档的期数，可指定多个（默认 1000）')
+    parser.add_argument('--seed', type=int, default=0, help='合成内容的随机种子')
+    parser.add_argument('--fresh', action='store_true', help='重新合成归档，不复用上次的文件')
+    parser.add_argument('--repeat', type=int, default=3, help='generate_index_html 的重复次数，取最小值')
+    parser.add_argument('-j', '--workers', type=int, default=1, help='传给 main() 的 --workers')
+    parser.add_argument('--output', default=str(DEFAULT_RESULTS), help='本次结果 JSON 路径')
+    parser.add_argument('--baseline', default=str(DEFAULT_BASELINE), help='基线 JSON 路径')
+    parser.add_argument('--save-baseline', action='store_true', help='把本次结果保存为新的基线')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='判定为变慢的相对阈值（默认 0.10，即 10%%）')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """主函数：有指标变慢超过阈值时返回 1"""
+    args = parse_args(argv)
+    results = {
+        'python': platform.python_version(),
+        'machine': f'{platform.system()} {platform.machine()}',
+        'results': {},
+    }
+    for count in args.sizes:
+        results['results'][str(count)] = bench_size(count, args)
+
+    output = json.dumps(results, ensure_ascii=False, indent=2)
+    write_output(args.output, output)
+    print(f"\n结果已保存: {args.output}")
+
+    regressions = 0
+    baseline_path = Path(args.baseline)
+    if baseline_path.exists():
+        with open(baseline_path, 'r', encoding='utf-8') as f:
+            regressions = compare_with_baseline(results, json.load(f), args.threshold)
+    if args.save_baseline:
+        write_output(baseline_path, output)
+        print(f"基线已更新: {baseline_path}")
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    # Windows下设置UTF-8输出
+    if sys.platform == 'win32':
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+    sys.exit(main())
@@ -5,17 +5,277 @@
 每次新增日报后运行此脚本即可自动更新 index.html
 """
 
+import io
 import os
 import re
-from datetime import datetime
+import sys
+import json
+import struct
+import hashlib
+import posixpath
+import gzip
+import time
+import random
+import sqlite3
+import pstats
+import cProfile
+import argparse
+import itertools
+import threading
+import textwrap
+import tarfile
+import zipfile
+import urllib.error
+import urllib.request
+from html import escape, unescape
+from functools import lru_cache, partial
+from contextlib import contextmanager
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from datetime import date, datetime, timedelta, timezone
+from email.utils import format_datetime
+from urllib.parse import urlsplit, urlunsplit, parse_qs, unquote
+from array import array
 from collections import Counter
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
 from pathlib import Path
 
-def parse_html_file(filepath):
-    """解析HTML文件，提取关键信息"""
+try:
+    import brotli  # 可选依赖：pip install brotli，缺失时只生成 .gz
+except ImportError:
+    brotli = None
+
+try:
+    from PIL import Image  # 可选依赖：pip install Pillow，缺失时图片只复制、不生成缩放与 WebP 变体
+except ImportError:
+    Image = None
+
+try:
+    import numpy as np  # 可选依赖：pip install numpy，缺失时统计汇总退回纯 Python 计数
+except ImportError:
+    np = None
+
+try:
+    import resource  # 仅 Unix 可用，用于 --stats 报告峰值内存
+except ImportError:
+    resource = None
+
+# 解析缓存格式版本：解析逻辑或记录字段变化时递增，旧缓存自动失效
+PARSE_CACHE_VERSION = 3
+
+# src/ 根目录下由脚本生成、不属于日报的页面
+GENERATED_ROOT_PAGES = {'index.html', 'search.html', 'stats.html'}
+
+# 首页及每个分页展示的日报期数
+INDEX_PAGE_SIZE = 10
+
+# 流式解析时每次读取的块大小
+READ_CHUNK_SIZE = 64 * 1024
+# 块尾保留长度：须大于任意单个词法单元的最大长度，保证跨块的单元不被截断
+SCAN_TAIL = 1024
+
+DATE_TEXT_RE = re.compile(r'(\d{4})年(\d{1,2})月(\d{1,2})日\s+星期([一二三四五六日])')
+
+class Article:
+    """单篇文章的紧凑记录（__slots__，避免每篇文章一个 __dict__）"""
+
+    __slots__ = ('title', 'published', 'source', 'tags', 'summary', 'highlights', 'benefit', 'action', 'url')
+
+    def __init__(self, title='', published='', source='', tags=(), summary=(), highlights=(),
+                 benefit='', action='', url=''):
+        self.title = title
+        self.published = published    # ⏰ 发布时间，如 "2025-11-15 08:50"，旧日报可能为空
+        self.source = source          # 📱 公众号名称
+        self.tags = list(tags)        # 不含 # 号的标签
+        self.summary = list(summary)  # 摘要段落（纯文本）
+        self.highlights = list(highlights)  # 摘要中的高亮句
+        self.benefit = benefit        # 阅读收益
+        self.action = action          # 行动指引
+        self.url = url                # 原文链接
+
+    def to_dict(self):
+        """转换为可 JSON 序列化的字典"""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data):
+        """从 to_dict() 的结果还原"""
+        return cls(**{name: data[name] for name in cls.__slots__ if name in data})
+
+    def __eq__(self, other):
+        return isinstance(other, Article) and self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"Article({self.title!r}, source={self.source!r})"
+
+CARD_TITLE_RE = re.compile(r'<div class="article-title">([^<]*)</div>')
+CARD_TIME_RE = re.compile(r'<span>⏰ ([^<]+)</span>')
+CARD_SOURCE_RE = re.compile(r'<span>📱 ([^<]+)</span>')
+CARD_TAG_RE = re.compile(r'<span class="tag">#?([^<]+)</span>')
+CARD_SECTION_RE = re.compile(
+    r'<div class="info-section (summary|benefit|action)">(.*?)(?=<div class="info-section |<div class="card-footer"|$)',
+    re.S)
+CARD_PARAGRAPH_RE = re.compile(r'<div class="summary-paragraph">(.*?)</div>', re.S)
+CARD_INFO_TEXT_RE = re.compile(r'<div class="info-text">(.*?)</div>', re.S)
+CARD_HIGHLIGHT_RE = re.compile(r'<span class="summary-highlight">(.*?)</span>', re.S)
+CARD_URL_RE = re.compile(r'<a href="([^"]*)" class="read-more">')
+TAG_STRIP_RE = re.compile(r'<[^>]+>')
+SPACE_RE = re.compile(r'\s+')
+
+def html_to_text(fragment):
+    """去掉标签、还原实体并压缩空白"""
+    return SPACE_RE.sub(' ', unescape(TAG_STRIP_RE.sub('', fragment))).strip()
+
+def parse_article_card(card_html):
+    """从单个 article-card 的 HTML 片段中提取文章记录"""
+    title = CARD_TITLE_RE.search(card_html)
+    published = CARD_TIME_RE.search(card_html)
+    source = CARD_SOURCE_RE.search(card_html)
+    url = CARD_URL_RE.search(card_html)
+
+    summary, highlights, benefit, action = [], [], '', ''
+    for kind, section in CARD_SECTION_RE.findall(card_html):
+        if kind == 'summary':
+            paragraphs = CARD_PARAGRAPH_RE.findall(section) or CARD_INFO_TEXT_RE.findall(section)
+            summary = [text for text in map(html_to_text, paragraphs) if text]
+            highlights = [html_to_text(h) for h in CARD_HIGHLIGHT_RE.findall(section)]
+        else:
+            text = CARD_INFO_TEXT_RE.search(section)
+            text = html_to_text(text.group(1)) if text else ''
+            if kind == 'benefit':
+                benefit = text
+            else:
+                action = text
+
+    return Article(
+        title=html_to_text(title.group(1)) if title else '',
+        published=published.group(1).strip() if published else '',
+        source=unescape(source.group(1)) if source else '',
+        tags=[unescape(tag).strip() for tag in CARD_TAG_RE.findall(card_html)],
+        summary=summary,
+        highlights=highlights,
+        benefit=benefit,
+        action=action,
+        # 只还原 &amp;，避免把查询参数误当作实体（如 &not=）
+        url=url.group(1).replace('&amp;', '&') if url else '',
+    )
+
+class DailyScanner:
+    """单遍分块扫描日报 HTML
+
+    用一个合并的正则词法器同时收集旧格式日期、文章卡片数和公众号名称，
+    取代原先对全文的三次独立扫描。遇到页脚 <div class="footer"> 即置 done，
+    调用方据此停止读取文件，内存占用只与块大小相关。
+
+    每张卡片从 <div class="article-card"> 起到下一张卡片或页脚为止，
+    卡片结束时交给 parse_article_card()；未结束的卡片随块尾一起保留，
+    因此额外内存不超过单张卡片的大小。
+    """
+
+    # 所有分支共享前缀 '<'，让正则引擎能快速跳到下一个标签起点
+    TOKEN_RE = re.compile(
+        r'<(?:div class="(?:'
+        r'(?P<card>article-card)"'
+        r'|(?P<footer>footer)"'
+        r'|date">(?P<date>\d{4}年\d{1,2}月\d{1,2}日\s+星期[一二三四五六日])</div'
+        r')|span>📱 (?P<source>[^<]{1,256})</span)>'
+    )
+
+    def __init__(self):
+        self.done = False
+        self.date_text = None
+        self.article_count = 0
+        self.sources = []
+        self.articles = []
+        self._pending = ''
+        self._card_start = None  # 当前卡片在 _pending 中的起点
+        self._scan_from = 0      # _pending 中尚未扫描部分的起点
+
+    def feed(self, chunk, final=False):
+        """扫描一块文本；块尾 SCAN_TAIL 个字符留到下一块一起扫描"""
+        if self.done:
+            return
+        buf = self._pending + chunk
+        limit = len(buf) if final else max(0, len(buf) - SCAN_TAIL)
+        pos = self._scan_from
+        for m in self.TOKEN_RE.finditer(buf, pos):
+            if m.start() >= limit:
+                break
+            pos = m.end()
+            self._handle(m, buf)
+            if self.done:
+                break
+
+        if final and self._card_start is not None:
+            self._finish_card(buf, len(buf))
+        if final or self.done:
+            self._pending = ''
+            return
+
+        # 已扫描的部分只在属于未结束的卡片时保留，且不会被重复扫描
+        scanned = max(pos, limit)
+        keep = scanned
+        if self._card_start is not None:
+            keep = min(keep, self._card_start)
+            self._card_start -= keep
+        self._scan_from = scanned - keep
+        self._pending = buf[keep:]
+
+    def close(self):
+        """扫描剩余的块尾"""
+        self.feed('', final=True)
+
+    def _handle(self, m, buf):
+        kind = m.lastgroup
+        if kind == 'card':
+            if self._card_start is not None:
+                self._finish_card(buf, m.start())
+            self.article_count += 1
+            self._card_start = m.start()
+        elif kind == 'source':
+            self.sources.append(m.group('source'))
+        elif kind == 'date':
+            if self.date_text is None:
+                self.date_text = m.group('date')
+        elif kind == 'footer':
+            if self._card_start is not None:
+                self._finish_card(buf, m.start())
+            self.done = True
+
+    def _finish_card(self, buf, end):
+        self.articles.append(parse_article_card(buf[self._card_start:end]))
+        self._card_start = None
+
+def extract_daily(filepath, timings=None):
+    """分块读取文件交给 DailyScanner，到达页脚后提前结束
+
+    timings 为字典时累加读取耗时（read，秒）与实际读取的字节数（bytes）。
+    """
+    scanner = DailyScanner()
+    with open(filepath, 'r', encoding='utf-8') as f:
+        if timings is None:
+            for chunk in iter(lambda: f.read(READ_CHUNK_SIZE), ''):
+                scanner.feed(chunk)
+                if scanner.done:
+                    break
+        else:
+            while not scanner.done:
+                started = time.perf_counter()
+                chunk = f.read(READ_CHUNK_SIZE)
+                timings['read'] += time.perf_counter() - started
+                if not chunk:
+                    break
+                timings['bytes'] += len(chunk.encode('utf-8'))
+                scanner.feed(chunk)
+    scanner.close()
+    return scanner
+
+def parse_html_file(filepath, timings=None):
+    """解析HTML文件，提取关键信息
+
+    timings 见 extract_daily()。
+    """
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
+        scanner = extract_daily(filepath, timings)
 
         # 首先尝试从文件名中提取日期
         filename = os.path.basename(filepath)
@@ -33,7 +293,7 @@ def parse_html_file(filepath):
                 weekday = '一'
         else:
             # 如果文件名不匹配，尝试从内容中提取日期（兼容旧格式）
-            date_match = re.search(r'<div class="date">(\d{4})年(\d{1,2})月(\d{1,2})日\s+星期([一二三四五六日])</div>', content)
+            date_match = DATE_TEXT_RE.match(scanner.date_text or '')
             if not date_match:
                 return None
 
@@ -41,14 +301,12 @@ def parse_html_file(filepath):
             date_str = f"{year}年{month}月{day}日"
 
         # 统计文章数
-        article_count = len(re.findall(r'<div class="article-card">', content))
+        article_count = scanner.article_count
 
-        # 提取公众号名称
-        sources = re.findall(r'<span>📱 ([^<]+)</span>', content)
-        # 去重并保持顺序
+        # 提取公众号名称，去重并保持顺序
         unique_sources = []
         seen = set()
-        for source in sources:
+        for source in scanner.sources:
             if source not in seen:
                 seen.add(source)
                 unique_sources.append(source)
@@ -64,512 +322,2610 @@ def parse_html_file(filepath):
             'weekday': weekday,
             'article_count': article_count,
             'source_count': source_count,
-            'sources': unique_sources  # 改为公众号列表
+            'sources': unique_sources,  # 改为公众号列表
+            'articles': scanner.articles
         }
     except Exception as e:
         print(f"解析文件 {filepath} 时出错: {e}")
         return None
 
-def generate_index_html(dailies):
-    """生成index.html内容"""
+def file_digest(filepath):
+    """分块计算文件内容的 SHA-256 摘要"""
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
 
-    # 计算总统计数据
-    total_issues = len(dailies)
-    total_articles = sum(d['article_count'] for d in dailies)
+def load_parse_cache(cache_path):
+    """读取解析缓存清单
 
-    # 生成日报卡片HTML
-    cards_html = []
-    for daily in dailies:
-        sources_html = ''.join([f'<span class="preview-tag">📱 {source}</span>' for source in daily['sources']])
+    Returns:
+        文件名 -> 缓存条目（size/mtime_ns/sha256/record）的字典，
+        缓存不存在、损坏或版本不符时返回空字典
+    """
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
 
-        card = f'''        <a href="{daily['filename']}" class="daily-card">
-            <div class="daily-header">
-                <div class="daily-date">
-                    <span class="icon">📅</span>
-                    <span>{daily['date']}</span>
-                </div>
-                <div class="daily-weekday">星期{daily['weekday']}</div>
-            </div>
-            <div class="daily-meta">
-                <div class="meta-item">
-                    <span class="emoji">📝</span>
-                    <span>共 <span class="number">{daily['article_count']}</span> 篇文章</span>
-                </div>
-                <div class="meta-item">
-                    <span class="emoji">🏢</span>
-                    <span>{daily['source_count']} 个公众号</span>
-                </div>
-            </div>
-            <div class="daily-preview">
-                {sources_html}
-            </div>
-            <div class="daily-footer">
-                <span class="read-btn">查看本期日报</span>
-            </div>
-        </a>'''
-        cards_html.append(card)
-
-    cards_section = '\n\n'.join(cards_html)
-
-    # 完整的HTML模板
-    html_template = f'''<!DOCTYPE html>
-<html lang="zh-CN">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>蹊涯AI：公众号日报 - 首页</title>
-    <style>
-        * {{
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }}
-
-        body {{
-            font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, "Helvetica Neue", Arial, sans-serif;
-            background-color: #f5f5f5;
-            color: #333;
-            line-height: 1.6;
-            min-height: 100vh;
-        }}
+    if not isinstance(data, dict) or data.get('version') != PARSE_CACHE_VERSION:
+        return {}
 
-        .header {{
-            background: #2c3e50;
-            color: white;
-            padding: 60px 0 50px;
-            margin-bottom: 40px;
-            position: relative;
-            overflow: hidden;
-        }}
+    entries = data.get('files', {})
+    for entry in entries.values():
+        record = entry.get('record')
+        if record:
+            record['articles'] = [Article.from_dict(a) for a in record.get('articles', [])]
+    return entries
 
-        .header::before {{
-            content: "";
-            position: absolute;
-            top: 0;
-            left: 0;
-            right: 0;
-            bottom: 0;
-            background: url('data:image/svg+xml,<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 1440 320"><path fill="rgba(52,152,219,0.1)" d="M0,96L48,112C96,128,192,160,288,160C384,160,480,128,576,122.7C672,117,768,139,864,138.7C960,139,1056,117,1152,101.3C1248,85,1344,75,1392,69.3L1440,64L1440,320L1392,320C1344,320,1248,320,1152,320C1056,320,960,320,864,320C768,320,672,320,576,320C480,320,384,320,288,320C192,320,96,320,48,320L0,320Z"></path></svg>') no-repeat bottom;
-            background-size: cover;
-            opacity: 0.3;
-        }}
-
-        .header-content {{
-            max-width: 900px;
-            margin: 0 auto;
-            padding: 0 20px;
-            text-align: center;
-            position: relative;
-            z-index: 1;
-        }}
+def save_parse_cache(cache_path, entries):
+    """写入解析缓存清单（先写临时文件再替换，避免中途失败留下半个文件）"""
+    cache_path = Path(cache_path)
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_name(cache_path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': PARSE_CACHE_VERSION, 'files': entries}, f,
+                  ensure_ascii=False, sort_keys=True, default=Article.to_dict)
+    os.replace(tmp_path, cache_path)
 
-        .header h1 {{
-            font-size: 36px;
-            margin-bottom: 12px;
-            font-weight: 700;
-            letter-spacing: -0.5px;
-        }}
+def timed_parse_html_file(filepath):
+    """parse_html_file() 的计时版本
 
-        .header .subtitle {{
-            font-size: 16px;
-            opacity: 0.9;
-            font-weight: 300;
-            margin-bottom: 40px;
-        }}
+    Returns:
+        (解析结果, {'read': 读取秒数, 'parse': 扫描与解析秒数, 'bytes': 读取字节数})
+    """
+    timings = {'read': 0.0, 'bytes': 0}
+    started = time.perf_counter()
+    record = parse_html_file(filepath, timings)
+    timings['parse'] = time.perf_counter() - started - timings['read']
+    return record, timings
 
-        .header-title {{
-            font-size: 28px;
-            font-weight: 700;
-            margin-bottom: 24px;
-            margin-top: 40px;
-        }}
+def parse_files(paths, workers=1, timed=False):
+    """批量解析日报文件
 
-        .header-description {{
-            font-size: 16px;
-            line-height: 1.8;
-            margin-bottom: 30px;
-            opacity: 0.95;
-            max-width: 800px;
-            margin-left: auto;
-            margin-right: auto;
-        }}
-
-        .features-grid {{
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
-            gap: 24px;
-            margin-top: 36px;
-        }}
+    workers > 1 时使用进程池并行解析，返回结果的顺序始终与 paths 一致，
+    因此并行与串行的输出完全相同。
 
-        .feature-card {{
-            background: rgba(52, 152, 219, 0.15);
-            backdrop-filter: blur(10px);
-            border-radius: 12px;
-            padding: 24px;
-            transition: all 0.3s ease;
-            border: 1px solid rgba(52, 152, 219, 0.3);
-        }}
+    Args:
+        paths: 日报文件路径列表
+        workers: 并行进程数，<= 1 表示串行
+        timed: 为真时改用 timed_parse_html_file()，每个结果附带计时
 
-        .feature-card:hover {{
-            background: rgba(52, 152, 219, 0.25);
-            transform: translateY(-4px);
-            border-color: rgba(52, 152, 219, 0.5);
-        }}
+    Returns:
+        与 paths 一一对应的 parse_html_file()（或 timed_parse_html_file()）结果列表
+    """
+    parse = timed_parse_html_file if timed else parse_html_file
+    workers = min(workers, len(paths))
+    if workers <= 1:
+        return [parse(p) for p in paths]
 
-        .feature-icon {{
-            font-size: 36px;
-            margin-bottom: 12px;
-        }}
+    # 每个进程一次领取多个文件，减少大批量解析时的进程间通信开销
+    chunksize = max(1, len(paths) // (workers * 4))
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(parse, paths, chunksize=chunksize))
+    except (OSError, NotImplementedError) as e:
+        # 部分受限环境（无 /dev/shm 等）无法创建进程池，退回线程池
+        print(f"无法创建进程池（{e}），改用线程池解析")
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(parse, paths))
 
-        .feature-title {{
-            font-size: 18px;
-            font-weight: 600;
-            margin-bottom: 8px;
-            color: white;
-        }}
+def update_lastmod(entry):
+    """解析结果的内容摘要变化时把缓存条目的 lastmod 更新为当前时间
 
-        .feature-desc {{
-            font-size: 14px;
-            opacity: 0.9;
-            line-height: 1.6;
-            color: rgba(255, 255, 255, 0.9);
-        }}
+    首次见到的日报取其日期作为 lastmod：解析缓存没有跨构建保留时（如 Netlify），
+    lastmod 依然稳定，不会每次构建都变成构建时间。只改了排版（压缩、抽取样式）
+    而文章内容不变的日报，摘要不变，lastmod 也不变。
+    """
+    digest = daily_digest(entry['record'])
+    if entry.get('digest') == digest:
+        return
+    if entry.get('digest'):
+        entry['lastmod'] = datetime.now(timezone.utc).replace(microsecond=0).isoformat()
+    else:
+        entry['lastmod'] = daily_iso_date(entry['record'])
+    entry['digest'] = digest
 
-        .container {{
-            max-width: 900px;
-            margin: 0 auto;
-            padding: 0 20px 60px;
-        }}
+def parse_with_cache(html_files, entries, workers=1, build_stats=None):
+    """结合缓存解析日报文件，只重新解析新增或内容变化的文件
 
-        .section-title {{
-            font-size: 20px;
-            color: #2c3e50;
-            margin-bottom: 24px;
-            font-weight: 600;
-            display: flex;
-            align-items: center;
-            gap: 10px;
-        }}
+    先比较 size 与 mtime，二者一致直接命中；否则计算内容哈希，
+    哈希一致（例如仅被 touch 或重新检出）同样复用缓存记录。--in-place 改写过的日报
+    另外记录改写前的哈希 source_sha256，重新检出得到的原始内容与之一致时也命中。
+    已删除文件的条目不会出现在返回的新缓存中。
 
-        .section-title::before {{
-            content: "";
-            width: 4px;
-            height: 24px;
-            background: linear-gradient(135deg, #3498db 0%, #2980b9 100%);
-            border-radius: 2px;
-        }}
+    Args:
+        html_files: 日报文件路径列表
+        entries: load_parse_cache() 返回的旧缓存
+        workers: 未命中文件的并行解析进程数
+        build_stats: BuildStats 实例，提供时记录每个文件的读取与解析耗时
 
-        .daily-card {{
-            background: white;
-            border: 1px solid #e0e0e0;
-            border-radius: 12px;
-            padding: 28px;
-            margin-bottom: 24px;
-            transition: all 0.3s ease;
-            cursor: pointer;
-            text-decoration: none;
-            display: block;
-            color: inherit;
-            position: relative;
-            overflow: hidden;
-        }}
+    Returns:
+        (解析结果列表, 新缓存条目字典, 统计字典)
+    """
+    new_entries = {}
+    misses = []
+    stats = {'hit': 0, 'parsed': 0, 'evicted': 0, 'parsed_names': []}
 
-        .daily-card::before {{
-            content: "";
-            position: absolute;
-            top: 0;
-            left: 0;
-            right: 0;
-            height: 4px;
-            background: linear-gradient(90deg, #3498db 0%, #2980b9 100%);
-            transform: scaleX(0);
-            transform-origin: left;
-            transition: transform 0.3s ease;
-        }}
+    for filepath in html_files:
+        name = filepath.name
+        st = filepath.stat()
+        entry = entries.get(name)
 
-        .daily-card:hover::before {{
-            transform: scaleX(1);
-        }}
+        if entry and entry.get('size') == st.st_size and entry.get('mtime_ns') == st.st_mtime_ns:
+            stats['hit'] += 1
+        else:
+            digest = file_digest(filepath)
+            if entry and digest in (entry.get('sha256'), entry.get('source_sha256')):
+                stats['hit'] += 1
+                entry = dict(entry, size=st.st_size, mtime_ns=st.st_mtime_ns)
+            else:
+                new_entry = {
+                    'size': st.st_size,
+                    'mtime_ns': st.st_mtime_ns,
+                    'sha256': digest,
+                    'record': None,
+                }
+                # 内容摘要与最后修改时间跨解析保留，用于 sitemap 的 lastmod
+                if entry and entry.get('digest'):
+                    new_entry.update(digest=entry['digest'], lastmod=entry.get('lastmod'))
+                entry = new_entry
+                misses.append((filepath, entry))
 
-        .daily-card:hover {{
-            box-shadow: 0 8px 24px rgba(0,0,0,0.12);
-            transform: translateY(-4px);
-            border-color: #3498db;
-        }}
+        new_entries[name] = entry
 
-        .daily-header {{
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            margin-bottom: 16px;
-        }}
+    # 未命中的文件统一交给 parse_files()，可并行解析
+    results = parse_files([filepath for filepath, _ in misses], workers, timed=build_stats is not None)
+    for (filepath, entry), result in zip(misses, results):
+        print(f"  解析: {filepath.name}")
+        if build_stats is not None:
+            result, timings = result
+            build_stats.add_file(filepath.name, timings)
+        entry['record'] = result
+        if result:
+            update_lastmod(entry)
+    stats['parsed'] = len(misses)
+    stats['parsed_names'] = [filepath.name for filepath, _ in misses]
 
-        .daily-date {{
-            font-size: 24px;
-            font-weight: 700;
-            color: #2c3e50;
-            display: flex;
-            align-items: center;
-            gap: 12px;
-        }}
+    dailies = [entry['record'] for entry in new_entries.values() if entry['record']]
+    stats['evicted'] = len(set(entries) - set(new_entries))
+    return dailies, new_entries, stats
 
-        .daily-date .icon {{
-            font-size: 28px;
-        }}
+def daily_iso_date(daily):
+    """返回日报的 ISO 日期字符串，如 2025-11-05"""
+    return f"{daily['year']}-{int(daily['month']):02d}-{int(daily['day']):02d}"
 
-        .daily-weekday {{
-            background: linear-gradient(135deg, #3498db 0%, #2980b9 100%);
-            color: white;
-            padding: 6px 14px;
-            border-radius: 20px;
-            font-size: 13px;
-            font-weight: 600;
-        }}
+# 本次运行写出与跳过（内容未变）的文件数，构建结束时汇总
+OUTPUT_STATS = Counter()
 
-        .daily-meta {{
-            display: flex;
-            gap: 20px;
-            margin-bottom: 16px;
-            flex-wrap: wrap;
-        }}
+def _temp_path(path):
+    """与目标同目录的临时文件路径，保证 os.replace 是同一文件系统内的原子替换"""
+    return path.with_name(f'.{path.name}.{os.getpid()}.tmp')
 
-        .meta-item {{
-            display: flex;
-            align-items: center;
-            gap: 8px;
-            color: #7f8c8d;
-            font-size: 14px;
-        }}
+def _same_content(path, size, digest):
+    """现有文件的大小与 SHA-256 是否与给定值一致（文件不存在视为不一致）"""
+    try:
+        return path.stat().st_size == size and file_digest(path) == digest
+    except FileNotFoundError:
+        return False
 
-        .meta-item .emoji {{
-            font-size: 18px;
-        }}
+def write_output(path, content):
+    """写出生成的文件（str 按 UTF-8 编码，也可直接传 bytes）
 
-        .meta-item .number {{
-            font-weight: 600;
-            color: #3498db;
-            font-size: 16px;
-        }}
+    内容与现有文件逐字节相同时不写，保留原 mtime，部署时不会被当作改动；
+    否则先写同目录的临时文件再 os.replace，中途失败不会留下半个文件。
 
-        .daily-preview {{
-            display: flex;
-            gap: 12px;
-            flex-wrap: wrap;
-            margin-bottom: 20px;
-        }}
+    Returns:
+        实际写入返回 True，内容未变跳过返回 False
+    """
+    path = Path(path)
+    data = content.encode('utf-8') if isinstance(content, str) else content
+    if _same_content(path, len(data), hashlib.sha256(data).hexdigest()):
+        OUTPUT_STATS['skipped'] += 1
+        return False
 
-        .preview-tag {{
-            background: #e8f4f8;
-            color: #3498db;
-            padding: 6px 14px;
-            border-radius: 16px;
-            font-size: 13px;
-            font-weight: 500;
-            transition: all 0.2s;
-        }}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = _temp_path(path)
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+    OUTPUT_STATS['written'] += 1
+    return True
 
-        .daily-card:hover .preview-tag {{
-            background: #3498db;
-            color: white;
-        }}
+@contextmanager
+def open_output(path):
+    """流式写出较大的生成文件，语义同 write_output()
 
-        .daily-footer {{
-            display: flex;
-            justify-content: flex-end;
-            align-items: center;
-            padding-top: 16px;
-            border-top: 1px solid #f0f0f0;
-        }}
+    内容先逐步写入临时文件，结束后再与现有文件比较哈希：相同则丢弃临时文件，
+    不同则原子替换；with 块内抛出异常时目标文件保持不变。
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = _temp_path(path)
+    try:
+        with open(tmp_path, 'w', encoding='utf-8', newline='\n') as f:
+            yield f
+        if _same_content(path, tmp_path.stat().st_size, file_digest(tmp_path)):
+            OUTPUT_STATS['skipped'] += 1
+        else:
+            os.replace(tmp_path, path)
+            OUTPUT_STATS['written'] += 1
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
 
-        .read-btn {{
-            display: inline-flex;
-            align-items: center;
-            gap: 8px;
-            color: #3498db;
-            font-size: 14px;
-            font-weight: 600;
-            transition: all 0.2s;
-        }}
+STYLE_BLOCK_RE = re.compile(r'<style>(.*?)</style>', re.S)
+STYLESHEET_REF_RE = re.compile(r'assets/(style\.[0-9a-f]{10}\.css)')
 
-        .daily-card:hover .read-btn {{
-            color: #2980b9;
-            transform: translateX(4px);
-        }}
+# 压缩 HTML 时内容须原样保留（或单独处理）的元素
+RAW_ELEMENT_RE = re.compile(r'<(pre|textarea|script|style)\b[^>]*>.*?</\1>', re.S | re.I)
+HTML_COMMENT_RE = re.compile(r'<!--(?!\[if).*?-->', re.S)
+# 块级元素前后的空白不影响渲染，可以整体删除；其余空白折叠为一个空格
+BLOCK_TAGS = ('html|head|body|meta|link|title|style|script|noscript|div|p|ul|ol|li|'
+              'section|nav|header|footer|main|article|h[1-6]|br|hr|table|tr|td|th|!DOCTYPE')
+SPACE_BEFORE_BLOCK_RE = re.compile(r' (?=</?(?:%s)\b)' % BLOCK_TAGS, re.I)
+SPACE_AFTER_BLOCK_RE = re.compile(r'(</?(?:%s)\b[^>]*>) ' % BLOCK_TAGS, re.I)
+CSS_STRING_RE = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')')
+CSS_COMMENT_RE = re.compile(r'/\*.*?\*/', re.S)
+CSS_PUNCT_RE = re.compile(r'\s*([{};,>])\s*')
 
-        .read-btn::after {{
-            content: "→";
-            font-size: 18px;
-        }}
-
-        .footer {{
-            background: #2c3e50;
-            color: #ecf0f1;
-            padding: 50px 20px 30px;
-            margin-top: 60px;
-        }}
-
-        .footer-content {{
-            max-width: 900px;
-            margin: 0 auto;
-            display: grid;
-            grid-template-columns: 2fr 1fr;
-            gap: 40px;
-            align-items: center;
-        }}
+# 预压缩的目标格式（扩展名 -> 压缩函数），mtime 固定为 0 保证相同内容产物一致
+COMPRESSORS = {'.gz': lambda data: gzip.compress(data, 9, mtime=0)}
+if brotli is not None:
+    COMPRESSORS['.br'] = lambda data: brotli.compress(data, quality=11)
 
-        .footer-left {{
-            text-align: left;
-        }}
+def minify_css(css):
+    """压缩 CSS：去注释、折叠空白，引号内的字符串原样保留"""
+    parts = CSS_STRING_RE.split(CSS_COMMENT_RE.sub('', css))
+    for i in range(0, len(parts), 2):
+        text = SPACE_RE.sub(' ', parts[i])
+        text = CSS_PUNCT_RE.sub(r'\1', text)
+        parts[i] = text.replace(': ', ':').replace(';}', '}')
+    return ''.join(parts).strip()
 
-        .footer-title {{
-            font-size: 20px;
-            font-weight: 600;
-            margin-bottom: 16px;
-            color: #3498db;
-        }}
+def minify_html(html):
+    """压缩 HTML：去注释、折叠空白、删除块级元素间的空白
 
-        .footer-description {{
-            font-size: 14px;
-            line-height: 1.8;
-            color: #bdc3c7;
-            margin-bottom: 20px;
-        }}
+    <pre>/<textarea>/<script> 内容原样保留，<style> 内容交给 minify_css()。
+    不改动标签属性，因此压缩后的日报仍可被 DailyScanner 正常解析。
+    """
+    out = []
+    pos = 0
+    for m in RAW_ELEMENT_RE.finditer(html):
+        out.append(_minify_html_text(html[pos:m.start()]))
+        element = m.group(0)
+        if m.group(1).lower() == 'style':
+            open_end = element.index('>') + 1
+            close_start = element.rindex('<')
+            element = element[:open_end] + minify_css(element[open_end:close_start]) + element[close_start:]
+        out.append(element)
+        pos = m.end()
+    out.append(_minify_html_text(html[pos:]))
+    return ''.join(out).strip() + '\n'
 
-        .creator-info {{
-            display: flex;
-            align-items: center;
-            gap: 12px;
-            margin-top: 20px;
-            padding-top: 20px;
-            border-top: 1px solid rgba(255, 255, 255, 0.1);
-        }}
-
-        .creator-avatar {{
-            width: 48px;
-            height: 48px;
-            background: linear-gradient(135deg, #3498db 0%, #2980b9 100%);
-            border-radius: 50%;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            font-size: 24px;
-            font-weight: 700;
-            color: white;
-        }}
+def _minify_html_text(text):
+    text = SPACE_RE.sub(' ', HTML_COMMENT_RE.sub('', text))
+    text = SPACE_BEFORE_BLOCK_RE.sub('', text)
+    return SPACE_AFTER_BLOCK_RE.sub(r'\1', text)
 
-        .creator-details {{
-            flex: 1;
-        }}
+def remove_output(path):
+    """删除生成的文件及其 .gz/.br 预压缩副本"""
+    for candidate in (path, path.with_name(path.name + '.gz'), path.with_name(path.name + '.br')):
+        if candidate.exists():
+            candidate.unlink()
 
-        .creator-name {{
-            font-size: 16px;
-            font-weight: 600;
-            color: #ecf0f1;
-            margin-bottom: 4px;
-        }}
+# 图片处理：没有 width 属性的图片以 IMAGE_BASE_WIDTH（页脚二维码的显示宽度）作为 1x 宽度，
+# 按 IMAGE_DENSITIES 生成高分屏变体；统一输出到 assets/img/ 并以内容哈希命名
+IMAGE_BASE_WIDTH = 160
+IMAGE_DENSITIES = (1, 2, 3)
+IMAGE_FETCH_TIMEOUT = 15
+IMG_TAG_RE = re.compile(r'<img\b([^>]*?)\s*/?>', re.I)
+IMG_ATTR_RE = re.compile(r'([\w-]+)\s*=\s*"([^"]*)"')
+IMAGE_REF_RE = re.compile(r'assets/img/([\w.-]+)')
+_JPEG_SOF_MARKERS = {0xc0, 0xc1, 0xc2, 0xc3, 0xc5, 0xc6, 0xc7, 0xc9, 0xca, 0xcb, 0xcd, 0xce, 0xcf}
 
-        .creator-role {{
-            font-size: 13px;
-            color: #95a5a6;
-        }}
+def image_info(data):
+    """只读文件头识别 PNG/GIF/JPEG/WebP 图片
 
-        .footer-right {{
-            text-align: center;
-        }}
+    Returns:
+        (扩展名, 宽, 高)，无法识别时返回 None
+    """
+    if data[:8] == b'\x89PNG\r\n\x1a\n' and data[12:16] == b'IHDR':
+        return ('png',) + struct.unpack('>II', data[16:24])
+    if data[:6] in (b'GIF87a', b'GIF89a'):
+        return ('gif',) + struct.unpack('<HH', data[6:10])
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        chunk = data[12:16]
+        if chunk == b'VP8 ':
+            width, height = struct.unpack('<HH', data[26:30])
+            return 'webp', width & 0x3fff, height & 0x3fff
+        if chunk == b'VP8L':
+            bits = int.from_bytes(data[21:25], 'little')
+            return 'webp', (bits & 0x3fff) + 1, ((bits >> 14) & 0x3fff) + 1
+        if chunk == b'VP8X':
+            return 'webp', int.from_bytes(data[24:27], 'little') + 1, int.from_bytes(data[27:30], 'little') + 1
+        return None
+    if data[:2] == b'\xff\xd8':
+        pos = 2
+        while pos + 9 < len(data):
+            if data[pos] != 0xff:
+                pos += 1
+                continue
+            marker = data[pos + 1]
+            if marker == 0xff or marker == 0x01 or 0xd0 <= marker <= 0xd8:
+                pos += 1 if marker == 0xff else 2
+                continue
+            if marker in _JPEG_SOF_MARKERS:
+                height, width = struct.unpack('>HH', data[pos + 5:pos + 9])
+                return 'jpg', width, height
+            pos += 2 + struct.unpack('>H', data[pos + 2:pos + 4])[0]
+    return None
 
-        .qrcode-container {{
-            background: white;
-            padding: 0;
-            border-radius: 12px;
-            display: inline-block;
-            box-shadow: 0 4px 12px rgba(0,0,0,0.2);
-        }}
+class ImagePipeline:
+    """把页面中的 <img> 改写为带尺寸、懒加载、内容哈希命名的本地图片
 
-        .qrcode-container img {{
-            display: block;
-            width: 160px;
-            height: 160px;
-        }}
+    - 本地图片（相对路径）与 fetch=True 时下载的远程图片复制到 assets/img/<名称>.<哈希>.<扩展名>，
+      从文件头读出原始尺寸，补上 width/height 避免布局偏移
+    - 安装 Pillow 时按 IMAGE_DENSITIES 生成缩放变体与 WebP，输出 <picture> + srcset
+    - 所有图片加 loading="lazy" 与 decoding="async"（本站图片都在页脚，位于首屏之外）；
+      已有 loading 属性的图片保持原样
+    - 已经指向 assets/img/ 的图片视为处理过，重复运行不会再次改写
+    """
 
-        .qrcode-label {{
-            margin-top: 12px;
-            font-size: 14px;
-            color: #bdc3c7;
-            font-weight: 500;
-        }}
+    def __init__(self, src_dir, cache_dir, fetch=False, out_dir=None):
+        self.src_dir = Path(src_dir)            # 读取本地图片
+        self.out_dir = Path(out_dir or src_dir) # 写出 assets/img/
+        self.cache_dir = Path(cache_dir)
+        self.fetch = fetch
+        self.referenced = set()     # 本次所有页面引用到的 assets/img/ 文件
+        self.failed = {}            # 图片地址 -> 失败原因
+        self._variants = {}         # 图片地址 -> _build_variants() 的结果
 
-        .copyright {{
-            text-align: center;
-            padding-top: 30px;
-            margin-top: 30px;
-            border-top: 1px solid rgba(255, 255, 255, 0.1);
-            color: #95a5a6;
-            font-size: 13px;
-        }}
+    def process(self, rel_path, html):
+        prefix = relative_prefix(rel_path)
+        html = IMG_TAG_RE.sub(lambda m: self._rewrite_tag(rel_path, prefix, m), html)
+        self.referenced.update(IMAGE_REF_RE.findall(html))
+        return html
 
-        @media (max-width: 768px) {{
-            .header {{
-                padding: 40px 0 40px;
-            }}
+    def _rewrite_tag(self, rel_path, prefix, m):
+        attrs = dict(IMG_ATTR_RE.findall(m.group(1)))
+        src = unescape(attrs.get('src', ''))
+        if not src or IMAGE_REF_RE.search(src) or src.startswith('data:'):
+            return m.group(0)
 
-            .header h1 {{
-                font-size: 28px;
-            }}
+        attrs.setdefault('loading', 'lazy')
+        attrs.setdefault('decoding', 'async')
+        variants = self._variants.get(src)
+        if variants is None:
+            variants = self._variants[src] = self._build_variants(rel_path, src, attrs)
+        if not variants:
+            return self._format_img(attrs)
 
-            .header-title {{
-                font-size: 24px;
-            }}
+        display_width, display_height, files, webp_files = variants
+        attrs.update(width=str(display_width), height=str(display_height))
+        attrs['src'] = prefix + files[0][1]
+        if len(files) > 1:
+            attrs['srcset'] = ', '.join(f'{prefix}{name} {density}x' for density, name in files)
+        img = self._format_img(attrs)
+        if not webp_files:
+            return img
+        srcset = ', '.join(f'{prefix}{name} {density}x' for density, name in webp_files)
+        return f'<picture><source type="image/webp" srcset="{srcset}">{img}</picture>'
 
-            .header-description {{
-                font-size: 15px;
-            }}
+    @staticmethod
+    def _format_img(attrs):
+        return '<img ' + ' '.join(f'{name}="{escape(unescape(value))}"' for name, value in attrs.items()) + '>'
 
-            .features-grid {{
-                grid-template-columns: 1fr;
-            }}
+    def _load(self, rel_path, src):
+        """读取图片内容：远程图片只在 fetch=True 时下载，并缓存在 cache_dir；本地文件不存在时抛出 FileNotFoundError"""
+        if urlsplit(src).scheme in ('http', 'https'):
+            if not self.fetch:
+                return None
+            cached = self.cache_dir / hashlib.sha1(src.encode('utf-8')).hexdigest()
+            if cached.exists():
+                return cached.read_bytes()
+            request = urllib.request.Request(src, headers={'User-Agent': 'generate_index.py'})
+            with urllib.request.urlopen(request, timeout=IMAGE_FETCH_TIMEOUT) as response:
+                data = response.read()
+            write_output(cached, data)
+            return data
+        path = unquote(urlsplit(src).path)
+        # 以 / 开头的地址相对发布目录，与 resolve_link() 一致
+        path = self.src_dir / path.lstrip('/') if path.startswith('/') else (self.src_dir / rel_path).parent / path
+        if not path.is_file():
+            raise FileNotFoundError(f'本地图片不存在: {path}')
+        return path.read_bytes()
 
-            .footer-content {{
-                grid-template-columns: 1fr;
-                gap: 30px;
-            }}
+    def _build_variants(self, rel_path, src, attrs):
+        """生成图片的各个变体，返回 (显示宽, 显示高, [(倍率, 文件名)], [(倍率, WebP 文件名)])，失败返回 None"""
+        try:
+            data = self._load(rel_path, src)
+        except OSError as e:
+            self.failed[src] = str(e)
+            return None
+        info = image_info(data) if data else None
+        if not info:
+            if data:
+                self.failed[src] = '无法识别的图片格式'
+            return None
 
-            .footer-left {{
-                text-align: center;
-            }}
+        ext, width, height = info
+        digest = hashlib.sha256(data).hexdigest()[:10]
+        stem = re.sub(r'[^A-Za-z0-9_-]+', '', Path(unquote(urlsplit(src).path)).stem) or 'img'
+        base = f'assets/img/{stem}.{digest}'
+        display_width = int(attrs['width']) if attrs.get('width', '').isdigit() else min(width, IMAGE_BASE_WIDTH)
+        display_height = round(display_width * height / width)
 
-            .creator-info {{
-                justify-content: center;
-            }}
+        if Image is None or ext == 'gif':
+            write_output(self.out_dir / f'{base}.{ext}', data)
+            return display_width, display_height, [(1, f'{base}.{ext}')], []
 
-            .daily-card {{
-                padding: 20px;
-            }}
+        files, webp_files = [], []
+        with Image.open(io.BytesIO(data)) as image:
+            image.load()
+            last_target = 0
+            for density in IMAGE_DENSITIES:
+                # 原图不够大时最后一档取原图宽度，倍率按实际宽度计算
+                target = min(display_width * density, width)
+                if target <= last_target:
+                    break
+                last_target = target
+                density = f'{target / display_width:.3g}'
+                size = (target, max(1, round(target * height / width)))
+                resized = image if size == image.size else image.resize(size, Image.LANCZOS)
+                for fmt, out_ext, bucket in ((ext, ext, files), ('webp', 'webp', webp_files)):
+                    name = f'{base}-{target}.{out_ext}'
+                    buffer = io.BytesIO()
+                    save_image(resized, buffer, fmt)
+                    write_output(self.out_dir / name, buffer.getvalue())
+                    bucket.append((density, name))
+        return display_width, display_height, files, webp_files
 
-            .daily-date {{
-                font-size: 20px;
-            }}
-        }}
-    </style>
-</head>
-<body>
-    <div class="header">
-        <div class="header-content">
-            <h1>📰 蹊涯AI：公众号日报</h1>
-            <div class="subtitle">专注金融投资 · AI智能总结 · 每日精选财经深度</div>
-
-            <div class="header-title">您的金融投资智能助手</div>
-            <div class="header-description">
-                <strong>蹊涯AI日报</strong>专注于金融投资与产业研究领域，
-                运用AI技术从顶级财经公众号中精选深度内容，涵盖产业链分析、公司研报、行业动态、投资机会等核心信息。
-            </div>
+    def finish(self, collect_stale=True):
+        """删除不再被任何页面引用的旧图片，并提示处理失败的图片"""
+        for src, reason in sorted(self.failed.items()):
+            print(f"  ⚠️ 图片处理失败 {src}: {reason}")
+        if collect_stale:
+            for stale in (self.out_dir / 'assets' / 'img').glob('*'):
+                if stale.name not in self.referenced:
+                    remove_output(stale)
 
-            <div class="features-grid">
-                <div class="feature-card">
-                    <div class="feature-icon">📈</div>
-                    <div class="feature-title">专业财经聚合</div>
-                    <div class="feature-desc">精选市值风云、调研纪要、思想钢印等头部财经公众号，聚焦新能源、AI、半导体等热门赛道</div>
-                </div>
-                <div class="feature-card">
+def save_image(image, buffer, fmt):
+    """按格式保存 Pillow 图片：JPEG/WebP 有损压缩，PNG 无损优化"""
+    if fmt == 'jpg':
+        image.convert('RGB').save(buffer, 'JPEG', quality=85, optimize=True, progressive=True)
+    elif fmt == 'webp':
+        image.save(buffer, 'WEBP', quality=80, method=6)
+    else:
+        image.save(buffer, 'PNG', optimize=True)
+
+class SiteWriter:
+    """统一写出站点 HTML 页面，并按需执行后处理
+
+    生成的页面通过 write_page() 写到发布目录 out_dir，已有的手工日报通过 rewrite_page()
+    从 src_dir 读出、处理后写到 out_dir；两者相同时即原地改写（内容不变则不写回），
+    最后调用 finish() 写出共享资源。
+
+    后处理：
+        extract_css: 把内联 <style> 抽取为 assets/style.<内容哈希>.css，
+            页面改为 <link> 引用；内容相同的样式只生成一个文件，
+            配合 netlify.toml 中 /assets/* 的长期缓存，回访时无需重复下载
+        minify: 压缩页面与样式表中的空白和注释
+        precompress: 为页面与样式表生成 .gz（及安装了 brotli 时的 .br）副本，
+            供支持静态预压缩的服务器直接返回
+        images: ImagePipeline 实例，改写页面中的 <img>
+        head_meta: 相对路径 -> 规范链接与 OpenGraph 标签，注入对应页面的 <head>（--sitemap）
+        service_worker: 在每个页面的 </body> 前插入 Service Worker 注册脚本（--service-worker）
+    """
+
+    def __init__(self, out_dir, extract_css=False, minify=False, precompress=False, images=None,
+                 service_worker=False, src_dir=None):
+        self.out_dir = Path(out_dir)
+        self.src_dir = Path(src_dir or out_dir)
+        self.images = images        # ImagePipeline 或 None
+        self.extract_css = extract_css
+        self.minify = minify
+        self.precompress = precompress
+        self.service_worker = service_worker
+        self.stylesheets = {}       # 文件名 -> CSS 内容
+        self.referenced = set()     # 本次所有页面引用到的样式表
+        self.rewritten = []         # 被原地改写的已有页面
+        self.savings = []           # (相对路径, 原始字节, 压缩后字节, {扩展名: 预压缩字节})
+        self.bytes_written = 0      # 写出的页面字节数（不含预压缩副本），供 --stats 统计
+        self.head_meta = {}         # 相对路径 -> render_head_meta() 的结果
+
+    def postprocess(self, rel_path, html):
+        """对单个页面依次执行已启用的后处理"""
+        if rel_path in self.head_meta:
+            html = inject_head_meta(html, self.head_meta[rel_path])
+        if self.service_worker:
+            html = inject_sw_register(html, relative_prefix(rel_path))
+        if self.extract_css:
+            html = self._extract_styles(rel_path, html)
+        if self.images is not None:
+            html = self.images.process(rel_path, html)
+        if self.minify:
+            html = minify_html(html)
+        return html
+
+    def write_page(self, rel_path, html):
+        """后处理并写出一个生成的页面"""
+        new_html = self.postprocess(rel_path, html)
+        write_output(self.out_dir / rel_path, new_html)
+        self.bytes_written += len(new_html.encode('utf-8'))
+        self._compress(rel_path, html, new_html)
+
+    def rewrite_page(self, rel_path):
+        """后处理一个已有页面并写到发布目录；原地处理时内容有变化才写回"""
+        with open(self.src_dir / rel_path, 'r', encoding='utf-8') as f:
+            html = f.read()
+        new_html = self.postprocess(rel_path, html)
+        in_place = self.out_dir == self.src_dir
+        if new_html != html or not in_place:
+            write_output(self.out_dir / rel_path, new_html)
+            self.bytes_written += len(new_html.encode('utf-8'))
+            if in_place:
+                self.rewritten.append(rel_path)
+        self._compress(rel_path, html, new_html)
+
+    def finish(self, collect_stale=True):
+        """写出共享样式表；collect_stale 为真时删除不再被任何页面引用的旧样式表与图片
+
+        只处理了部分页面的增量构建（监听模式）不知道其余页面引用了哪些资源，应传 False。
+        """
+        if self.images is not None:
+            self.images.finish(collect_stale)
+        if not self.extract_css:
+            return
+        assets_dir = self.out_dir / 'assets'
+        for name, css in self.stylesheets.items():
+            if not (assets_dir / name).exists():
+                write_output(assets_dir / name, css)
+            self._compress(f'assets/{name}', css, css)
+        if not collect_stale:
+            return
+        for stale in assets_dir.glob('style.*.css'):
+            if stale.name not in self.referenced:
+                remove_output(stale)
+
+    def report(self, limit=10):
+        """打印本次压缩与预压缩节省的字节数，按节省量从大到小列出前 limit 个文件"""
+        if not self.savings:
+            return
+        total_before = sum(item[1] for item in self.savings)
+        total_after = sum(item[2] for item in self.savings)
+        print(f"\n📦 处理 {len(self.savings)} 个文件: {total_before} → {total_after} 字节", end='')
+        for ext in COMPRESSORS:
+            total_ext = sum(item[3].get(ext, 0) for item in self.savings)
+            if total_ext:
+                print(f"，{ext} 共 {total_ext} 字节", end='')
+        print()
+        for rel_path, before, after, compressed in sorted(self.savings, key=lambda x: x[2] - x[1])[:limit]:
+            detail = ''.join(f"，{ext} {size}" for ext, size in compressed.items())
+            saved = (1 - after / before) * 100 if before else 0
+            print(f"  - {rel_path}: {before} → {after} 字节（-{saved:.1f}%）{detail}")
+        if self.precompress and brotli is None:
+            print("  提示：未安装 brotli，只生成了 .gz（pip install brotli）")
+
+    def _compress(self, rel_path, before, after):
+        """记录字节变化；开启预压缩时为内容较新的文件生成压缩副本"""
+        if not (self.minify or self.precompress):
+            return
+        path = self.out_dir / rel_path
+        data = after.encode('utf-8')
+        compressed = {}
+        if self.precompress:
+            mtime = path.stat().st_mtime_ns
+            for ext, compress in COMPRESSORS.items():
+                target = path.with_name(path.name + ext)
+                if not target.exists() or target.stat().st_mtime_ns < mtime:
+                    write_output(target, compress(data))
+                compressed[ext] = target.stat().st_size
+        self.savings.append((rel_path, len(before.encode('utf-8')), len(data), compressed))
+
+    def _extract_styles(self, rel_path, html):
+        prefix = relative_prefix(rel_path)
+
+        def replace(m):
+            css = textwrap.dedent(m.group(1)).strip() + '\n'
+            if self.minify:
+                css = minify_css(css) + '\n'
+            name = f"style.{hashlib.sha256(css.encode('utf-8')).hexdigest()[:10]}.css"
+            self.stylesheets[name] = css
+            return f'<link rel="stylesheet" href="{prefix}assets/{name}">'
+
+        html = STYLE_BLOCK_RE.sub(replace, html)
+        self.referenced.update(STYLESHEET_REF_RE.findall(html))
+        return html
+
+def remove_stale_pages(out_dir, page_paths, subdirs=('page', 'archive')):
+    """删除 subdirs 下本次未生成的旧页面（如已删除日报所在的月份）"""
+    keep = set(page_paths)
+    for subdir in subdirs:
+        for path in (out_dir / subdir).glob('**/*.html'):
+            if path.relative_to(out_dir).as_posix() not in keep:
+                remove_output(path)
+
+# 发布到单独目录时从日报目录一并复制的静态文件（日报引用的本地图片、附件等）
+STATIC_SUFFIXES = ('.png', '.jpg', '.jpeg', '.gif', '.webp', '.svg', '.ico', '.pdf')
+
+def publish_dir(args, src_dir):
+    """发布目录：--out 指定的目录，未指定或与日报目录相同时返回 src_dir 本身"""
+    if not args.out or Path(args.out).resolve() == Path(src_dir).resolve():
+        return src_dir
+    return Path(args.out)
+
+def publish_static_files(src_dir, out_dir, daily_names):
+    """把日报目录中的静态文件复制到发布目录，并删除发布目录中源文件已不存在的日报
+
+    assets/ 由本脚本生成，不复制；内容相同的文件 write_output() 会跳过。
+    """
+    out_root = out_dir.resolve()
+    for path in src_dir.rglob('*'):
+        rel_path = path.relative_to(src_dir)
+        if (path.is_file() and path.suffix.lower() in STATIC_SUFFIXES and rel_path.parts[0] != 'assets'
+                and out_root not in path.resolve().parents):
+            write_output(out_dir / rel_path, path.read_bytes())
+    for path in out_dir.glob('*.html'):
+        if path.name.lower() not in GENERATED_ROOT_PAGES and path.name not in daily_names:
+            remove_output(path)
+
+def export_archive(dailies, export_dir):
+    """导出结构化数据供下游使用
+
+    - articles.ndjson：每行一篇文章，逐行流式写出，不在内存中拼接整个文件
+    - daily/YYYY-MM-DD.json：每期日报一个分片，包含当期全部文章
+    已不存在的日报对应的旧分片会被删除。
+
+    Returns:
+        导出的文章总数
+    """
+    export_dir = Path(export_dir)
+    daily_dir = export_dir / 'daily'
+    daily_dir.mkdir(parents=True, exist_ok=True)
+
+    total = 0
+    shard_names = set()
+    ndjson_path = export_dir / 'articles.ndjson'
+    with open_output(ndjson_path) as ndjson:
+        for daily in dailies:
+            iso_date = daily_iso_date(daily)
+            articles = [article.to_dict() for article in daily['articles']]
+            for article in articles:
+                line = dict(article, date=iso_date, filename=daily['filename'])
+                ndjson.write(json.dumps(line, ensure_ascii=False) + '\n')
+            total += len(articles)
+
+            shard = {
+                'date': iso_date,
+                'weekday': daily['weekday'],
+                'filename': daily['filename'],
+                'article_count': daily['article_count'],
+                'sources': daily['sources'],
+                'articles': articles,
+            }
+            shard_name = f'{iso_date}.json'
+            shard_names.add(shard_name)
+            write_output(daily_dir / shard_name, json.dumps(shard, ensure_ascii=False, indent=1))
+
+    for stale in daily_dir.glob('*.json'):
+        if stale.name not in shard_names:
+            stale.unlink()
+
+    return total
+
+# SQLite 归档库：结构版本不符时重建（归档库可随时由日报重新生成）
+ARCHIVE_DB_VERSION = 1
+ARCHIVE_DB_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS dailies (
+    date TEXT PRIMARY KEY,
+    filename TEXT NOT NULL,
+    weekday TEXT,
+    article_count INTEGER NOT NULL,
+    source_count INTEGER NOT NULL,
+    digest TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sources (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS tags (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS articles (
+    id INTEGER PRIMARY KEY,
+    date TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    source_id INTEGER REFERENCES sources(id),
+    title TEXT, published TEXT, source TEXT, tags TEXT, summary TEXT,
+    highlights TEXT, benefit TEXT, action TEXT, url TEXT,
+    UNIQUE (date, position)
+);
+CREATE TABLE IF NOT EXISTS article_tags (
+    article_id INTEGER NOT NULL,
+    tag_id INTEGER NOT NULL,
+    PRIMARY KEY (article_id, tag_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS articles_by_source ON articles (source_id, date);
+CREATE INDEX IF NOT EXISTS articles_by_published ON articles (published);
+CREATE INDEX IF NOT EXISTS article_tags_by_tag ON article_tags (tag_id, article_id);
+'''
+# 全文检索表的候选分词器：trigram 支持中文任意子串匹配（SQLite 3.34+），
+# 不可用时退回 unicode61，再不行（未编译 FTS5）就不建全文表，查询改用 LIKE
+ARCHIVE_FTS_TOKENIZERS = ('trigram', 'unicode61')
+
+def daily_digest(daily):
+    """日报解析结果的内容摘要，用于判断归档库中的记录是否需要更新"""
+    data = json.dumps(daily, ensure_ascii=False, sort_keys=True, default=Article.to_dict)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+def open_archive_store(db_path):
+    """打开（必要时创建）SQLite 归档库
+
+    articles 表的列与 Article 字段同名（列表字段存 JSON 文本），另有 date 列，
+    因此归档库可直接作为 --build-dailies 的数据源。
+
+    Returns:
+        (连接, 全文检索分词器名或 None)
+    """
+    db_path = Path(db_path)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(db_path), isolation_level=None)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+
+    version = None
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'meta'").fetchone():
+        row = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        version = row and int(row[0])
+    if version != ARCHIVE_DB_VERSION:
+        tables = [r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+        for name in tables:
+            if not name.startswith(('sqlite_', 'articles_fts_')):
+                conn.execute(f'DROP TABLE IF EXISTS "{name}"')
+
+    conn.executescript(ARCHIVE_DB_SCHEMA)
+    conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)", (str(ARCHIVE_DB_VERSION),))
+
+    row = conn.execute("SELECT value FROM meta WHERE key = 'fts_tokenizer'").fetchone()
+    tokenizer = row[0] if row else None
+    if tokenizer is None:
+        for candidate in ARCHIVE_FTS_TOKENIZERS:
+            try:
+                conn.execute('CREATE VIRTUAL TABLE articles_fts USING fts5('
+                             f"title, source, tags, body, tokenize='{candidate}')")
+            except sqlite3.OperationalError:
+                continue
+            tokenizer = candidate
+            break
+        conn.execute("INSERT INTO meta (key, value) VALUES ('fts_tokenizer', ?)", (tokenizer or '',))
+        if tokenizer:
+            # 新建的全文表是空的，清空摘要让所有日报重新写入
+            conn.execute('UPDATE dailies SET digest = ?', ('',))
+    return conn, tokenizer or None
+
+def _lookup_id(conn, table, name, ids):
+    """取得 sources / tags 中名称对应的 id，不存在则插入；ids 为本次事务内的缓存"""
+    if name not in ids:
+        conn.execute(f'INSERT OR IGNORE INTO {table} (name) VALUES (?)', (name,))
+        ids[name] = conn.execute(f'SELECT id FROM {table} WHERE name = ?', (name,)).fetchone()[0]
+    return ids[name]
+
+def sync_archive_store(db_path, dailies):
+    """把解析出的日报同步到 SQLite 归档库
+
+    所有写入在一个事务内完成：内容摘要未变的日报跳过，变化的日报先删除旧文章再整体写入，
+    已删除的日报连同其文章一并移除，最后清理不再被引用的公众号与标签。
+
+    Returns:
+        {'updated': 更新的期数, 'unchanged': 未变的期数, 'deleted': 删除的期数, 'fts': 分词器名或 None}
+    """
+    conn, tokenizer = open_archive_store(db_path)
+    stats = {'updated': 0, 'unchanged': 0, 'deleted': 0, 'fts': tokenizer}
+    try:
+        existing = dict(conn.execute('SELECT date, digest FROM dailies'))
+        source_ids, tag_ids = {}, {}
+        conn.execute('BEGIN')
+
+        def delete_articles(day):
+            ids = [r[0] for r in conn.execute('SELECT id FROM articles WHERE date = ?', (day,))]
+            if not ids:
+                return
+            placeholders = ','.join('?' * len(ids))
+            conn.execute(f'DELETE FROM article_tags WHERE article_id IN ({placeholders})', ids)
+            if tokenizer:
+                conn.execute(f'DELETE FROM articles_fts WHERE rowid IN ({placeholders})', ids)
+            conn.execute('DELETE FROM articles WHERE date = ?', (day,))
+
+        seen = set()
+        for daily in dailies:
+            day = daily_iso_date(daily)
+            seen.add(day)
+            digest = daily_digest(daily)
+            if existing.get(day) == digest:
+                stats['unchanged'] += 1
+                continue
+            delete_articles(day)
+            conn.execute(
+                'INSERT INTO dailies (date, filename, weekday, article_count, source_count, digest) '
+                'VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (date) DO UPDATE SET '
+                'filename = excluded.filename, weekday = excluded.weekday, article_count = excluded.article_count, '
+                'source_count = excluded.source_count, digest = excluded.digest',
+                (day, daily['filename'], daily['weekday'], daily['article_count'], daily['source_count'], digest))
+            for position, article in enumerate(daily['articles']):
+                source_id = _lookup_id(conn, 'sources', article.source, source_ids) if article.source else None
+                cursor = conn.execute(
+                    'INSERT INTO articles (date, position, source_id, title, published, source, tags, summary, '
+                    'highlights, benefit, action, url) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    (day, position, source_id, article.title, article.published, article.source,
+                     json.dumps(article.tags, ensure_ascii=False), json.dumps(article.summary, ensure_ascii=False),
+                     json.dumps(article.highlights, ensure_ascii=False), article.benefit, article.action, article.url))
+                article_id = cursor.lastrowid
+                conn.executemany('INSERT OR IGNORE INTO article_tags (article_id, tag_id) VALUES (?, ?)',
+                                 [(article_id, _lookup_id(conn, 'tags', tag, tag_ids)) for tag in article.tags])
+                if tokenizer:
+                    conn.execute('INSERT INTO articles_fts (rowid, title, source, tags, body) VALUES (?, ?, ?, ?, ?)',
+                                 (article_id, article.title, article.source, ' '.join(article.tags),
+                                  '\n'.join(article.summary + [article.benefit, article.action])))
+            stats['updated'] += 1
+
+        for day in set(existing) - seen:
+            delete_articles(day)
+            conn.execute('DELETE FROM dailies WHERE date = ?', (day,))
+            stats['deleted'] += 1
+
+        if stats['updated'] or stats['deleted']:
+            conn.execute('DELETE FROM sources WHERE id NOT IN (SELECT source_id FROM articles WHERE source_id IS NOT NULL)')
+            conn.execute('DELETE FROM tags WHERE id NOT IN (SELECT tag_id FROM article_tags)')
+        conn.execute('COMMIT')
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute('ROLLBACK')
+        raise
+    finally:
+        conn.close()
+    return stats
+
+def query_archive_store(db_path, text, limit=20):
+    """在归档库中全文检索文章，按发布时间从新到旧
+
+    trigram 分词要求关键词至少 3 个字，较短的关键词（或没有全文表时）改用 LIKE 扫描，
+    扫描的列与全文表相同：标题、公众号、标签与正文（摘要、阅读收益、行动指引）。
+
+    Returns:
+        (date, published, source, title, url) 元组列表
+    """
+    conn, tokenizer = open_archive_store(db_path)
+    try:
+        columns = 'a.date, a.published, a.source, a.title, a.url'
+        if tokenizer and (tokenizer != 'trigram' or len(text) >= 3):
+            phrase = '"' + text.replace('"', '""') + '"'
+            sql = (f'SELECT {columns} FROM articles_fts JOIN articles a ON a.id = articles_fts.rowid '
+                   'WHERE articles_fts MATCH ? ORDER BY a.date DESC, a.published DESC LIMIT ?')
+            return conn.execute(sql, (phrase, limit)).fetchall()
+        pattern = '%' + text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        match = ' OR '.join(f"a.{name} LIKE ?1 ESCAPE '\\'"
+                            for name in ('title', 'source', 'tags', 'summary', 'benefit', 'action'))
+        sql = f'SELECT {columns} FROM articles a WHERE {match} ORDER BY a.date DESC, a.published DESC LIMIT ?2'
+        return conn.execute(sql, (pattern, limit)).fetchall()
+    finally:
+        conn.close()
+
+# 全文搜索：中日韩文字按二元组切分，ASCII 按单词切分（须与 search.html 中的 JS 保持一致）
+SEARCH_TOKEN_RE = re.compile(r'[a-z0-9]+|[㐀-䶿一-鿿豈-﫿]+')
+# 每个索引分片期望容纳的词项数，分片数取不小于 词项数/该值 的 2 的幂
+SEARCH_TERMS_PER_SHARD = 4000
+# 每个文档分片包含的文章数
+SEARCH_DOCS_PER_CHUNK = 500
+SEARCH_SNIPPET_LENGTH = 80
+
+def tokenize_search_text(text):
+    """把文本切分为搜索词项集合：中文取相邻二字组，单字词保留单字，英文数字取整词"""
+    terms = set()
+    for run in SEARCH_TOKEN_RE.findall(text.lower()):
+        if run[0] < '㐀':
+            terms.add(run)
+        elif len(run) == 1:
+            terms.add(run)
+        else:
+            terms.update(run[i:i + 2] for i in range(len(run) - 1))
+    return terms
+
+def fnv1a_32(data):
+    """32 位 FNV-1a 哈希，浏览器端用同一算法定位词项所在分片"""
+    h = 0x811c9dc5
+    for byte in data:
+        h = ((h ^ byte) * 0x01000193) & 0xffffffff
+    return h
+
+def build_search_index(dailies, search_dir):
+    """构建静态全文搜索索引
+
+    文档编号按日报从新到旧、卡片顺序分配，因此倒排表天然有序，
+    结果默认按时间倒序。输出文件：
+    - meta.json：分片数、文档数等元信息
+    - docs-K.json：第 K 个文档分片（标题、日期、公众号、摘要片段、链接）
+    - index-N.json：第 N 个词项分片，倒排表做差分编码以压缩体积
+    浏览器只按需加载查询词所在的分片与命中文档所在的分片。
+
+    Returns:
+        (文档数, 词项数, 词项分片数)
+    """
+    search_dir = Path(search_dir)
+    postings = {}
+    docs = []
+    for daily in dailies:
+        iso_date = daily_iso_date(daily)
+        for article in daily['articles']:
+            doc_id = len(docs)
+            text = ' '.join([article.title, article.source, ' '.join(article.tags)] + article.summary)
+            for term in tokenize_search_text(text):
+                postings.setdefault(term, []).append(doc_id)
+            snippet = article.summary[0] if article.summary else ''
+            docs.append({
+                't': article.title,
+                'd': iso_date,
+                's': article.source,
+                'g': article.tags,
+                'x': snippet[:SEARCH_SNIPPET_LENGTH],
+                'f': daily['filename'],
+            })
+
+    shard_count = 1
+    while shard_count * SEARCH_TERMS_PER_SHARD < len(postings):
+        shard_count *= 2
+
+    shards = [{} for _ in range(shard_count)]
+    for term, ids in postings.items():
+        # 差分编码：[3, 10, 12] -> [3, 7, 2]
+        shards[fnv1a_32(term.encode('utf-8')) % shard_count][term] = [ids[0]] + [b - a for a, b in zip(ids, ids[1:])]
+
+    outputs = {}
+    outputs['meta.json'] = {
+        'version': 1,
+        'docs': len(docs),
+        'docs_per_chunk': SEARCH_DOCS_PER_CHUNK,
+        'shards': shard_count,
+    }
+    for k in range(0, len(docs), SEARCH_DOCS_PER_CHUNK):
+        outputs[f'docs-{k // SEARCH_DOCS_PER_CHUNK}.json'] = docs[k:k + SEARCH_DOCS_PER_CHUNK]
+    for n, shard in enumerate(shards):
+        outputs[f'index-{n}.json'] = shard
+
+    for name, data in outputs.items():
+        write_output(search_dir / name, json.dumps(data, ensure_ascii=False, separators=(',', ':'), sort_keys=True))
+    for stale in search_dir.glob('*.json'):
+        if stale.name not in outputs:
+            stale.unlink()
+
+    return len(docs), len(postings), shard_count
+
+SEARCH_PAGE_HTML = '''        <div class="search-box">
+            <input id="search-input" type="search" placeholder="输入关键词，如：存储芯片、创新药、市值风云" autofocus>
+        </div>
+        <div id="search-status" class="search-status"></div>
+        <div id="search-results"></div>
+        <noscript><div class="search-status">搜索功能需要启用 JavaScript</div></noscript>
+        <script>
+        (function () {
+            var TOKEN_RE = /[a-z0-9]+|[\\u3400-\\u4dbf\\u4e00-\\u9fff\\uf900-\\ufaff]+/g;
+            var MAX_RESULTS = 50;
+            var cache = {};
+
+            function getJSON(name) {
+                if (!cache[name]) {
+                    cache[name] = fetch('search/' + name).then(function (r) {
+                        if (!r.ok) throw new Error('HTTP ' + r.status);
+                        return r.json();
+                    }).catch(function (err) {
+                        // 失败的请求不缓存，下次搜索时重新加载
+                        delete cache[name];
+                        throw err;
+                    });
+                }
+                return cache[name];
+            }
+
+            function fnv1a(str) {
+                var bytes = new TextEncoder().encode(str), h = 0x811c9dc5;
+                for (var i = 0; i < bytes.length; i++) {
+                    h = Math.imul(h ^ bytes[i], 0x01000193) >>> 0;
+                }
+                return h;
+            }
+
+            function tokenize(text) {
+                var terms = {}, runs = text.toLowerCase().match(TOKEN_RE) || [];
+                runs.forEach(function (run) {
+                    if (run < '\\u3400' || run.length === 1) {
+                        terms[run] = true;
+                    } else {
+                        for (var i = 0; i < run.length - 1; i++) terms[run.substr(i, 2)] = true;
+                    }
+                });
+                return Object.keys(terms);
+            }
+
+            function decode(deltas) {
+                var ids = [], last = 0;
+                for (var i = 0; i < deltas.length; i++) { last += deltas[i]; ids.push(last); }
+                return ids;
+            }
+
+            function intersect(a, b) {
+                var out = [], i = 0, j = 0;
+                while (i < a.length && j < b.length) {
+                    if (a[i] === b[j]) { out.push(a[i]); i++; j++; }
+                    else if (a[i] < b[j]) i++;
+                    else j++;
+                }
+                return out;
+            }
+
+            function escapeHTML(s) {
+                return String(s).replace(/[&<>"]/g, function (c) {
+                    return {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;'}[c];
+                });
+            }
+
+            var input = document.getElementById('search-input');
+            var status = document.getElementById('search-status');
+            var results = document.getElementById('search-results');
+            var seq = 0;
+
+            function search(query) {
+                var current = ++seq;
+                var terms = tokenize(query);
+                if (!terms.length) { status.textContent = ''; results.innerHTML = ''; return; }
+                getJSON('meta.json').then(function (meta) {
+                    return Promise.all(terms.map(function (term) {
+                        return getJSON('index-' + (fnv1a(term) % meta.shards) + '.json').then(function (shard) {
+                            return decode(shard[term] || []);
+                        });
+                    })).then(function (lists) {
+                        lists.sort(function (a, b) { return a.length - b.length; });
+                        var ids = lists.reduce(intersect);
+                        var total = ids.length;
+                        ids = ids.slice(0, MAX_RESULTS);
+                        var chunks = {};
+                        ids.forEach(function (id) { chunks[Math.floor(id / meta.docs_per_chunk)] = true; });
+                        return Promise.all(Object.keys(chunks).map(function (k) {
+                            return getJSON('docs-' + k + '.json').then(function (docs) { return [k, docs]; });
+                        })).then(function (loaded) {
+                            if (current !== seq) return;
+                            var byChunk = {};
+                            loaded.forEach(function (pair) { byChunk[pair[0]] = pair[1]; });
+                            status.textContent = '共找到 ' + total + ' 篇文章' + (total > MAX_RESULTS ? '，显示最新 ' + MAX_RESULTS + ' 篇' : '');
+                            results.innerHTML = ids.map(function (id) {
+                                var doc = byChunk[Math.floor(id / meta.docs_per_chunk)][id % meta.docs_per_chunk];
+                                var tags = doc.g.map(function (t) { return '<span class="preview-tag">#' + escapeHTML(t) + '</span>'; }).join('');
+                                return '<a class="daily-card" href="' + escapeHTML(doc.f) + '">' +
+                                    '<div class="search-title">' + escapeHTML(doc.t) + '</div>' +
+                                    '<div class="meta-item">📅 ' + doc.d + ' · 📱 ' + escapeHTML(doc.s) + '</div>' +
+                                    '<div class="search-snippet">' + escapeHTML(doc.x) + '…</div>' +
+                                    '<div class="daily-preview">' + tags + '</div></a>';
+                            }).join('');
+                        });
+                    });
+                }).catch(function () {
+                    status.textContent = '搜索索引加载失败，请稍后重试';
+                });
+            }
+
+            var timer;
+            input.addEventListener('input', function () {
+                clearTimeout(timer);
+                timer = setTimeout(function () { search(input.value); }, 150);
+            });
+            var initial = new URLSearchParams(location.search).get('q');
+            if (initial) { input.value = initial; search(initial); }
+        })();
+        </script>
+'''
+
+def render_search_page():
+    """渲染 search.html：复用首页样式，结果由浏览器按需加载索引分片生成"""
+    return generate_index_html(
+        [],
+        page_title='搜索',
+        section_title='全文搜索',
+        extra_html=SEARCH_PAGE_HTML + '        <div class="pager"><a class="pager-link" href="index.html">返回首页</a></div>\n',
+    )
+
+# 订阅源：每个源最多保留的条目数，日期按北京时间解释
+FEED_SIZE = 20
+FEED_TZ = timezone(timedelta(hours=8))
+FEED_DESCRIPTION = '专注金融投资 · AI智能总结 · 每日精选财经深度'
+
+def resolve_site_url(value=None):
+    """站点根地址：优先使用参数，其次是 Netlify 构建时注入的 URL 环境变量，去掉末尾的 /"""
+    url = value or os.environ.get('URL', '')
+    return url.rstrip('/') or None
+
+def _article_date(article, fallback):
+    """文章发布时间（如 2025-11-15 08:50），无法解析时退回所在日报的日期"""
+    try:
+        return datetime.strptime(article.published, '%Y-%m-%d %H:%M').replace(tzinfo=FEED_TZ)
+    except ValueError:
+        return fallback
+
+def _article_html(article):
+    summary = ''.join(f'<p>{escape(p, quote=False)}</p>' for p in article.summary)
+    extra = ''.join(f'<p><strong>{label}</strong>{escape(text, quote=False)}</p>'
+                    for label, text in (('阅读收益：', article.benefit), ('行动指引：', article.action)) if text)
+    return (f'<h3><a href="{escape(article.url)}">{escape(article.title, quote=False)}</a></h3>'
+            f'<p>📱 {escape(article.source, quote=False)}</p>{summary}{extra}')
+
+def feed_entries(dailies, site_url, per_article=False, limit=FEED_SIZE):
+    """把日报整理为与格式无关的订阅条目，最新的在前，最多 limit 条
+
+    per_article 为真时每篇文章一个条目（链接到原文），否则每期日报一个条目。
+    条目只由日报内容决定，不含构建时间，内容不变时生成的订阅文件逐字节相同。
+
+    Args:
+        dailies: 已按日期从新到旧排序的日报列表
+        site_url: 站点根地址，用于生成绝对链接
+
+    Returns:
+        条目字典列表：id、url、title、date、summary、content_html、author、tags
+    """
+    entries = []
+    for daily in dailies:
+        page_url = f"{site_url}/{daily['filename']}"
+        day = datetime(int(daily['year']), int(daily['month']), int(daily['day']), tzinfo=FEED_TZ)
+        articles = daily['articles']
+        if per_article:
+            for i, article in enumerate(articles, 1):
+                entries.append({
+                    'id': article.url or f'{page_url}#article-{i}',
+                    'url': article.url or page_url,
+                    'title': article.title,
+                    'date': _article_date(article, day),
+                    'summary': ' '.join(article.summary) or article.benefit,
+                    'content_html': _article_html(article),
+                    'author': article.source,
+                    'tags': list(article.tags),
+                })
+        else:
+            tags = []
+            for article in articles:
+                tags.extend(tag for tag in article.tags if tag not in tags)
+            entries.append({
+                'id': page_url,
+                'url': page_url,
+                'title': f"{SITE_TITLE} {daily['date']} 星期{daily['weekday']}",
+                'date': day,
+                'summary': f"共 {daily['article_count']} 篇：" + '；'.join(a.title for a in articles),
+                'content_html': ''.join(_article_html(article) for article in articles),
+                'author': SITE_TITLE,
+                'tags': tags,
+            })
+        # 日报已按日期从新到旧排序，攒够 limit 条后不再看更早的日报
+        if len(entries) >= limit:
+            break
+    entries.sort(key=lambda e: (e['date'], e['id']), reverse=True)
+    return entries[:limit]
+
+def render_rss(entries, site_url):
+    """RSS 2.0"""
+    updated = format_datetime(entries[0]['date']) if entries else ''
+    items = []
+    for e in entries:
+        categories = ''.join(f'\n      <category>{escape(tag)}</category>' for tag in e['tags'])
+        items.append(
+            f'    <item>\n'
+            f'      <title>{escape(e["title"])}</title>\n'
+            f'      <link>{escape(e["url"])}</link>\n'
+            f'      <guid isPermaLink="{"true" if e["id"] == e["url"] else "false"}">{escape(e["id"])}</guid>\n'
+            f'      <pubDate>{format_datetime(e["date"])}</pubDate>\n'
+            f'      <description>{escape(e["content_html"])}</description>{categories}\n'
+            f'    </item>\n')
+    return (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<rss version="2.0" xmlns:atom="http://www.w3.org/2005/Atom">\n'
+        '  <channel>\n'
+        f'    <title>{escape(SITE_TITLE)}</title>\n'
+        f'    <link>{escape(site_url)}/</link>\n'
+        f'    <description>{escape(FEED_DESCRIPTION)}</description>\n'
+        '    <language>zh-CN</language>\n'
+        f'    <lastBuildDate>{updated}</lastBuildDate>\n'
+        f'    <atom:link href="{escape(site_url)}/feed.xml" rel="self" type="application/rss+xml"/>\n'
+        + ''.join(items) +
+        '  </channel>\n'
+        '</rss>\n')
+
+def render_atom(entries, site_url):
+    """Atom 1.0"""
+    updated = entries[0]['date'].isoformat() if entries else datetime(1970, 1, 1, tzinfo=FEED_TZ).isoformat()
+    items = []
+    for e in entries:
+        categories = ''.join(f'\n    <category term="{escape(tag)}"/>' for tag in e['tags'])
+        items.append(
+            '  <entry>\n'
+            f'    <id>{escape(e["id"])}</id>\n'
+            f'    <title>{escape(e["title"])}</title>\n'
+            f'    <link href="{escape(e["url"])}"/>\n'
+            f'    <updated>{e["date"].isoformat()}</updated>\n'
+            f'    <author><name>{escape(e["author"])}</name></author>\n'
+            f'    <summary>{escape(e["summary"])}</summary>\n'
+            f'    <content type="html">{escape(e["content_html"])}</content>{categories}\n'
+            '  </entry>\n')
+    return (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<feed xmlns="http://www.w3.org/2005/Atom" xml:lang="zh-CN">\n'
+        f'  <id>{escape(site_url)}/</id>\n'
+        f'  <title>{escape(SITE_TITLE)}</title>\n'
+        f'  <subtitle>{escape(FEED_DESCRIPTION)}</subtitle>\n'
+        f'  <link href="{escape(site_url)}/"/>\n'
+        f'  <link rel="self" href="{escape(site_url)}/atom.xml"/>\n'
+        f'  <updated>{updated}</updated>\n'
+        + ''.join(items) +
+        '</feed>\n')
+
+def render_json_feed(entries, site_url):
+    """JSON Feed 1.1"""
+    feed = {
+        'version': 'https://jsonfeed.org/version/1.1',
+        'title': SITE_TITLE,
+        'home_page_url': f'{site_url}/',
+        'feed_url': f'{site_url}/feed.json',
+        'description': FEED_DESCRIPTION,
+        'language': 'zh-CN',
+        'items': [{
+            'id': e['id'],
+            'url': e['url'],
+            'title': e['title'],
+            'summary': e['summary'],
+            'content_html': e['content_html'],
+            'date_published': e['date'].isoformat(),
+            'authors': [{'name': e['author']}],
+            'tags': e['tags'],
+        } for e in entries],
+    }
+    return json.dumps(feed, ensure_ascii=False, indent=1) + '\n'
+
+# 订阅源文件名 -> (MIME 类型, 链接标题, 渲染函数)
+FEED_FILES = {
+    'feed.xml': ('application/rss+xml', 'RSS', render_rss),
+    'atom.xml': ('application/atom+xml', 'Atom', render_atom),
+    'feed.json': ('application/feed+json', 'JSON Feed', render_json_feed),
+}
+
+def write_feeds(dailies, out_dir, site_url, per_article=False, limit=FEED_SIZE):
+    """写出 RSS、Atom 与 JSON Feed，返回条目数
+
+    内容未变时 write_output() 不会改写文件，静态服务器据此给出的 ETag 保持不变。
+    """
+    entries = feed_entries(dailies, site_url, per_article, limit)
+    for name, (_, _, render) in FEED_FILES.items():
+        write_output(Path(out_dir) / name, render(entries, site_url))
+    return len(entries)
+
+# 站点地图：单个文件最多 SITEMAP_MAX_URLS 个地址（协议上限），超出时拆分并生成索引文件
+SITEMAP_MAX_URLS = 50000
+SITEMAP_SHARD_RE = re.compile(r'sitemap-\d+\.xml$')
+# 页面 <head> 中由 inject_head_meta() 维护的标签，重新注入前先全部去掉
+META_TAG_RE = re.compile(r'\n?[ \t]*<(?:link rel="canonical"|meta (?:name="description"|property="og:[\w:]+"))[^>]*>')
+META_DESCRIPTION_LENGTH = 150
+
+def render_head_meta(url, title, description, og_type='website'):
+    """规范链接、描述与 OpenGraph 标签"""
+    if len(description) > META_DESCRIPTION_LENGTH:
+        description = description[:META_DESCRIPTION_LENGTH - 1] + '…'
+    tags = [
+        f'<link rel="canonical" href="{escape(url)}">',
+        f'<meta name="description" content="{escape(description)}">',
+        f'<meta property="og:site_name" content="{escape(SITE_TITLE)}">',
+        '<meta property="og:locale" content="zh_CN">',
+        f'<meta property="og:type" content="{og_type}">',
+        f'<meta property="og:title" content="{escape(title)}">',
+        f'<meta property="og:description" content="{escape(description)}">',
+        f'<meta property="og:url" content="{escape(url)}">',
+    ]
+    return ''.join(f'    {tag}\n' for tag in tags)
+
+def daily_head_meta(daily, site_url):
+    """日报页面的 <head> 元数据，描述取自解析出的文章标题"""
+    titles = '；'.join(article.title for article in daily['articles'] if article.title)
+    return render_head_meta(
+        f"{site_url}/{daily['filename']}",
+        f"{SITE_TITLE} {daily['date']} 星期{daily['weekday']}",
+        f"{daily['date']} 星期{daily['weekday']} · {daily['article_count']} 篇：{titles}",
+        og_type='article',
+    )
+
+def inject_head_meta(html, meta):
+    """把 meta 插入 </head> 之前；已有的同类标签先去掉，重复执行结果不变"""
+    html = META_TAG_RE.sub('', html)
+    pos = html.find('</head>')
+    if pos < 0:
+        return html
+    return html[:pos] + meta + html[pos:]
+
+def render_sitemap(urls):
+    """urlset：urls 为 (绝对地址, lastmod) 列表"""
+    items = ''.join(f'  <url>\n    <loc>{escape(loc)}</loc>\n    <lastmod>{lastmod}</lastmod>\n  </url>\n'
+                    for loc, lastmod in urls)
+    return ('<?xml version="1.0" encoding="utf-8"?>\n'
+            '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+            + items + '</urlset>\n')
+
+def render_sitemap_index(shards):
+    """sitemapindex：shards 为 (分片地址, lastmod) 列表"""
+    items = ''.join(f'  <sitemap>\n    <loc>{escape(loc)}</loc>\n    <lastmod>{lastmod}</lastmod>\n  </sitemap>\n'
+                    for loc, lastmod in shards)
+    return ('<?xml version="1.0" encoding="utf-8"?>\n'
+            '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+            + items + '</sitemapindex>\n')
+
+def write_sitemap(out_dir, site_url, urls, max_urls=SITEMAP_MAX_URLS):
+    """写出 sitemap.xml 与 robots.txt，返回分片数
+
+    地址不超过 max_urls 时 sitemap.xml 直接列出全部地址，否则拆分为
+    sitemap-N.xml 并由 sitemap.xml 作为索引引用它们；不再需要的旧分片会被删除。
+    lastmod 来自内容摘要而非构建时间，内容不变时文件逐字节相同。
+
+    Args:
+        out_dir: 发布目录
+        site_url: 站点根地址
+        urls: (相对路径, lastmod) 列表
+    """
+    out_dir = Path(out_dir)
+    urls = [(f'{site_url}/' if path == 'index.html' else f'{site_url}/{path}', lastmod) for path, lastmod in urls]
+    shard_names = []
+    if len(urls) <= max_urls:
+        write_output(out_dir / 'sitemap.xml', render_sitemap(urls))
+    else:
+        shards = []
+        for n, start in enumerate(range(0, len(urls), max_urls), 1):
+            chunk = urls[start:start + max_urls]
+            name = f'sitemap-{n}.xml'
+            write_output(out_dir / name, render_sitemap(chunk))
+            shard_names.append(name)
+            shards.append((f'{site_url}/{name}', max(lastmod for _, lastmod in chunk)))
+        write_output(out_dir / 'sitemap.xml', render_sitemap_index(shards))
+    for path in out_dir.glob('sitemap-*.xml'):
+        if SITEMAP_SHARD_RE.match(path.name) and path.name not in shard_names:
+            remove_output(path)
+    write_output(out_dir / 'robots.txt', f'User-agent: *\nAllow: /\n\nSitemap: {site_url}/sitemap.xml\n')
+    return max(len(shard_names), 1)
+
+# 校验：本地链接与资源每次构建都检查，页面中提取出的链接与日报结构检查结果按内容哈希缓存；
+# 外部链接检查成功的结果在 LINK_CHECK_TTL 秒内复用，失败的每次构建都重新检查
+VALIDATE_CACHE_VERSION = 1
+LINK_CHECK_TTL = 7 * 24 * 3600
+LINK_CHECK_TIMEOUT = 10
+LINK_CHECK_WORKERS = 8
+LINK_ATTR_RE = re.compile(r'\s(href|src|srcset)="([^"]*)"', re.I)
+SCRIPT_BODY_RE = re.compile(r'(<script\b[^>]*>).*?(</script>)', re.S | re.I)
+SKIPPED_LINK_RE = re.compile(r'(?:#|mailto:|tel:|javascript:|data:)', re.I)
+ARTICLE_CARD_MARKER = '<div class="article-card">'
+
+def page_links(html):
+    """页面 href/src/srcset 引用的地址，去重并保持顺序；脚本内容中的字符串不算"""
+    html = SCRIPT_BODY_RE.sub(r'\1\2', html)
+    links = []
+    for attr, value in LINK_ATTR_RE.findall(html):
+        values = [item.split()[0] for item in value.split(',') if item.strip()] if attr.lower() == 'srcset' else [value]
+        for link in values:
+            link = unescape(link.strip())
+            if link and not SKIPPED_LINK_RE.match(link) and link not in links:
+                links.append(link)
+    return links
+
+def check_daily_structure(html):
+    """检查日报的 article-card 结构，返回问题描述列表
+
+    parse_html_file() 对缺少字段的卡片只会得到空字符串，这里把它们逐一列出。
+    早期日报没有 ⏰ 发布时间，不作为必需字段。
+    """
+    cards = html.split(ARTICLE_CARD_MARKER)[1:]
+    if not cards:
+        return ['没有找到任何 article-card']
+    errors = []
+    for i, card in enumerate(cards, 1):
+        article = parse_article_card(card)
+        missing = [label for label, value in (('标题', article.title), ('📱 公众号', article.source),
+                                              ('阅读原文链接', article.url))
+                   if not value]
+        if missing:
+            errors.append(f"第 {i} 篇文章缺少{'、'.join(missing)}")
+    return errors
+
+def resolve_link(rel_path, link, site_url=None):
+    """把页面中的链接归类
+
+    Returns:
+        ('external', 地址)、('local', 相对发布目录的路径) 或 (None, None)（只有查询串或锚点）；
+        指向站点根地址的绝对链接按本地路径处理，越出发布目录的本地路径原样返回（以 ../ 开头）
+    """
+    if site_url and (link == site_url or link.startswith(site_url + '/')):
+        link = '/' + link[len(site_url):].lstrip('/')
+    parts = urlsplit(link)
+    if parts.scheme in ('http', 'https') or parts.netloc:
+        return 'external', link if parts.scheme else 'https:' + link
+    path = unquote(parts.path)
+    if not path:
+        return None, None
+    if path.startswith('/'):
+        target = path.lstrip('/')
+    else:
+        target = posixpath.normpath(posixpath.join(posixpath.dirname(rel_path), path))
+    if path.endswith('/') or target in ('', '.'):
+        target = posixpath.join(target if target not in ('', '.') else '', 'index.html')
+    return 'local', target
+
+def check_link(url, timeout=LINK_CHECK_TIMEOUT):
+    """请求一个外部链接，服务器拒绝 HEAD 时改用 GET
+
+    Returns:
+        (HTTP 状态码, 说明)，网络错误时状态码为 0
+    """
+    for method in ('HEAD', 'GET'):
+        request = urllib.request.Request(url, method=method, headers={'User-Agent': 'generate_index.py'})
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                return response.status, ''
+        except urllib.error.HTTPError as e:
+            if method == 'HEAD' and e.code in (403, 405, 501):
+                continue
+            return e.code, str(e.reason)
+        except (OSError, ValueError) as e:
+            return 0, str(getattr(e, 'reason', e))
+
+def check_external_links(urls, results, workers=LINK_CHECK_WORKERS):
+    """以最多 workers 个并发请求检查 urls，结果写入 results（地址 -> 检查结果），返回实际请求数
+
+    不再被任何页面引用的地址从 results 中移除。
+    """
+    now = time.time()
+    pending = [url for url in urls
+               if not (url in results and results[url]['ok'] and now - results[url]['checked'] < LINK_CHECK_TTL)]
+    if pending:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            for url, (status, reason) in zip(pending, pool.map(check_link, pending)):
+                results[url] = {'status': status, 'reason': reason, 'ok': 0 < status < 400, 'checked': now}
+    for url in set(results) - set(urls):
+        del results[url]
+    return len(pending)
+
+def load_validate_cache(path):
+    """读取校验缓存，path 为 None（--no-cache）或缓存不存在、损坏、版本不符时返回空缓存"""
+    data = None
+    if path is not None:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            pass
+    if not isinstance(data, dict) or data.get('version') != VALIDATE_CACHE_VERSION:
+        data = {'version': VALIDATE_CACHE_VERSION}
+    data.setdefault('pages', {})
+    data.setdefault('external', {})
+    return data
+
+def validate_site(out_dir, cache, daily_names, site_url=None, check_external=False, workers=LINK_CHECK_WORKERS):
+    """校验发布目录中的全部 HTML 页面
+
+    检查本地链接与资源（href/src/srcset）是否存在、日报的卡片结构是否完整，
+    check_external 为真时并发检查外部链接。页面内容哈希未变时直接复用缓存中
+    提取出的链接与结构问题，只重新判断链接目标是否存在。
+
+    Args:
+        cache: load_validate_cache() 的结果，原地更新
+        daily_names: 日报文件名集合，只有这些页面做结构检查
+
+    Returns:
+        (问题列表 [(页面, 说明)], 统计 {pages, rechecked, links, external, requested})
+    """
+    out_dir = Path(out_dir)
+    pages = cache['pages']
+    problems = []
+    external = {}       # 外部地址 -> 引用它的页面
+    exists = {}         # 本地路径 -> 是否存在
+    seen = set()
+    stats = {'pages': 0, 'rechecked': 0, 'links': 0, 'external': 0, 'requested': 0}
+    for path in sorted(out_dir.rglob('*.html')):
+        rel_path = path.relative_to(out_dir).as_posix()
+        data = path.read_bytes()
+        digest = hashlib.sha256(data).hexdigest()
+        is_daily = rel_path in daily_names
+        entry = pages.get(rel_path)
+        if not entry or entry['sha256'] != digest or entry['daily'] != is_daily:
+            html = data.decode('utf-8', errors='replace')
+            entry = pages[rel_path] = {
+                'sha256': digest,
+                'daily': is_daily,
+                'links': page_links(html),
+                'errors': check_daily_structure(html) if is_daily else [],
+            }
+            stats['rechecked'] += 1
+        seen.add(rel_path)
+        stats['pages'] += 1
+        problems.extend((rel_path, error) for error in entry['errors'])
+        for link in entry['links']:
+            kind, target = resolve_link(rel_path, link, site_url)
+            if kind == 'external':
+                external.setdefault(target, []).append(rel_path)
+            elif kind == 'local':
+                stats['links'] += 1
+                if target not in exists:
+                    exists[target] = not target.startswith('../') and (out_dir / target).is_file()
+                if not exists[target]:
+                    problems.append((rel_path, f'链接目标不存在: {link}'))
+    for rel_path in set(pages) - seen:
+        del pages[rel_path]
+
+    stats['external'] = len(external)
+    if check_external:
+        stats['requested'] = check_external_links(list(external), cache['external'], workers)
+        for url, referrers in external.items():
+            result = cache['external'][url]
+            if not result['ok']:
+                detail = f"HTTP {result['status']}" if result['status'] else result['reason']
+                problems.extend((rel_path, f'外部链接失效（{detail}）: {url}') for rel_path in referrers)
+    return problems, stats
+
+# 去重：近似重复用 MinHash + LSH。签名取 MINHASH_PERMUTATIONS 个最小哈希，
+# 按 MINHASH_BANDS 段分桶，只比较至少有一段完全相同的文章，避免两两比较；
+# 估计的 Jaccard 相似度（签名中相同位置的比例）不低于 DEDUP_SIMILARITY 判为近似重复
+MINHASH_PERMUTATIONS = 32
+MINHASH_BANDS = 8
+DEDUP_SIMILARITY = 0.7
+# 二字组少于该数量的文本信息太少，只参与精确去重
+DEDUP_MIN_SHINGLES = 20
+# 规范化后短于该长度的标题（如每周固定的“早报”）相同不足以判定重复，还需正文 MinHash 相似度达标
+DEDUP_MIN_TITLE_LENGTH = 10
+DEDUP_NORMALIZE_RE = re.compile(r'[\W_]+')
+# 用固定种子生成的异或掩码模拟多个独立的哈希函数，保证每次构建结果一致
+_MINHASH_MASKS = [random.Random(i).getrandbits(64) for i in range(MINHASH_PERMUTATIONS)]
+
+def normalize_article_url(url):
+    """公众号文章链接只保留 __biz/mid/idx 三个标识参数，其余链接去掉 # 片段"""
+    parts = urlsplit(url.strip())
+    if parts.netloc.endswith('mp.weixin.qq.com'):
+        query = parse_qs(parts.query)
+        key = [query.get(name, [''])[0] for name in ('__biz', 'mid', 'idx')]
+        if all(key):
+            return 'weixin:' + ':'.join(key)
+    return urlunsplit((parts.scheme, parts.netloc.lower(), parts.path, parts.query, ''))
+
+def minhash_signature(text):
+    """文本二字组集合的 MinHash 签名，二字组太少时返回 None"""
+    shingles = {text[i:i + 2] for i in range(len(text) - 1)}
+    if len(shingles) < DEDUP_MIN_SHINGLES:
+        return None
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=8).digest(), 'little')
+              for s in shingles]
+    return tuple(min([h ^ mask for h in hashes]) for mask in _MINHASH_MASKS)
+
+def find_duplicates(dailies):
+    """在全部日报中查找重复与近似重复的文章
+
+    先按规范化后的链接与标题精确匹配，再用标题与正文的 MinHash 签名 + LSH 分段桶找出近似重复。
+    短于 DEDUP_MIN_TITLE_LENGTH 的标题不做精确匹配，标题相同的文章直接比较签名，相似度达标才算重复。
+    同一组内最早出现的文章视为原文，其余为重复。
+
+    Args:
+        dailies: 日报列表（任意顺序）
+
+    Returns:
+        重复组列表，每组为 {'original': 文章信息, 'duplicates': [文章信息 + reason/similarity]}，
+        文章信息包含 date、filename、position、source、title、url
+    """
+    refs = []
+    for daily in sorted(dailies, key=daily_sort_key):
+        for position, article in enumerate(daily['articles']):
+            refs.append((daily, position, article))
+
+    parent = list(range(len(refs)))
+    reasons = {}
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(i, j, reason, similarity=1.0):
+        root_i, root_j = find(i), find(j)
+        if root_i == root_j:
+            return
+        # 较早的文章作为根，即原文
+        root_i, root_j = min(root_i, root_j), max(root_i, root_j)
+        parent[root_j] = root_i
+        # 被并入的根与本次比较的文章都记录原因，两个已有的组合并时被并入的根也有原因
+        reasons.setdefault(root_j, (reason, similarity))
+        if j != root_j:
+            reasons.setdefault(j, (reason, similarity))
+
+    exact = {}
+    short_titles = {}   # 短标题 -> 有签名的文章下标
+    buckets = {}
+    signatures = {}
+    rows = MINHASH_PERMUTATIONS // MINHASH_BANDS
+    min_matches = DEDUP_SIMILARITY * MINHASH_PERMUTATIONS
+    for i, (daily, position, article) in enumerate(refs):
+        keys = []
+        if article.url:
+            keys.append(('url', normalize_article_url(article.url)))
+        title = DEDUP_NORMALIZE_RE.sub('', article.title.lower())
+        short_title = title if len(title) < DEDUP_MIN_TITLE_LENGTH else ''
+        if title and not short_title:
+            keys.append(('title', title))
+        for key in keys:
+            if key in exact:
+                union(exact[key], i, key[0])
+            else:
+                exact[key] = i
+
+        text = article.title + ''.join(article.summary) + article.benefit + article.action
+        signature = minhash_signature(DEDUP_NORMALIZE_RE.sub('', text.lower()))
+        if signature is None:
+            continue
+        signatures[i] = signature
+        candidates = set()
+        if short_title:
+            # 同一短标题的文章不一定落进同一个桶，全部作为候选
+            peers = short_titles.setdefault(short_title, [])
+            candidates.update(peers)
+            peers.append(i)
+        for band in range(MINHASH_BANDS):
+            bucket = buckets.setdefault((band, signature[band * rows:(band + 1) * rows]), [])
+            candidates.update(bucket)
+            bucket.append(i)
+        for j in sorted(candidates):
+            matches = sum(a == b for a, b in zip(signature, signatures[j]))
+            if matches >= min_matches:
+                union(j, i, 'minhash', round(matches / MINHASH_PERMUTATIONS, 3))
+
+    def describe(i):
+        daily, position, article = refs[i]
+        return {
+            'date': daily_iso_date(daily),
+            'filename': daily['filename'],
+            'position': position,
+            'source': article.source,
+            'title': article.title,
+            'url': article.url,
+        }
+
+    groups = {}
+    for i in range(len(refs)):
+        root = find(i)
+        if root != i:
+            reason, similarity = reasons.get(i, ('minhash', 0))
+            groups.setdefault(root, []).append(dict(describe(i), reason=reason, similarity=similarity))
+    return [{'original': describe(root), 'duplicates': members} for root, members in sorted(groups.items())]
+
+def suppress_duplicates(dailies, groups):
+    """返回去掉重复文章后的日报列表，文章数与公众号统计随之更新
+
+    不修改传入的日报（它们同时是解析缓存中的记录），只对受影响的日报生成副本。
+    """
+    removed = {}
+    for group in groups:
+        for member in group['duplicates']:
+            removed.setdefault(member['filename'], set()).add(member['position'])
+
+    result = []
+    for daily in dailies:
+        positions = removed.get(daily['filename'])
+        if not positions:
+            result.append(daily)
+            continue
+        articles = [a for i, a in enumerate(daily['articles']) if i not in positions]
+        sources = list(dict.fromkeys(escape(a.source, quote=False) for a in articles if a.source))
+        result.append(dict(daily, articles=articles, article_count=len(articles),
+                           sources=sources, source_count=len(sources)))
+    return result
+
+def write_duplicates_report(path, groups):
+    """写出重复文章报告 JSON，并打印前几组概要"""
+    total = sum(len(group['duplicates']) for group in groups)
+    write_output(path, json.dumps({'groups': len(groups), 'duplicates': total, 'items': groups},
+                                  ensure_ascii=False, indent=1))
+    print(f"\n🧬 发现 {len(groups)} 组重复文章，共 {total} 篇重复")
+    for group in groups[:5]:
+        original = group['original']
+        print(f"  - {original['date']} [{original['source']}] {original['title']}")
+        for member in group['duplicates']:
+            if member['reason'] == 'minhash':
+                detail = f"相似度约 {member['similarity']:.0%}"
+            else:
+                detail = f"相同{'链接' if member['reason'] == 'url' else '标题'}"
+            print(f"      ↳ {member['date']} [{member['source']}] {member['title']}（{detail}）")
+    print(f"   报告: {path}")
+    return total
+
+# 公众号 / 标签聚合页：目录名 -> (图标, 名称)；单个聚合页最多列出的文章数
+FACET_KINDS = {
+    'source': ('📱', '公众号'),
+    'tag': ('🏷️', '标签'),
+}
+FACET_PAGE_LIMIT = 200
+# 汇总页中按月展示的最近月份数
+FACET_RECENT_MONTHS = 3
+
+def facet_slug(name):
+    """聚合页文件名：名称的 SHA-1 前 10 位，避免中文与特殊字符出现在 URL 中"""
+    return hashlib.sha1(name.encode('utf-8')).hexdigest()[:10]
+
+def build_facets(dailies):
+    """一次遍历全部日报，建立 公众号 -> 文章、标签 -> 文章 的索引
+
+    Args:
+        dailies: 已按日期从新到旧排序的日报列表
+
+    Returns:
+        {'source': {名称: [(日报, Article), ...]}, 'tag': {...}}，每个列表按日期从新到旧
+    """
+    facets = {kind: {} for kind in FACET_KINDS}
+    for daily in dailies:
+        for article in daily['articles']:
+            if article.source:
+                facets['source'].setdefault(article.source, []).append((daily, article))
+            for tag in dict.fromkeys(article.tags):
+                facets['tag'].setdefault(tag, []).append((daily, article))
+    return facets
+
+def _month_counts(items):
+    """按 (年, 月) 统计文章数，从新到旧"""
+    counts = Counter((daily['year'], daily['month'].zfill(2)) for daily, _ in items)
+    return sorted(counts.items(), reverse=True)
+
+def render_facet_article(daily, article, prefix):
+    """聚合页中的单篇文章，结构与搜索结果一致，链接到所在的日报"""
+    snippet = ' '.join(article.summary)[:120]
+    tags = ''.join(f'<span class="preview-tag">#{escape(tag)}</span>' for tag in article.tags)
+    return (f'        <a class="daily-card" href="{prefix}{daily["filename"]}">'
+            f'<div class="search-title">{escape(article.title)}</div>'
+            f'<div class="meta-item">📅 {daily_iso_date(daily)} · 📱 {escape(article.source)}</div>'
+            f'<div class="search-snippet">{escape(snippet)}…</div>'
+            f'<div class="daily-preview">{tags}</div></a>\n')
+
+def render_facet_page(kind, name, items):
+    """渲染单个公众号或标签的文章列表页"""
+    icon, label = FACET_KINDS[kind]
+    prefix = '../'
+    months = ''.join(
+        f'\n            <a class="archive-link" href="{prefix}archive/{year}/{month}.html">'
+        f'<span>{year}年{int(month)}月</span><span class="archive-count">{count} 篇</span></a>'
+        for (year, month), count in _month_counts(items))
+    shown = items[:FACET_PAGE_LIMIT]
+    more = ''
+    if len(items) > len(shown):
+        more = f'        <div class="search-status">仅列出最新 {len(shown)} 篇，更早的文章请使用搜索或归档</div>\n'
+    body = (f'        <div class="archive-list">{months}\n        </div>\n'
+            + ''.join(render_facet_article(daily, article, prefix) for daily, article in shown)
+            + more
+            + f'        <div class="pager"><a class="pager-link" href="{prefix}index.html">返回首页</a>'
+              f'<a class="pager-link" href="index.html">全部{label}</a></div>\n')
+    return generate_index_html(
+        [],
+        page_title=f'{label}：{name}',
+        section_title=f'{icon} {escape(name)} · 共 {len(items)} 篇',
+        extra_html=body,
+    )
+
+def render_facet_summary(kind, index):
+    """渲染公众号 / 标签汇总页：按文章数从多到少，附最近几个月的逐月篇数"""
+    icon, label = FACET_KINDS[kind]
+    ranked = sorted(index.items(), key=lambda item: (-len(item[1]), item[0]))
+    links = []
+    for name, items in ranked:
+        recent = ' · '.join(f'{int(month)}月 {count}' for (_, month), count in _month_counts(items)[:FACET_RECENT_MONTHS])
+        links.append(
+            f'\n            <a class="archive-link" href="{facet_slug(name)}.html">'
+            f'<span>{escape(name)}</span><span class="archive-count">共 {len(items)} 篇（{recent}）</span></a>')
+    body = (f'        <div class="archive-list">{"".join(links)}\n        </div>\n'
+            f'        <div class="pager"><a class="pager-link" href="../index.html">返回首页</a></div>\n')
+    return generate_index_html(
+        [],
+        page_title=f'全部{label}',
+        section_title=f'{icon} 全部{label} · {len(index)} 个',
+        extra_html=body,
+    )
+
+def write_facet_pages(dailies, writer):
+    """生成公众号与标签聚合页，删除已不存在的旧聚合页
+
+    Returns:
+        {'source': 公众号数, 'tag': 标签数}
+    """
+    facets = build_facets(dailies)
+    paths = []
+    for kind, index in facets.items():
+        writer.write_page(f'{kind}/index.html', render_facet_summary(kind, index))
+        paths.append(f'{kind}/index.html')
+        for name, items in index.items():
+            path = f'{kind}/{facet_slug(name)}.html'
+            writer.write_page(path, render_facet_page(kind, name, items))
+            paths.append(path)
+    remove_stale_pages(writer.out_dir, paths, subdirs=tuple(FACET_KINDS))
+    return {kind: len(index) for kind, index in facets.items()}
+
+# 统计页：公众号周趋势展示的最近周数与公众号数，标签与标签组合展示的条数
+ANALYTICS_RECENT_WEEKS = 12
+ANALYTICS_TOP_SOURCES = 15
+ANALYTICS_TOP_TAGS = 30
+PUBLISH_HOUR_RE = re.compile(r'\d{4}-\d{1,2}-\d{1,2}\s+(\d{1,2}):')
+WEEKDAY_NAMES = '一二三四五六日'
+
+class ArticleColumns:
+    """全部文章的列式存储：每列一个 array.array，公众号与标签做字典编码
+
+    统计只对整列做计数（安装 numpy 时为 bincount / unique），不再逐个遍历日报字典。
+
+    列：
+        day: 所在日报的日期序数（date.toordinal()），星期与周次都由它算出
+        source: 公众号编号，对应 sources[编号]，缺失为 -1
+        hour: ⏰ 发布时间的小时，缺失为 -1
+        tag_offsets / tag_ids: 标签的 CSR 表示，第 i 篇的标签编号为 tag_ids[tag_offsets[i]:tag_offsets[i + 1]]
+        issue_days: 每期日报的日期序数
+    """
+
+    def __init__(self):
+        self.day = array('i')
+        self.source = array('i')
+        self.hour = array('b')
+        self.tag_offsets = array('i', [0])
+        self.tag_ids = array('i')
+        self.issue_days = array('i')
+        # 名称 -> 编号；编号按首次出现的顺序分配，与字典的插入顺序一致
+        self.source_codes = {}
+        self.tag_codes = {}
+
+    def __len__(self):
+        return len(self.day)
+
+    @property
+    def sources(self):
+        return list(self.source_codes)
+
+    @property
+    def tags(self):
+        return list(self.tag_codes)
+
+    @classmethod
+    def from_dailies(cls, dailies):
+        columns = cls()
+        for daily in dailies:
+            columns.add_daily(daily)
+        return columns
+
+    def add_daily(self, daily):
+        day = date(int(daily['year']), int(daily['month']), int(daily['day'])).toordinal()
+        articles = daily['articles']
+        self.issue_days.append(day)
+        self.day.extend([day] * len(articles))
+        source_codes, tag_codes, tag_ids = self.source_codes, self.tag_codes, self.tag_ids
+        hour_match = PUBLISH_HOUR_RE.match
+        for article in articles:
+            self.source.append(source_codes.setdefault(article.source, len(source_codes)) if article.source else -1)
+            match = hour_match(article.published)
+            hour = int(match.group(1)) if match else -1
+            self.hour.append(hour if hour < 24 else -1)
+            for tag in dict.fromkeys(article.tags):
+                tag_ids.append(tag_codes.setdefault(tag, len(tag_codes)))
+            self.tag_offsets.append(len(tag_ids))
+
+def _bincount(keys, size):
+    """整数键 0..size-1 的出现次数列表"""
+    if np is not None:
+        return np.bincount(np.asarray(keys, dtype=np.int64), minlength=size).tolist()
+    counts = [0] * size
+    for key in keys:
+        counts[key] += 1
+    return counts
+
+def _tag_pair_counts(columns):
+    """同一篇文章中两两出现的标签组合 -> 次数，组合编码为 小编号 * 标签数 + 大编号"""
+    width = len(columns.tag_codes)
+    if np is not None:
+        tag_ids = np.asarray(columns.tag_ids, dtype=np.int64)
+        lengths = np.diff(np.asarray(columns.tag_offsets, dtype=np.int64))
+        owner = np.repeat(np.arange(len(lengths)), lengths)
+        keys = []
+        # 每篇文章的标签在 tag_ids 中连续存放，错开 d 位比较即得到间隔为 d 的全部组合
+        for d in range(1, int(lengths.max(initial=0))):
+            same = owner[:-d] == owner[d:]
+            a, b = tag_ids[:-d][same], tag_ids[d:][same]
+            keys.append(np.minimum(a, b) * width + np.maximum(a, b))
+        if not keys:
+            return {}
+        values, counts = np.unique(np.concatenate(keys), return_counts=True)
+        return dict(zip(values.tolist(), counts.tolist()))
+    counts = Counter()
+    offsets, tag_ids = columns.tag_offsets, columns.tag_ids
+    for i in range(len(columns)):
+        ids = sorted(tag_ids[offsets[i]:offsets[i + 1]])
+        counts.update(a * width + b for j, a in enumerate(ids) for b in ids[j + 1:])
+    return dict(counts)
+
+def compute_analytics(columns):
+    """由列式数据计算全站统计
+
+    Returns:
+        可直接序列化为 JSON 的字典：总量、按星期的期数与篇数、发布小时分布、
+        每个公众号逐周篇数（周一为一周开始）、标签篇数与标签共现次数
+    """
+    n = len(columns)
+    sources, tags = columns.sources, columns.tags
+    n_sources, n_tags = len(sources), len(tags)
+    if not columns.issue_days:
+        first_week = week_count = 0
+    else:
+        first_week = (min(columns.issue_days) - 1) // 7
+        week_count = (max(columns.issue_days) - 1) // 7 - first_week + 1
+
+    if np is not None:
+        day = np.asarray(columns.day, dtype=np.int64)
+        source = np.asarray(columns.source, dtype=np.int64)
+        hour = np.asarray(columns.hour, dtype=np.int64)
+        known = source >= 0
+        weekday_keys = (day - 1) % 7
+        issue_keys = (np.asarray(columns.issue_days, dtype=np.int64) - 1) % 7
+        hour_keys = hour[hour >= 0]
+        source_keys = source[known]
+        source_week_keys = source[known] * week_count + ((day[known] - 1) // 7 - first_week)
+    else:
+        weekday_keys = [(d - 1) % 7 for d in columns.day]
+        issue_keys = [(d - 1) % 7 for d in columns.issue_days]
+        hour_keys = [h for h in columns.hour if h >= 0]
+        source_keys = [s for s in columns.source if s >= 0]
+        source_week_keys = [s * week_count + ((d - 1) // 7 - first_week)
+                            for s, d in zip(columns.source, columns.day) if s >= 0]
+
+    hours = _bincount(hour_keys, 24)
+    source_totals = _bincount(source_keys, n_sources)
+    source_weeks = _bincount(source_week_keys, n_sources * week_count)
+    tag_totals = _bincount(columns.tag_ids, n_tags)
+    pairs = sorted(_tag_pair_counts(columns).items(), key=lambda item: (-item[1], item[0]))
+
+    return {
+        'issues': len(columns.issue_days),
+        'articles': n,
+        'first_date': date.fromordinal(min(columns.issue_days)).isoformat() if columns.issue_days else None,
+        'last_date': date.fromordinal(max(columns.issue_days)).isoformat() if columns.issue_days else None,
+        'weekday': {'issues': _bincount(issue_keys, 7), 'articles': _bincount(weekday_keys, 7)},
+        'hours': {'counts': hours, 'unknown': n - sum(hours)},
+        'weeks': [date.fromordinal((first_week + i) * 7 + 1).isoformat() for i in range(week_count)],
+        'sources': sorted(({'name': name, 'total': source_totals[i],
+                            'weeks': source_weeks[i * week_count:(i + 1) * week_count]}
+                           for i, name in enumerate(sources)), key=lambda s: (-s['total'], s['name'])),
+        'tags': sorted(({'name': name, 'total': tag_totals[i]} for i, name in enumerate(tags)),
+                       key=lambda t: (-t['total'], t['name'])),
+        'tag_pairs': [{'tags': [tags[key // n_tags], tags[key % n_tags]], 'count': count}
+                      for key, count in pairs[:ANALYTICS_TOP_TAGS]],
+    }
+
+def _stats_bar_rows(rows, unit):
+    """横向条形图：rows 为 (标签, 数值) 列表，条长按最大值归一"""
+    peak = max((value for _, value in rows), default=0) or 1
+    return ''.join(
+        f'\n            <div class="stats-row"><span class="stats-label">{escape(label)}</span>'
+        f'<span class="stats-bar"><span style="width:{value * 100 / peak:.1f}%"></span></span>'
+        f'<span class="stats-value">{value} {unit}</span></div>'
+        for label, value in rows)
+
+def render_stats_page(analytics):
+    """渲染 stats.html：全部由构建时算好的数据生成，不依赖 JavaScript"""
+    summary = [('期日报', analytics['issues']), ('篇文章', analytics['articles']),
+               ('个公众号', len(analytics['sources'])), ('个标签', len(analytics['tags']))]
+    summary_html = ''.join(f'\n            <div class="archive-link"><span>{value}</span>'
+                           f'<span class="archive-count">{label}</span></div>' for label, value in summary)
+    weekday = analytics['weekday']
+    weekday_html = _stats_bar_rows(
+        [(f'星期{name}', count) for name, count in zip(WEEKDAY_NAMES, weekday['articles'])], '篇')
+    hours_html = _stats_bar_rows([(f'{h:02d}:00', count) for h, count in enumerate(analytics['hours']['counts'])], '篇')
+
+    weeks = analytics['weeks'][-ANALYTICS_RECENT_WEEKS:]
+    recent = [dict(s, weeks=s['weeks'][-len(weeks):]) for s in analytics['sources']] if weeks else []
+    recent = sorted(recent, key=lambda s: (-sum(s['weeks']), s['name']))[:ANALYTICS_TOP_SOURCES]
+    peak = max((count for s in recent for count in s['weeks']), default=0) or 1
+    head = ''.join(f'<th>{week[5:]}</th>' for week in weeks)
+    body = ''.join(
+        f'\n                <tr><th>{escape(s["name"])}</th>'
+        + ''.join(f'<td style="background:rgba(52,152,219,{count / peak:.2f})">{count or ""}</td>' for count in s['weeks'])
+        + '</tr>'
+        for s in recent)
+    table_html = (f'<div class="stats-table-wrap"><table class="stats-table">\n                <tr><th>公众号 / 周</th>{head}</tr>'
+                  f'{body}\n            </table></div>')
+
+    tags_html = _stats_bar_rows([(t['name'], t['total']) for t in analytics['tags'][:ANALYTICS_TOP_TAGS]], '篇')
+    pairs_html = _stats_bar_rows([(' + '.join(p['tags']), p['count']) for p in analytics['tag_pairs']], '篇')
+    unknown = analytics['hours']['unknown']
+    sections = [
+        ('📅 各星期文章数', weekday_html, ''),
+        ('⏰ 发布时间分布', hours_html, f'另有 {unknown} 篇没有发布时间' if unknown else ''),
+        (f'📱 公众号最近 {len(weeks)} 周文章数', table_html, f'按最近 {len(weeks)} 周篇数取前 {ANALYTICS_TOP_SOURCES} 个，列为每周周一的日期'),
+        ('🏷️ 热门标签', tags_html, ''),
+        ('🔗 常见标签组合', pairs_html, '同一篇文章中同时出现的两个标签'),
+    ]
+    html = f'        <div class="archive-list">{summary_html}\n        </div>\n'
+    for title, content, note in sections:
+        note_html = f'\n            <div class="search-status">{note}</div>' if note else ''
+        html += f'        <div class="stats-section">\n            <h3>{title}</h3>{content}{note_html}\n        </div>\n'
+    html += ('        <div class="pager"><a class="pager-link" href="index.html">返回首页</a>'
+             '<a class="pager-link" href="data/stats.json">下载 JSON</a></div>\n')
+    period = f"{analytics['first_date']} 至 {analytics['last_date']}" if analytics['first_date'] else '暂无数据'
+    return generate_index_html([], page_title='统计', section_title=f'📊 归档统计 · {period}', extra_html=html)
+
+def relative_prefix(page_path):
+    """页面相对站点根目录的路径前缀，如 archive/2025/11.html -> ../../"""
+    return '../' * page_path.count('/')
+
+def daily_sort_key(daily):
+    """日报按日期排序的键"""
+    return (daily['year'], daily['month'].zfill(2), daily['day'].zfill(2))
+
+def plan_index_pages(dailies, per_page=INDEX_PAGE_SIZE, extra_nav=()):
+    """规划首页、分页列表和年/月归档页
+
+    首页只展示最新 per_page 期，其余按页拆分到 page/N.html；
+    每月一个 archive/YYYY/MM.html，每年一个 archive/YYYY/index.html 汇总月份，
+    archive/index.html 汇总年份。单页体积只与 per_page 或当月期数相关，
+    不随归档总量增长。
+
+    Args:
+        dailies: 已按日期从新到旧排序的日报列表
+        per_page: 每页期数，<= 0 表示首页展示全部日报、不分页
+        extra_nav: 追加到首页与分页导航中的 (文字, 路径) 链接，如搜索页
+
+    Returns:
+        页面描述字典列表，每项包含 path、title、section_title、dailies、links、nav，
+        交给 render_index_page() 渲染
+    """
+    pages = []
+
+    # 首页与分页
+    if per_page <= 0:
+        chunks = [dailies]
+    else:
+        chunks = [dailies[i:i + per_page] for i in range(0, len(dailies), per_page)] or [[]]
+    page_paths = ['index.html'] + [f'page/{n}.html' for n in range(2, len(chunks) + 1)]
+    for n, (chunk, path) in enumerate(zip(chunks, page_paths), 1):
+        nav = [
+            ('← 上一页', page_paths[n - 2] if n > 1 else None),
+            (f'第 {n} / {len(chunks)} 页', None),
+            ('下一页 →', page_paths[n] if n < len(chunks) else None),
+            ('往期归档', 'archive/index.html'),
+        ] + list(extra_nav)
+        pages.append({
+            'path': path,
+            'title': '首页' if n == 1 else f'第 {n} 页',
+            'section_title': '最新日报' if n == 1 and len(chunks) > 1 else '所有日报',
+            'dailies': chunk,
+            'links': [],
+            'nav': nav,
+        })
+
+    # 按年、月分组（dailies 已从新到旧排序，分组内顺序保持不变）
+    years = {}
+    for daily in dailies:
+        months = years.setdefault(int(daily['year']), {})
+        months.setdefault(int(daily['month']), []).append(daily)
+
+    year_list = sorted(years, reverse=True)
+    month_list = [(y, m) for y in year_list for m in sorted(years[y], reverse=True)]
+
+    for i, (year, month) in enumerate(month_list):
+        newer = month_list[i - 1] if i > 0 else None
+        older = month_list[i + 1] if i + 1 < len(month_list) else None
+        pages.append({
+            'path': f'archive/{year}/{month:02d}.html',
+            'title': f'{year}年{month}月',
+            'section_title': f'{year}年{month}月 · 共 {len(years[year][month])} 期',
+            'dailies': years[year][month],
+            'links': [],
+            'nav': [
+                (f'← {newer[0]}年{newer[1]}月' if newer else '← 较新',
+                 f'archive/{newer[0]}/{newer[1]:02d}.html' if newer else None),
+                (f'{year}年', f'archive/{year}/index.html'),
+                (f'{older[0]}年{older[1]}月 →' if older else '较早 →',
+                 f'archive/{older[0]}/{older[1]:02d}.html' if older else None),
+            ],
+        })
+
+    for i, year in enumerate(year_list):
+        newer = year_list[i - 1] if i > 0 else None
+        older = year_list[i + 1] if i + 1 < len(year_list) else None
+        pages.append({
+            'path': f'archive/{year}/index.html',
+            'title': f'{year}年归档',
+            'section_title': f'{year}年归档',
+            'dailies': [],
+            'links': [(f'{year}年{month}月', f'archive/{year}/{month:02d}.html', len(years[year][month]))
+                      for month in sorted(years[year], reverse=True)],
+            'nav': [
+                (f'← {newer}年' if newer else '← 较新', f'archive/{newer}/index.html' if newer else None),
+                ('往期归档', 'archive/index.html'),
+                (f'{older}年 →' if older else '较早 →', f'archive/{older}/index.html' if older else None),
+            ],
+        })
+
+    pages.append({
+        'path': 'archive/index.html',
+        'title': '往期归档',
+        'section_title': '往期归档',
+        'dailies': [],
+        'links': [(f'{year}年', f'archive/{year}/index.html', sum(len(v) for v in years[year].values()))
+                  for year in year_list],
+        'nav': [('返回首页', 'index.html')],
+    })
+
+    return pages
+
+def render_index_page(page):
+    """渲染 plan_index_pages() 规划出的单个页面"""
+    prefix = relative_prefix(page['path'])
+
+    links_html = ''
+    if page['links']:
+        items = ''.join(
+            f'\n            <a class="archive-link" href="{prefix}{target}">'
+            f'<span>{label}</span><span class="archive-count">{count} 期</span></a>'
+            for label, target, count in page['links'])
+        links_html = f'        <div class="archive-list">{items}\n        </div>\n'
+
+    nav_items = []
+    for label, target in page['nav']:
+        if target:
+            nav_items.append(f'<a class="pager-link" href="{prefix}{target}">{label}</a>')
+        else:
+            nav_items.append(f'<span class="pager-link disabled">{label}</span>')
+    nav_html = f'        <div class="pager">{"".join(nav_items)}</div>\n'
+
+    # 订阅源自动发现链接与规范链接等元数据，见 build_site() 中的 page['alternates'] / page['head_meta']
+    head_extra = ''.join(
+        f'    <link rel="alternate" type="{mime}" title="{escape(SITE_TITLE)} {label}" href="{prefix}{target}">\n'
+        for mime, label, target in page.get('alternates', ())) + page.get('head_meta', '')
+
+    return generate_index_html(
+        page['dailies'],
+        page_title=page['title'],
+        section_title=page['section_title'],
+        link_prefix=prefix + page.get('daily_dir', ''),
+        extra_html=links_html + nav_html,
+        head_extra=head_extra,
+    )
+
+# 模板文件所在目录（与脚本同级）
+TEMPLATE_DIR = Path(__file__).parent
+TEMPLATE_TAG_RE = re.compile(r'\{\{\{\s*(\w+)\s*\}\}\}|\{\{\s*(\w+)\s*\}\}')
+
+def compile_template(text):
+    """把模板文本编译成渲染函数
+
+    语法只有两种占位符：{{ name }} 输出转义后的值，{{{ name }}} 原样输出。
+    编译时把模板切成“字面量 + 占位符”序列，渲染时只需填充占位符
+    再一次 ''.join()，不做任何字符串替换或重复拼接。
+
+    Returns:
+        render(**context) -> str
+    """
+    parts = []
+    slots = []  # (parts 中的下标, 变量名, 是否转义)
+    pos = 0
+    for m in TEMPLATE_TAG_RE.finditer(text):
+        parts.append(text[pos:m.start()])
+        raw_name, name = m.groups()
+        slots.append((len(parts), raw_name or name, raw_name is None))
+        parts.append('')
+        pos = m.end()
+    parts.append(text[pos:])
+
+    def render(**context):
+        out = list(parts)
+        for index, name, escaped in slots:
+            value = context.get(name, '')
+            out[index] = escape(str(value), quote=True) if escaped else str(value)
+        return ''.join(out)
+
+    return render
+
+@lru_cache(maxsize=None)
+def _compile_template_file(path, mtime_ns):
+    with open(path, 'r', encoding='utf-8') as f:
+        return compile_template(f.read())
+
+def load_template(name):
+    """读取并编译模板文件，按 (路径, 修改时间) 缓存，文件改动后自动重新编译"""
+    path = TEMPLATE_DIR / name
+    return _compile_template_file(str(path), path.stat().st_mtime_ns)
+
+SITE_TITLE = '蹊涯AI：公众号日报'
+
+# 首页、分页与归档页在公共模板样式之外追加的样式
+INDEX_CSS = '''
+        .features-grid {
+            display: grid;
+            grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
+            gap: 24px;
+            margin-top: 36px;
+        }
+
+        .feature-card {
+            background: rgba(52, 152, 219, 0.15);
+            backdrop-filter: blur(10px);
+            border-radius: 12px;
+            padding: 24px;
+            transition: all 0.3s ease;
+            border: 1px solid rgba(52, 152, 219, 0.3);
+        }
+
+        .feature-card:hover {
+            background: rgba(52, 152, 219, 0.25);
+            transform: translateY(-4px);
+            border-color: rgba(52, 152, 219, 0.5);
+        }
+
+        .feature-icon {
+            font-size: 36px;
+            margin-bottom: 12px;
+        }
+
+        .feature-title {
+            font-size: 18px;
+            font-weight: 600;
+            margin-bottom: 8px;
+            color: white;
+        }
+
+        .feature-desc {
+            font-size: 14px;
+            opacity: 0.9;
+            line-height: 1.6;
+            color: rgba(255, 255, 255, 0.9);
+        }
+
+        .section-title {
+            font-size: 20px;
+            color: #2c3e50;
+            margin-bottom: 24px;
+            font-weight: 600;
+            display: flex;
+            align-items: center;
+            gap: 10px;
+        }
+
+        .section-title::before {
+            content: "";
+            width: 4px;
+            height: 24px;
+            background: linear-gradient(135deg, #3498db 0%, #2980b9 100%);
+            border-radius: 2px;
+        }
+
+        .daily-card {
+            background: white;
+            border: 1px solid #e0e0e0;
+            border-radius: 12px;
+            padding: 28px;
+            margin-bottom: 24px;
+            transition: all 0.3s ease;
+            cursor: pointer;
+            text-decoration: none;
+            display: block;
+            color: inherit;
+            position: relative;
+            overflow: hidden;
+        }
+
+        .daily-card::before {
+            content: "";
+            position: absolute;
+            top: 0;
+            left: 0;
+            right: 0;
+            height: 4px;
+            background: linear-gradient(90deg, #3498db 0%, #2980b9 100%);
+            transform: scaleX(0);
+            transform-origin: left;
+            transition: transform 0.3s ease;
+        }
+
+        .daily-card:hover::before {
+            transform: scaleX(1);
+        }
+
+        .daily-card:hover {
+            box-shadow: 0 8px 24px rgba(0,0,0,0.12);
+            transform: translateY(-4px);
+            border-color: #3498db;
+        }
+
+        .daily-header {
+            display: flex;
+            justify-content: space-between;
+            align-items: center;
+            margin-bottom: 16px;
+        }
+
+        .daily-date {
+            font-size: 24px;
+            font-weight: 700;
+            color: #2c3e50;
+            display: flex;
+            align-items: center;
+            gap: 12px;
+        }
+
+        .daily-date .icon {
+            font-size: 28px;
+        }
+
+        .daily-weekday {
+            background: linear-gradient(135deg, #3498db 0%, #2980b9 100%);
+            color: white;
+            padding: 6px 14px;
+            border-radius: 20px;
+            font-size: 13px;
+            font-weight: 600;
+        }
+
+        .daily-meta {
+            display: flex;
+            gap: 20px;
+            margin-bottom: 16px;
+            flex-wrap: wrap;
+        }
+
+        .meta-item {
+            display: flex;
+            align-items: center;
+            gap: 8px;
+            color: #7f8c8d;
+            font-size: 14px;
+        }
+
+        .meta-item .emoji {
+            font-size: 18px;
+        }
+
+        .meta-item .number {
+            font-weight: 600;
+            color: #3498db;
+            font-size: 16px;
+        }
+
+        .daily-preview {
+            display: flex;
+            gap: 12px;
+            flex-wrap: wrap;
+            margin-bottom: 20px;
+        }
+
+        .preview-tag {
+            background: #e8f4f8;
+            color: #3498db;
+            padding: 6px 14px;
+            border-radius: 16px;
+            font-size: 13px;
+            font-weight: 500;
+            transition: all 0.2s;
+        }
+
+        .daily-card:hover .preview-tag {
+            background: #3498db;
+            color: white;
+        }
+
+        .daily-footer {
+            display: flex;
+            justify-content: flex-end;
+            align-items: center;
+            padding-top: 16px;
+            border-top: 1px solid #f0f0f0;
+        }
+
+        .read-btn {
+            display: inline-flex;
+            align-items: center;
+            gap: 8px;
+            color: #3498db;
+            font-size: 14px;
+            font-weight: 600;
+            transition: all 0.2s;
+        }
+
+        .daily-card:hover .read-btn {
+            color: #2980b9;
+            transform: translateX(4px);
+        }
+
+        .read-btn::after {
+            content: "→";
+            font-size: 18px;
+        }
+
+        .archive-list {
+            display: grid;
+            grid-template-columns: repeat(auto-fill, minmax(200px, 1fr));
+            gap: 16px;
+            margin-bottom: 24px;
+        }
+
+        .archive-link {
+            display: flex;
+            justify-content: space-between;
+            align-items: center;
+            background: white;
+            border: 1px solid #e0e0e0;
+            border-radius: 12px;
+            padding: 18px 20px;
+            color: #2c3e50;
+            font-size: 16px;
+            font-weight: 600;
+            text-decoration: none;
+            transition: all 0.2s;
+        }
+
+        .archive-link:hover {
+            border-color: #3498db;
+            color: #3498db;
+        }
+
+        .archive-count {
+            color: #7f8c8d;
+            font-size: 13px;
+            font-weight: 500;
+        }
+
+        .pager {
+            display: flex;
+            justify-content: center;
+            flex-wrap: wrap;
+            gap: 12px;
+            margin-top: 12px;
+        }
+
+        .pager-link {
+            padding: 8px 18px;
+            border-radius: 20px;
+            background: #e8f4f8;
+            color: #3498db;
+            font-size: 14px;
+            font-weight: 600;
+            text-decoration: none;
+        }
+
+        .search-box input {
+            width: 100%;
+            padding: 14px 20px;
+            border: 1px solid #e0e0e0;
+            border-radius: 24px;
+            font-size: 16px;
+            outline: none;
+        }
+
+        .search-box input:focus {
+            border-color: #3498db;
+        }
+
+        .search-status {
+            color: #7f8c8d;
+            font-size: 14px;
+            margin: 16px 4px;
+        }
+
+        .stats-section {
+            background: white;
+            border: 1px solid #e0e0e0;
+            border-radius: 12px;
+            padding: 20px 24px;
+            margin-bottom: 24px;
+        }
+
+        .stats-section h3 {
+            font-size: 17px;
+            color: #2c3e50;
+            margin-bottom: 12px;
+        }
+
+        .stats-row {
+            display: grid;
+            grid-template-columns: 9em 1fr 5em;
+            align-items: center;
+            gap: 12px;
+            font-size: 14px;
+            padding: 3px 0;
+        }
+
+        .stats-label {
+            overflow: hidden;
+            text-overflow: ellipsis;
+            white-space: nowrap;
+        }
+
+        .stats-bar {
+            background: #f0f3f5;
+            border-radius: 4px;
+            height: 12px;
+        }
+
+        .stats-bar span {
+            display: block;
+            height: 100%;
+            background: #3498db;
+            border-radius: 4px;
+        }
+
+        .stats-value {
+            color: #7f8c8d;
+            text-align: right;
+        }
+
+        .stats-table-wrap {
+            overflow-x: auto;
+        }
+
+        .stats-table {
+            border-collapse: collapse;
+            font-size: 13px;
+            white-space: nowrap;
+        }
+
+        .stats-table th, .stats-table td {
+            padding: 4px 8px;
+            text-align: center;
+            border: 1px solid #f0f3f5;
+        }
+
+        .stats-table tr th:first-child {
+            text-align: left;
+        }
+
+        .search-title {
+            font-size: 18px;
+            font-weight: 600;
+            color: #2c3e50;
+            margin-bottom: 8px;
+        }
+
+        .search-snippet {
+            color: #555;
+            font-size: 14px;
+            margin: 10px 0 14px;
+        }
+
+        a.pager-link:hover {
+            background: #3498db;
+            color: white;
+        }
+
+        .pager-link.disabled {
+            background: transparent;
+            color: #95a5a6;
+        }
+
+        @media (max-width: 768px) {
+            .features-grid {
+                grid-template-columns: 1fr;
+            }
+
+            .daily-card {
+                padding: 20px;
+            }
+
+            .daily-date {
+                font-size: 20px;
+            }
+        }
+'''
+
+# 首页头部的特性介绍
+INDEX_HERO_HTML = '''
+            <div class="features-grid">
+                <div class="feature-card">
+                    <div class="feature-icon">📈</div>
+                    <div class="feature-title">专业财经聚合</div>
+                    <div class="feature-desc">精选市值风云、调研纪要、思想钢印等头部财经公众号，聚焦新能源、AI、半导体等热门赛道</div>
+                </div>
+                <div class="feature-card">
                     <div class="feature-icon">🤖</div>
                     <div class="feature-title">AI智能总结</div>
                     <div class="feature-desc">每篇文章自动提炼核心观点和投资逻辑，附带明确的行动指引，10秒看懂一篇深度研报</div>
@@ -579,108 +2935,1477 @@ def generate_index_html(dailies):
                     <div class="feature-title">每日定时推送</div>
                     <div class="feature-desc">工作日持续更新，不错过市场热点与投资机会，让您的投资决策始终领先一步</div>
                 </div>
-            </div>
-        </div>
-    </div>
+            </div>'''
 
-    <div class="container">
-        <div class="section-title">所有日报</div>
-
-{cards_section}
-    </div>
-
-    <div class="footer">
-        <div class="footer-content">
-            <div class="footer-left">
-                <div class="footer-title">蹊涯AI：公众号日报</div>
-                <div class="footer-description">
-                    聚焦金融投资与产业研究，每日精选顶级财经公众号深度内容。
-                    覆盖AI、新能源、半导体、医药生物等核心投资领域，为投资者提供专业决策参考。
-                    <br><br>
-                    立即扫码关注「蹊涯学习室」公众号，第一时间获取每日投资情报，把握市场先机！
-                </div>
-                <div class="creator-info">
-                    <div class="creator-avatar">D</div>
-                    <div class="creator-details">
-                        <div class="creator-name">Dan</div>
-                        <div class="creator-role">产品策划与开发</div>
-                    </div>
+DAILY_CARD_TEMPLATE = compile_template('''        <a href="{{ href }}" class="daily-card">
+            <div class="daily-header">
+                <div class="daily-date">
+                    <span class="icon">📅</span>
+                    <span>{{ date }}</span>
                 </div>
+                <div class="daily-weekday">星期{{ weekday }}</div>
             </div>
-            <div class="footer-right">
-                <div class="qrcode-container">
-                    <img src="https://github.com/DDDDDDDDan/xiya-ai-wechat-daily/blob/main/%E8%B9%8A%E6%B6%AF%E5%AD%A6%E4%B9%A0%E5%AE%A4%E4%BA%8C%E7%BB%B4%E7%A0%81.jpg?raw=true" alt="蹊涯学习室公众号">
+            <div class="daily-meta">
+                <div class="meta-item">
+                    <span class="emoji">📝</span>
+                    <span>共 <span class="number">{{ article_count }}</span> 篇文章</span>
+                </div>
+                <div class="meta-item">
+                    <span class="emoji">🏢</span>
+                    <span>{{ source_count }} 个公众号</span>
                 </div>
-                <div class="qrcode-label">扫码关注公众号</div>
             </div>
+            <div class="daily-preview">
+                {{{ sources_html }}}
+            </div>
+            <div class="daily-footer">
+                <span class="read-btn">查看本期日报</span>
+            </div>
+        </a>''')
+
+def render_page(title, body_parts, extra_css='', hero_extra='', head_extra=''):
+    """用 template_header.html / template_footer.html 组装完整页面
+
+    Args:
+        title: <title> 内容
+        body_parts: 放在 <div class="container"> 内的 HTML 片段列表
+        extra_css: 追加在公共样式之后的页面专属样式
+        hero_extra: 追加在页头介绍文字之后的 HTML
+        head_extra: 追加在 <head> 中的标签（订阅源链接等）
+    """
+    buf = [load_template('template_header.html')(title=title, extra_css=extra_css, hero_extra=hero_extra,
+                                                 head_extra=head_extra)]
+    buf.extend(body_parts)
+    buf.append(load_template('template_footer.html')())
+    return ''.join(buf)
+
+def generate_index_html(dailies, page_title='首页', section_title='所有日报', link_prefix='', extra_html='',
+                        head_extra=''):
+    """生成index.html内容
+
+    Args:
+        dailies: 本页展示的日报列表
+        page_title: <title> 中的页面名
+        section_title: 卡片列表上方的标题
+        link_prefix: 日报链接的相对路径前缀（子目录页面需要 ../）
+        extra_html: 追加在卡片列表后的 HTML（归档链接、翻页导航）
+        head_extra: 追加在 <head> 中的标签
+    """
+    cards_html = []
+    for daily in dailies:
+        # 公众号名称取自页面原文，本身已是 HTML 转义后的文本
+        sources_html = ''.join([f'<span class="preview-tag">📱 {source}</span>' for source in daily['sources']])
+        cards_html.append(DAILY_CARD_TEMPLATE(
+            href=link_prefix + daily['filename'],
+            date=daily['date'],
+            weekday=daily['weekday'],
+            article_count=daily['article_count'],
+            source_count=daily['source_count'],
+            sources_html=sources_html,
+        ))
+
+    body_parts = [f'        <div class="section-title">{section_title}</div>\n\n', '\n\n'.join(cards_html), '\n', extra_html]
+    return render_page(f'{SITE_TITLE} - {page_title}', body_parts, extra_css=INDEX_CSS, hero_extra=INDEX_HERO_HTML,
+                       head_extra=head_extra)
+
+ARTICLE_CARD_TEMPLATE = compile_template('''<div class="article-card">
+    <div class="article-header">
+        <div class="article-title">{{ title }}</div>
+    </div>
+    <div class="article-meta">
+{{{ meta_html }}}    </div>
+    <div class="tags">
+{{{ tags_html }}}    </div>
+{{{ sections_html }}}    <div class="card-footer">
+        <a href="{{ url }}" class="read-more">阅读原文</a>
+    </div>
+</div>''')
+
+INFO_SECTION_TEMPLATE = compile_template('''    <div class="info-section {{ kind }}">
+        <div class="info-label">
+            <span class="emoji">{{ emoji }}</span>
+            <span>{{ label }}</span>
         </div>
-        <div class="copyright">
-            蹊涯AI：公众号日报 © 2025 - 精选优质内容，分享知识价值 | Made with ❤️ by Dan
-        </div>
+        <div class="info-text">{{{ body }}}</div>
     </div>
-</body>
-</html>'''
+''')
 
-    return html_template
+def render_summary_paragraph(paragraph, highlights):
+    """渲染一个摘要段落，把其中的高亮句包进 summary-highlight"""
+    html = escape(paragraph, quote=False)
+    for highlight in highlights:
+        marked = escape(highlight, quote=False)
+        if marked and marked in html:
+            html = html.replace(marked, f'<span class="summary-highlight">{marked}</span>', 1)
+    return html
 
-def main():
-    """主函数"""
-    # 设置目录
-    script_dir = Path(__file__).parent
-    src_dir = script_dir / 'src'
+def render_article_sections(article):
+    """文章摘要、阅读收益与行动指引三个 info-section"""
+    sections = []
+    if article.summary:
+        paragraphs = ''.join(
+            '\n            <div class="summary-paragraph">\n                '
+            + render_summary_paragraph(p, article.highlights)
+            + '\n            </div>'
+            for p in article.summary)
+        sections.append(INFO_SECTION_TEMPLATE(kind='summary', emoji='📝', label='文章摘要',
+                                              body=paragraphs + '\n        '))
+    if article.benefit:
+        sections.append(INFO_SECTION_TEMPLATE(kind='benefit', emoji='💡', label='阅读收益',
+                                              body=escape(article.benefit, quote=False)))
+    if article.action:
+        sections.append(INFO_SECTION_TEMPLATE(kind='action', emoji='🎯', label='行动指引',
+                                              body=escape(article.action, quote=False)))
+    return ''.join(sections)
 
-    if not src_dir.exists():
-        print(f"错误: src 目录不存在: {src_dir}")
-        return
+def render_article_card(article, sections_html=None):
+    """把 Article 渲染为与手工日报相同结构的 article-card
+
+    sections_html 不为 None 时替代摘要等 info-section（精简版日报用）。
+    """
+    meta = []
+    if article.published:
+        meta.append(f'        <span>⏰ {escape(article.published)}</span>\n')
+    meta.append(f'        <span>📱 {escape(article.source)}</span>\n')
+    tags = [f'        <span class="tag">#{escape(tag)}</span>\n' for tag in article.tags]
+
+    return ARTICLE_CARD_TEMPLATE(
+        title=article.title,
+        meta_html=''.join(meta),
+        tags_html=''.join(tags),
+        sections_html=render_article_sections(article) if sections_html is None else sections_html,
+        url=article.url,
+    )
+
+def render_daily_html(articles):
+    """渲染一期日报页面
+
+    外框取自 template_daily_header.html / template_daily_footer.html，即手工日报的页头特性卡片、
+    样式与页脚二维码；卡片之间与手工日报一样只以换行分隔。
+    """
+    cards = '\n'.join(render_article_card(article) for article in articles)
+    return ''.join((load_template('template_daily_header.html')(title=SITE_TITLE), '    ', cards,
+                    load_template('template_daily_footer.html')()))
+
+# 精简版日报（--lazy-dailies）：brief/YYYY-MM-DD.html 只含标题、时间、公众号与标签，
+# 摘要等 info-section 预先渲染到同名 .json 分片，滚动到卡片附近时预取、点击展开时填入；
+# 不支持 JavaScript 时「展开摘要」就是指向完整日报的普通链接
+BRIEF_DIR = 'brief'
+BRIEF_CSS = '''
+        .brief-toggle {
+            display: inline-block;
+            margin-bottom: 12px;
+            color: #3498db;
+            font-size: 14px;
+            font-weight: 600;
+            text-decoration: none;
+        }
+
+        .brief-title {
+            font-size: 20px;
+            font-weight: 600;
+            color: #2c3e50;
+            margin: 24px 0 16px;
+        }
+
+        .brief-title a {
+            font-size: 14px;
+            margin-left: 12px;
+            color: #3498db;
+            text-decoration: none;
+        }
+'''
+BRIEF_SCRIPT = '''<script>
+(function () {
+    var root = document.getElementById('brief');
+    var toggles = root.querySelectorAll('.brief-toggle');
+    var shard = null;
+
+    function load() {
+        if (!shard) {
+            shard = fetch(root.getAttribute('data-shard')).then(function (r) {
+                if (!r.ok) throw new Error(r.status);
+                return r.json();
+            });
+            shard.catch(function () { shard = null; });
+        }
+        return shard;
+    }
+
+    Array.prototype.forEach.call(toggles, function (toggle) {
+        var body = toggle.nextElementSibling;
+        toggle.addEventListener('click', function (event) {
+            event.preventDefault();
+            if (!body.hidden || body.innerHTML) {
+                body.hidden = !body.hidden;
+                toggle.textContent = body.hidden ? '展开摘要 ▾' : '收起 ▴';
+                return;
+            }
+            toggle.textContent = '加载中…';
+            load().then(function (data) {
+                body.innerHTML = data.sections[+toggle.getAttribute('data-index')];
+                body.hidden = false;
+                toggle.textContent = '收起 ▴';
+            }, function () {
+                location.href = toggle.href;
+            });
+        });
+    });
+
+    // 任一卡片接近视口时预取分片，展开时无需等待
+    if ('IntersectionObserver' in window) {
+        var observer = new IntersectionObserver(function (entries) {
+            if (entries.some(function (entry) { return entry.isIntersecting; })) {
+                observer.disconnect();
+                load();
+            }
+        }, {rootMargin: '200px'});
+        Array.prototype.forEach.call(toggles, function (toggle) { observer.observe(toggle); });
+    }
+})();
+</script>
+'''
+
+def render_brief_daily(daily, site_url=None):
+    """渲染一期日报的精简版页面与摘要分片
+
+    Returns:
+        (页面 HTML, 分片 JSON 文本)
+    """
+    iso_date = daily_iso_date(daily)
+    full = f"../{daily['filename']}"
+    cards = []
+    for i, article in enumerate(daily['articles']):
+        placeholder = (f'    <a class="brief-toggle" href="{full}" data-index="{i}">展开摘要 ▾</a>\n'
+                       f'    <div class="brief-body" hidden></div>\n')
+        cards.append(render_article_card(article, sections_html=placeholder))
+    title = f"{daily['date']} 星期{daily['weekday']}"
+    head_extra = f'    <link rel="canonical" href="{escape(site_url)}/{daily["filename"]}">\n' if site_url else ''
+    html = render_page(
+        f'{SITE_TITLE} - {title}',
+        [f'        <div class="brief-title">{title} · {daily["article_count"]} 篇<a href="{full}">查看完整版</a></div>\n',
+         f'<div id="brief" data-shard="{iso_date}.json">\n', '\n'.join(cards), '\n</div>\n', BRIEF_SCRIPT],
+        extra_css=BRIEF_CSS,
+        head_extra=head_extra,
+    )
+    shard = {'date': iso_date, 'sections': [render_article_sections(article) for article in daily['articles']]}
+    return html, json.dumps(shard, ensure_ascii=False, separators=(',', ':'))
+
+def write_brief_dailies(dailies, writer, site_url=None):
+    """生成全部精简版日报与摘要分片，删除已不存在的日报对应的旧文件，返回写出的期数"""
+    brief_dir = writer.out_dir / BRIEF_DIR
+    paths = []
+    for daily in dailies:
+        html, shard = render_brief_daily(daily, site_url)
+        path = f'{BRIEF_DIR}/{daily["filename"]}'
+        writer.write_page(path, html)
+        write_output(brief_dir / f'{daily_iso_date(daily)}.json', shard)
+        paths.append(path)
+    remove_stale_pages(writer.out_dir, paths, subdirs=(BRIEF_DIR,))
+    keep = {Path(path).stem for path in paths}
+    for stale in brief_dir.glob('*.json'):
+        if stale.stem not in keep:
+            remove_output(stale)
+    return len(paths)
+
+# Service Worker：预缓存首页、最新 SW_PRECACHE_DAILIES 期日报与 assets/ 下的共享资源，
+# 其余页面与 JSON 分片按访问顺序进入运行时缓存（最多 SW_RUNTIME_ENTRIES 条，超出时淘汰最早写入的）
+SW_PRECACHE_DAILIES = 10
+SW_RUNTIME_ENTRIES = 60
+SW_REGISTER_RE = re.compile(r'\n?<script>if \(\'serviceWorker\' in navigator\).*?</script>', re.S)
+SERVICE_WORKER_TEMPLATE = compile_template('''// 由 generate_index.py 生成，请勿手工修改
+var MANIFEST = {{{ manifest }}};
+var PRECACHE = 'xiya-precache-' + MANIFEST.version;
+var RUNTIME = 'xiya-runtime';
+var RUNTIME_MAX_ENTRIES = {{{ runtime_entries }}};
+var SCOPE = self.registration.scope;
+var INDEX = new URL('index.html', SCOPE).href;
+var ASSETS = new URL('assets/', SCOPE).href;
+var precached = {};
+MANIFEST.files.forEach(function (file) {
+    precached[new URL(file.url, SCOPE).href] = file.revision;
+});
+
+// 经过重定向（如去掉 .html 的美化地址）的响应不能直接用于页面导航，复制一份再缓存
+function storable(response) {
+    if (!response.redirected) {
+        return Promise.resolve(response);
+    }
+    return response.blob().then(function (body) {
+        return new Response(body, {status: response.status, statusText: response.statusText, headers: response.headers});
+    });
+}
+
+function trim(cache) {
+    return cache.keys().then(function (keys) {
+        return Promise.all(keys.slice(0, Math.max(0, keys.length - RUNTIME_MAX_ENTRIES)).map(function (key) {
+            return cache.delete(key);
+        }));
+    });
+}
+
+self.addEventListener('install', function (event) {
+    event.waitUntil(caches.open(PRECACHE).then(function (cache) {
+        return Promise.all(Object.keys(precached).map(function (url) {
+            return fetch(new Request(url, {cache: 'no-cache'})).then(function (response) {
+                if (!response.ok) {
+                    throw new Error(url + ' ' + response.status);
+                }
+                return storable(response).then(function (copy) { return cache.put(url, copy); });
+            });
+        }));
+    }).then(function () {
+        return self.skipWaiting();
+    }));
+});
+
+self.addEventListener('activate', function (event) {
+    event.waitUntil(caches.keys().then(function (names) {
+        return Promise.all(names.filter(function (name) {
+            return name.indexOf('xiya-precache-') === 0 && name !== PRECACHE;
+        }).map(function (name) {
+            return caches.delete(name);
+        }));
+    }).then(function () {
+        return self.clients.claim();
+    }));
+});
+
+// 页面与 JSON：先返回缓存（stale-while-revalidate），后台用网络结果更新缓存；
+// assets/ 下的文件名带内容哈希，命中缓存即直接返回
+self.addEventListener('fetch', function (event) {
+    var request = event.request;
+    var url = new URL(request.url);
+    if (request.method !== 'GET' || url.origin !== location.origin) {
+        return;
+    }
+    var key = url.origin + url.pathname.replace(/\\/$/, '/index.html');
+    var isPage = request.mode === 'navigate' || /\\.(?:html|json)$/.test(url.pathname);
+    var isAsset = key.indexOf(ASSETS) === 0;
+    if (!isPage && !isAsset && !(key in precached)) {
+        return;
+    }
+    var cacheName = key in precached ? PRECACHE : RUNTIME;
+    event.respondWith(caches.open(cacheName).then(function (cache) {
+        return cache.match(key).then(function (cached) {
+            if (cached && !isPage) {
+                return cached;
+            }
+            var network = fetch(request).then(function (response) {
+                if (response.ok && response.type === 'basic') {
+                    event.waitUntil(storable(response.clone()).then(function (copy) {
+                        return cache.delete(key).then(function () { return cache.put(key, copy); });
+                    }).then(function () {
+                        return cacheName === RUNTIME ? trim(cache) : null;
+                    }));
+                }
+                return response;
+            });
+            if (cached) {
+                event.waitUntil(network.catch(function () {}));
+                return cached;
+            }
+            return network.catch(function (error) {
+                // 离线且没有缓存时，页面导航退回预缓存的首页
+                if (request.mode === 'navigate') {
+                    return caches.match(INDEX).then(function (index) { return index || Promise.reject(error); });
+                }
+                throw error;
+            });
+        });
+    }));
+});
+''')
+
+def render_sw_register(prefix):
+    """页面中注册 Service Worker 的脚本，prefix 为页面到站点根目录的相对路径"""
+    return ("<script>if ('serviceWorker' in navigator) { window.addEventListener('load', function () { "
+            f"navigator.serviceWorker.register('{prefix}sw.js'); }}); }}</script>\n")
+
+def inject_sw_register(html, prefix):
+    """把注册脚本插入 </body> 之前；已有的先去掉，重复执行结果不变"""
+    html = SW_REGISTER_RE.sub('', html)
+    pos = html.rfind('</body>')
+    if pos < 0:
+        return html
+    return html[:pos] + render_sw_register(prefix) + html[pos:]
+
+def precache_paths(out_dir, dailies, limit=SW_PRECACHE_DAILIES):
+    """预缓存的相对路径：首页等根目录生成页、最新 limit 期日报（及其精简版）、assets/ 下的全部文件"""
+    out_dir = Path(out_dir)
+    paths = sorted(name for name in GENERATED_ROOT_PAGES if (out_dir / name).is_file())
+    for daily in dailies[:limit]:
+        paths.append(daily['filename'])
+        paths.extend(path for path in (f"{BRIEF_DIR}/{daily['filename']}", f'{BRIEF_DIR}/{daily_iso_date(daily)}.json')
+                     if (out_dir / path).is_file())
+    assets = out_dir / 'assets'
+    paths.extend(sorted(path.relative_to(out_dir).as_posix() for path in assets.rglob('*')
+                        if path.is_file() and path.suffix not in COMPRESSORS and path.suffix != '.br'))
+    return paths
 
-    # 查找所有日报HTML文件（排除index.html）
-    html_files = []
-    for file in src_dir.glob('*.html'):
-        if file.name.lower() != 'index.html':
-            html_files.append(file)
+def write_service_worker(out_dir, paths, runtime_entries=SW_RUNTIME_ENTRIES):
+    """写出 sw.js，预缓存清单内嵌其中
+
+    每个文件的 revision 为内容哈希前 10 位，清单的 version 由全部 revision 算出：
+    任一预缓存文件变化，sw.js 随之变化，浏览器据此安装新版本并替换整份预缓存；
+    全部未变时 sw.js 逐字节相同，不会触发更新。
+
+    Returns:
+        清单字典 {'version', 'files'}
+    """
+    out_dir = Path(out_dir)
+    files = [{'url': path, 'revision': file_digest(out_dir / path)[:10]} for path in paths]
+    version = hashlib.sha256(json.dumps(files, sort_keys=True).encode('utf-8')).hexdigest()[:10]
+    manifest = {'version': version, 'files': files}
+    script = SERVICE_WORKER_TEMPLATE(
+        manifest=json.dumps(manifest, ensure_ascii=False, indent=1),
+        runtime_entries=runtime_entries,
+    )
+    write_output(out_dir / 'sw.js', script)
+    return manifest
+
+def article_from_row(row):
+    """把 JSON 对象或数据库行转换为 (ISO 日期, Article)
+
+    列表字段（tags/summary/highlights）可以是数组，也可以是 JSON 文本；
+    没有 date 字段时取发布时间的日期部分。
+    """
+    fields = {}
+    for name in Article.__slots__:
+        value = row.get(name)
+        if value is None:
+            continue
+        if name in ('tags', 'summary', 'highlights') and isinstance(value, str):
+            value = json.loads(value) if value.startswith('[') else [value]
+        fields[name] = value
+    article = Article(**fields)
+    day = str(row.get('date') or article.published[:10])
+    return datetime.strptime(day, '%Y-%m-%d').strftime('%Y-%m-%d'), article
+
+def load_articles_from_json(path):
+    """读取 JSON 数组、{"articles": [...]} 或 NDJSON（如 --export 导出的 articles.ndjson）"""
+    with open(path, 'r', encoding='utf-8') as f:
+        if str(path).endswith('.ndjson'):
+            for line in f:
+                if line.strip():
+                    yield article_from_row(json.loads(line))
+            return
+        data = json.load(f)
+    rows = data.get('articles', []) if isinstance(data, dict) else data
+    for row in rows:
+        yield article_from_row(row)
+
+def load_articles_from_sqlite(path, table='articles'):
+    """读取 SQLite 表中的文章，列名与 Article 字段一致，另需 date 或 published 列"""
+    conn = sqlite3.connect(str(path))
+    conn.row_factory = sqlite3.Row
+    try:
+        for row in conn.execute(f'SELECT * FROM "{table}"'):
+            yield article_from_row(dict(row))
+    finally:
+        conn.close()
+
+def create_supabase_client():
+    """用环境变量（或 .env 中的）SUPABASE_URL / SUPABASE_KEY 创建 Supabase 客户端"""
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        pass
+    from supabase import create_client
+    return create_client(os.environ['SUPABASE_URL'], os.environ['SUPABASE_KEY'])
+
+def load_articles_from_supabase(client, table='articles', batch_size=1000):
+    """分批读取 Supabase 表中的文章
+
+    client 只需提供 client.table(name).select('*').range(a, b).execute().data
+    这一调用链，本地调试时可用任意同接口的桩对象代替真实客户端。
+    """
+    start = 0
+    while True:
+        rows = client.table(table).select('*').range(start, start + batch_size - 1).execute().data
+        for row in rows:
+            yield article_from_row(row)
+        if len(rows) < batch_size:
+            break
+        start += batch_size
+
+def load_article_source(source):
+    """按数据源描述读取文章：supabase:表名、*.sqlite/*.db、*.json/*.ndjson"""
+    if source.startswith('supabase:'):
+        return load_articles_from_supabase(create_supabase_client(), source.split(':', 1)[1] or 'articles')
+    if source.endswith(('.sqlite', '.sqlite3', '.db')):
+        return load_articles_from_sqlite(source)
+    return load_articles_from_json(source)
+
+# 批量导入：原始公众号文章导出（浏览器保存的文章网页或 JSON）。文件在进程池中解析，
+# 同时在途的文件不超过 workers * INGEST_INFLIGHT_PER_WORKER 个，内存占用与导出总量无关
+INGEST_SUFFIXES = ('.html', '.htm', '.json', '.ndjson', '.jsonl')
+INGEST_INFLIGHT_PER_WORKER = 4
+INGEST_MAX_FILE_BYTES = 20 * 1024 * 1024
+INGEST_SUMMARY_LENGTH = 300
+INGEST_META_RE = re.compile(r'<meta\s+(?:property|name)="(og:title|og:url|og:description|description|author)"'
+                            r'\s+content="([^"]*)"', re.I)
+INGEST_VAR_RE = re.compile(r'\bvar\s+(msg_title|msg_desc|msg_link|nickname|ct)\s*=\s*(?:htmlDecode\(\s*)?(["\'])(.*?)\2',
+                           re.S)
+INGEST_ELEMENT_RE = re.compile(r'<(\w+)\b[^>]*\bid="(activity-name|js_name|publish_time)"[^>]*>(.*?)</\1>', re.S)
+INGEST_CONTENT_RE = re.compile(r'<div\b[^>]*\bid="js_content"[^>]*>(.*?)(?:<script\b|$)', re.S)
+INGEST_DATE_RE = re.compile(r'(\d{4})[-/.年](\d{1,2})[-/.月](\d{1,2})日?(?:[\sT]+(\d{1,2}):(\d{2}))?')
+# JSON 导出中各 Article 字段可能使用的键名，按顺序取第一个非空值
+INGEST_JSON_FIELDS = {
+    'title': ('title', 'msg_title'),
+    'source': ('source', 'nickname', 'account', 'mp_name', 'author'),
+    'published': ('published', 'publish_time', 'create_time', 'datetime', 'ct'),
+    'url': ('url', 'link', 'content_url', 'msg_link'),
+    'summary': ('summary', 'digest', 'desc', 'msg_desc', 'description'),
+    'tags': ('tags',),
+}
+
+def normalize_published(value):
+    """把 Unix 时间戳（秒或毫秒）或各种日期文本统一为北京时间的 "YYYY-MM-DD HH:MM"，无法识别时返回空串"""
+    if isinstance(value, str) and value.strip().isdigit():
+        value = int(value.strip())
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        if value > 1e11:
+            value /= 1000
+        return datetime.fromtimestamp(value, FEED_TZ).strftime('%Y-%m-%d %H:%M')
+    m = INGEST_DATE_RE.search(str(value or ''))
+    if not m:
+        return ''
+    year, month, day, hour, minute = m.groups()
+    return f'{year}-{int(month):02d}-{int(day):02d} {int(hour or 0):02d}:{minute or "00"}'
+
+def _content_summary(html):
+    """正文 HTML 的前 INGEST_SUMMARY_LENGTH 个字，作为没有摘要时的替代"""
+    text = html_to_text(html)
+    return text if len(text) <= INGEST_SUMMARY_LENGTH else text[:INGEST_SUMMARY_LENGTH] + '…'
+
+def parse_wechat_html(html):
+    """从保存的公众号文章网页中提取文章字段
+
+    依次参考页面脚本中的 msg_title / nickname / ct 等变量、#activity-name 等元素与 og: 元数据。
+    """
+    found = {}
+    for name, _, value in INGEST_VAR_RE.findall(html):
+        found.setdefault(name, unescape(value.replace('\\x26', '&').replace('\\x0a', ' ')))
+    for _, name, value in INGEST_ELEMENT_RE.findall(html):
+        found.setdefault(name, html_to_text(value))
+    for name, value in INGEST_META_RE.findall(html):
+        found.setdefault(name.lower(), unescape(value))
+    content = INGEST_CONTENT_RE.search(html)
+    summary = found.get('msg_desc') or found.get('og:description') or found.get('description')
+    if not summary and content:
+        summary = _content_summary(content.group(1))
+    return {
+        'title': (found.get('msg_title') or found.get('activity-name') or found.get('og:title') or '').strip(),
+        'source': (found.get('nickname') or found.get('js_name') or found.get('author') or '').strip(),
+        'published': normalize_published(found.get('ct') or found.get('publish_time')),
+        'url': found.get('msg_link') or found.get('og:url') or '',
+        'summary': [summary.strip()] if summary and summary.strip() else [],
+    }
+
+def parse_wechat_json(obj):
+    """把 JSON 导出中的一篇文章映射为 Article 字段，正文（content / content_html）只在没有摘要时使用"""
+    row = {}
+    for field, keys in INGEST_JSON_FIELDS.items():
+        value = next((obj[key] for key in keys if obj.get(key) not in (None, '', [])), None)
+        if value is not None:
+            row[field] = value
+    row['published'] = normalize_published(row.get('published'))
+    if isinstance(row.get('summary'), str):
+        row['summary'] = [row['summary']]
+    content = obj.get('content_html') or obj.get('content')
+    if not row.get('summary') and isinstance(content, str) and content.strip():
+        row['summary'] = [_content_summary(content)]
+    return row
+
+def ingest_file(name, payload):
+    """解析一个导出文件（在工作进程中运行）
+
+    Args:
+        name: 文件名或归档中的成员名，用于判断格式
+        payload: 文件路径或已读出的内容
+
+    Returns:
+        ([(ISO 日期, Article), ...], [跳过原因, ...])
+    """
+    articles, skipped = [], []
+    try:
+        data = payload if isinstance(payload, bytes) else Path(payload).read_bytes()
+        text = data.decode('utf-8-sig', errors='replace')
+        suffix = Path(name).suffix.lower()
+        if suffix in ('.html', '.htm'):
+            rows = [parse_wechat_html(text)]
+        elif suffix == '.json':
+            obj = json.loads(text)
+            rows = obj.get('articles', [obj]) if isinstance(obj, dict) else obj
+            rows = [parse_wechat_json(row) for row in rows if isinstance(row, dict)]
+        else:
+            # NDJSON 逐行解析，个别坏行不影响同一文件中的其他文章
+            rows = []
+            for number, line in enumerate(text.splitlines(), 1):
+                try:
+                    rows.append(parse_wechat_json(json.loads(line)) if line.strip() else None)
+                except ValueError as e:
+                    skipped.append(f'{name} 第 {number} 行: {e}')
+            rows = [row for row in rows if row is not None]
+    except (OSError, ValueError) as e:
+        return [], [f'{name}: {e}']
+
+    for i, row in enumerate(rows, 1):
+        label = name if len(rows) == 1 else f'{name} 第 {i} 篇'
+        if not row.get('title') or not row.get('published'):
+            skipped.append(f"{label}: 缺少{'标题' if not row.get('title') else '发布时间'}")
+            continue
+        try:
+            articles.append(article_from_row(row))
+        except (TypeError, ValueError) as e:
+            skipped.append(f'{label}: {e}')
+    return articles, skipped
+
+def iter_export_files(path):
+    """逐个产出 (名称, 路径或内容)
+
+    目录递归遍历并只传路径，由工作进程自行读取；zip 与 tar（含 .tar.gz 等压缩格式）
+    按成员顺序流式读出内容，不解压到磁盘。超过 INGEST_MAX_FILE_BYTES 的成员内容为 None。
+    """
+    path = Path(path)
+    if path.is_dir():
+        for file in sorted(path.rglob('*')):
+            if file.is_file() and file.suffix.lower() in INGEST_SUFFIXES:
+                yield file.relative_to(path).as_posix(), file
+    elif zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                if not info.is_dir() and Path(info.filename).suffix.lower() in INGEST_SUFFIXES:
+                    yield info.filename, archive.read(info) if info.file_size <= INGEST_MAX_FILE_BYTES else None
+    elif tarfile.is_tarfile(path):
+        with tarfile.open(path, 'r:*') as archive:
+            for member in archive:
+                if member.isfile() and Path(member.name).suffix.lower() in INGEST_SUFFIXES:
+                    too_big = member.size > INGEST_MAX_FILE_BYTES
+                    yield member.name, None if too_big else archive.extractfile(member).read()
+    else:
+        yield path.name, path
+
+def ingest_exports(path, workers=1):
+    """解析一个目录或归档中的全部导出文件
+
+    Returns:
+        ([(ISO 日期, Article), ...] 按发布时间排序, {'files': 文件数, 'skipped': [跳过原因, ...]})
+    """
+    results = []    # (文件序号, 解析结果)
+    skipped = []
+    files = 0
+
+    def submit_all(submit):
+        nonlocal files
+        for order, (name, payload) in enumerate(iter_export_files(path)):
+            files += 1
+            if payload is None:
+                skipped.append(f'{name}: 超过 {INGEST_MAX_FILE_BYTES // 1048576} MB')
+                continue
+            submit(order, name, payload)
+
+    if workers <= 1:
+        submit_all(lambda order, name, payload: results.append((order, ingest_file(name, payload))))
+    else:
+        pending = {}
+
+        def drain(return_when):
+            done, _ = wait(pending, return_when=return_when)
+            for future in done:
+                results.append((pending.pop(future), future.result()))
+
+        def submit(order, name, payload):
+            pending[executor.submit(ingest_file, name, payload)] = order
+            if len(pending) >= workers * INGEST_INFLIGHT_PER_WORKER:
+                drain(FIRST_COMPLETED)
+
+        try:
+            executor = ProcessPoolExecutor(max_workers=workers)
+        except (OSError, NotImplementedError) as e:
+            print(f"无法创建进程池（{e}），改用线程池解析")
+            executor = ThreadPoolExecutor(max_workers=workers)
+        with executor:
+            submit_all(submit)
+            if pending:
+                drain(ALL_COMPLETED)
+
+    rows = []
+    for order, (articles, problems) in sorted(results, key=lambda item: item[0]):
+        rows.extend((order, day, article) for day, article in articles)
+        skipped.extend(problems)
+    rows.sort(key=lambda item: (item[2].published, item[0]))
+    return [(day, article) for _, day, article in rows], {'files': files, 'skipped': skipped}
+
+def _article_keys(article):
+    """判断导入文章是否已存在的键：归一化后的原文链接与标题"""
+    keys = {('title', DEDUP_NORMALIZE_RE.sub('', article.title.lower()))}
+    if article.url:
+        keys.add(('url', normalize_article_url(article.url)))
+    return keys
+
+def append_article_cards(html, articles):
+    """把文章卡片插到已有日报最后一张卡片之后，页面其余部分逐字节保留
+
+    卡片之间与手工日报一样以换行分隔。找不到完整的最后一张卡片（含阅读原文链接与闭合标签）时返回 None。
+    """
+    last = html.rfind(ARTICLE_CARD_MARKER)
+    link = CARD_URL_RE.search(html, last) if last >= 0 else None
+    if not link:
+        return None
+    pos = link.end()
+    for _ in range(2):      # 依次闭合 card-footer 与 article-card
+        pos = html.find('</div>', pos)
+        if pos < 0:
+            return None
+        pos += len('</div>')
+    cards = ''.join('\n' + render_article_card(article) for article in articles)
+    return html[:pos] + cards + html[pos:]
+
+def merge_ingested(rows, src_dir):
+    """把导入的文章并入同一天的已有日报
+
+    链接或标题与已有文章相同的导入文章视为重复跳过。已有日报的日期直接在原页面中
+    追加新文章的卡片，页头、页脚与原有卡片保持原样；没有日报的日期产出行交给 build_dailies()。
+    没有新增文章的日期不改写，因此重复导入同一批导出不会改动任何日报。
+    已有日报无法解析或找不到插入位置时跳过该日期，避免改坏手工页面。
+
+    Returns:
+        ([(ISO 日期, Article), ...] 新日期的文章, {'added', 'duplicate', 'dates', 'conflicts'})
+    """
+    groups = {}
+    for day, article in rows:
+        groups.setdefault(day, []).append(article)
+    new_rows = []
+    stats = {'added': 0, 'duplicate': 0, 'dates': 0, 'conflicts': []}
+    for day in sorted(groups):
+        path = Path(src_dir) / f'{day}.html'
+        existing = []
+        if path.exists():
+            record = parse_html_file(path)
+            if not record:
+                stats['conflicts'].append(path.name)
+                continue
+            existing = record['articles']
+        seen = set()
+        for article in existing:
+            seen |= _article_keys(article)
+        added = []
+        for article in groups[day]:
+            keys = _article_keys(article)
+            if keys & seen:
+                stats['duplicate'] += 1
+                continue
+            seen |= keys
+            added.append(article)
+        if not added:
+            continue
+        if path.exists():
+            html = append_article_cards(path.read_bytes().decode('utf-8'), added)
+            if html is None:
+                stats['conflicts'].append(path.name)
+                continue
+            write_output(path, html)
+        else:
+            new_rows.extend((day, article) for article in added)
+        stats['added'] += len(added)
+        stats['dates'] += 1
+    return new_rows, stats
+
+def build_dailies(rows, src_dir):
+    """按日期分组并批量生成日报页面
+
+    生成的是日报源文件，不做后处理；样式抽取、压缩等随其余日报一起在发布时进行。
+
+    Args:
+        rows: (ISO 日期, Article) 的可迭代对象
+        src_dir: 日报目录
+
+    Returns:
+        生成的日报文件名列表（按日期排序）
+    """
+    groups = {}
+    for day, article in rows:
+        groups.setdefault(day, []).append(article)
+
+    filenames = []
+    for day in sorted(groups):
+        filename = f'{day}.html'
+        write_output(Path(src_dir) / filename, render_daily_html(groups[day]))
+        filenames.append(filename)
+    return filenames
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='公众号日报首页自动生成脚本')
+    parser.add_argument('--src', default=None,
+                        help='日报与发布目录（默认脚本所在目录下的 src/）')
+    parser.add_argument('--out', default=None, metavar='DIR',
+                        help='发布目录：生成的页面与后处理后的日报写到这里，--src 中的日报保持不变（默认与 --src 相同）')
+    parser.add_argument('--in-place', action='store_true',
+                        help='未指定 --out 时允许后处理（--extract-css/--minify 等）原地改写 --src 中的日报；'
+                             '默认只处理生成的页面，日报保持原样')
+    parser.add_argument('--cache', default=None,
+                        help='解析缓存清单路径（默认 .cache/parse_cache.json）')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='忽略并不写入解析缓存，强制全量解析')
+    parser.add_argument('-j', '--workers', type=int, default=1,
+                        help='并行解析的进程数，0 表示使用全部 CPU 核心（默认 1，串行）')
+    parser.add_argument('--per-page', type=int, default=INDEX_PAGE_SIZE,
+                        help=f'首页及每个分页展示的期数，0 表示首页展示全部（默认 {INDEX_PAGE_SIZE}）')
+    parser.add_argument('--search', action='store_true',
+                        help='生成全文搜索索引（src/search/）与搜索页 search.html')
+    parser.add_argument('--extract-css', action='store_true',
+                        help='把所有页面（含日报）的内联样式抽取到 assets/ 下按内容哈希命名的 CSS 文件')
+    parser.add_argument('--minify', action='store_true',
+                        help='压缩所有发布的 HTML（含日报）与抽取出的 CSS')
+    parser.add_argument('--precompress', action='store_true',
+                        help='为发布的 HTML/CSS 生成 .gz 与 .br（需安装 brotli）预压缩副本')
+    parser.add_argument('--images', action='store_true',
+                        help='处理所有页面（含日报）中的图片：复制到 assets/img/ 并按内容哈希命名，'
+                             '补充宽高与懒加载，安装 Pillow 时生成多倍图与 WebP')
+    parser.add_argument('--fetch-images', action='store_true',
+                        help='下载远程图片（缓存在 .cache/images/）后一并处理，隐含 --images')
+    parser.add_argument('--build-dailies', metavar='SOURCE',
+                        help='从结构化数据批量生成日报页面：*.json / *.ndjson / *.sqlite / supabase:表名')
+    parser.add_argument('--ingest', metavar='PATH',
+                        help='批量导入原始公众号文章导出（目录或 zip/tar 归档，内含文章网页 .html 或 .json/.ndjson），'
+                             '按发布时间归入对应日期的日报（与已有日报合并、跳过重复），并行进程数取 --workers')
+    parser.add_argument('--export', nargs='?', const='', default=None, metavar='DIR',
+                        help='导出 articles.ndjson 与按日 JSON 分片（默认目录 src/data）')
+    parser.add_argument('--dedup', nargs='?', const='', default=None, metavar='PATH',
+                        help='检测跨日期的重复与近似重复文章，写出报告（默认 .cache/duplicates.json）')
+    parser.add_argument('--suppress-duplicates', action='store_true',
+                        help='在生成的首页、聚合页、订阅源、搜索索引等中去掉重复文章（隐含 --dedup）')
+    parser.add_argument('--facets', action='store_true',
+                        help='生成按公众号（source/）与按标签（tag/）聚合的文章列表页及汇总页')
+    parser.add_argument('--lazy-dailies', action='store_true',
+                        help='为每期日报生成只含标题、公众号与标签的精简页 brief/YYYY-MM-DD.html，摘要等在展开或滚动到附近时'
+                             '从同名 JSON 分片加载；首页与归档页的日报卡片改为链接到精简页')
+    parser.add_argument('--service-worker', action='store_true',
+                        help='生成离线可用的 sw.js（内嵌按内容哈希生成的预缓存清单），并在所有页面中注册')
+    parser.add_argument('--sw-precache', type=int, default=SW_PRECACHE_DAILIES,
+                        help=f'预缓存的最新日报期数（默认 {SW_PRECACHE_DAILIES}）')
+    parser.add_argument('--analytics', action='store_true',
+                        help='生成统计页 stats.html 与 data/stats.json：按星期与发布时间的分布、公众号逐周趋势、热门标签与标签组合')
+    parser.add_argument('--feeds', action='store_true',
+                        help='生成 RSS（feed.xml）、Atom（atom.xml）与 JSON Feed（feed.json）订阅源')
+    parser.add_argument('--feed-size', type=int, default=FEED_SIZE,
+                        help=f'订阅源保留的最新条目数（默认 {FEED_SIZE}）')
+    parser.add_argument('--feed-per-article', action='store_true',
+                        help='订阅源每篇文章一个条目（默认每期日报一个条目）')
+    parser.add_argument('--sitemap', action='store_true',
+                        help='生成 sitemap.xml（超过 5 万个地址时拆分并生成索引）与 robots.txt，'
+                             '并为首页、归档页和日报补充规范链接与 OpenGraph 元数据')
+    parser.add_argument('--site-url', default=None,
+                        help='站点根地址，用于订阅源与站点地图中的绝对链接（默认取 Netlify 注入的 URL 环境变量）')
+    parser.add_argument('--validate', action='store_true',
+                        help='构建后校验全部页面的本地链接、资源引用与日报结构，发现问题时以状态码 1 退出')
+    parser.add_argument('--check-links', action='store_true',
+                        help='校验时一并检查外部链接（并发请求，成功结果缓存 7 天），隐含 --validate')
+    parser.add_argument('--link-workers', type=int, default=LINK_CHECK_WORKERS,
+                        help=f'检查外部链接的最大并发数（默认 {LINK_CHECK_WORKERS}）')
+    parser.add_argument('--stats', nargs='?', const='', default=None, metavar='PATH',
+                        help='统计各阶段耗时、字节数、每个文件的解析耗时与峰值内存，'
+                             '并写出 JSON 报告（默认 .cache/build_stats.json）')
+    parser.add_argument('--profile', nargs='?', const='', default=None, metavar='PATH',
+                        help='用 cProfile 分析整次构建并保存结果（默认 .cache/build.prof），隐含 --stats')
+    parser.add_argument('--db', nargs='?', const='', default=None, metavar='PATH',
+                        help='把日报、文章、公众号与标签同步到 SQLite 归档库（默认 .cache/archive.sqlite）')
+    parser.add_argument('--db-query', metavar='TEXT',
+                        help='构建后在归档库中全文检索文章并打印结果，隐含 --db')
+    parser.add_argument('--watch', action='store_true',
+                        help='构建后持续监听日报与模板的变化，只重新生成受影响的页面')
+    parser.add_argument('--serve', nargs='?', type=int, const=8000, default=None, metavar='PORT',
+                        help='启动带自动刷新的本地预览服务器（默认端口 8000，隐含 --watch）')
+    args = parser.parse_args(argv)
+    if args.db_query and args.db is None:
+        args.db = ''
+    return args
+
+def page_signature(page, template_key):
+    """页面内容签名：只包含渲染页面实际用到的字段，签名不变则无需重新生成"""
+    data = {
+        'template': template_key,
+        'page': {k: v for k, v in page.items() if k != 'dailies'},
+        'cards': [[d['filename'], d['date'], d['weekday'], d['article_count'], d['sources']]
+                  for d in page['dailies']],
+    }
+    return hashlib.sha1(json.dumps(data, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
+
+def template_signature():
+    """模板文件的修改时间，模板变化时所有页面都需要重新生成"""
+    return [(TEMPLATE_DIR / name).stat().st_mtime_ns for name in ('template_header.html', 'template_footer.html')]
+
+# --profile 打印的 cProfile 条目数
+PROFILE_TOP_N = 20
+
+def peak_rss():
+    """本进程与已结束子进程（并行解析的工作进程）的峰值常驻内存，单位字节
+
+    依赖 resource 模块，Windows 上不可用时返回 None。
+    """
+    if resource is None:
+        return None
+    # Linux 的 ru_maxrss 单位为 KB，macOS 为字节
+    scale = 1 if sys.platform == 'darwin' else 1024
+    return {
+        'self': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale,
+        'children': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale,
+    }
+
+class BuildStats:
+    """记录一次构建各阶段的耗时、处理量与每个文件的读取/解析耗时（--stats）
+
+    阶段耗时为墙钟时间；文件的 read/parse 耗时在工作进程内测量，
+    并行解析时其总和会大于 parse 阶段的墙钟时间。
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}    # 阶段名 -> {'seconds', 'bytes', 'items'}
+        self.files = {}     # 文件名 -> {'read', 'parse', 'bytes'}
+
+    @contextmanager
+    def stage(self, name):
+        """计时一个阶段，可多次进入累加；with 得到的字典可追加 bytes/items"""
+        entry = self.stages.setdefault(name, {'seconds': 0.0, 'bytes': 0, 'items': 0})
+        started = time.perf_counter()
+        try:
+            yield entry
+        finally:
+            entry['seconds'] += time.perf_counter() - started
+
+    def add_file(self, name, timings):
+        self.files[name] = timings
+
+    def to_dict(self, limit=10):
+        slowest = sorted(self.files.items(), key=lambda item: item[1]['read'] + item[1]['parse'], reverse=True)
+        return {
+            'total_seconds': time.perf_counter() - self.started,
+            'stages': self.stages,
+            'files_parsed': len(self.files),
+            'read_seconds': sum(t['read'] for t in self.files.values()),
+            'parse_seconds': sum(t['parse'] for t in self.files.values()),
+            'read_bytes': sum(t['bytes'] for t in self.files.values()),
+            'peak_rss': peak_rss(),
+            'slowest': [dict(t, file=name) for name, t in slowest[:limit]],
+            'files': self.files,
+        }
+
+    def report(self, path=None, limit=10):
+        """打印各阶段耗时与最慢的文件，path 不为空时写出 JSON 报告"""
+        data = self.to_dict(limit)
+        print(f"\n⏱️ 构建耗时 {data['total_seconds']:.3f}s")
+        for name, entry in self.stages.items():
+            detail = ''
+            if entry['items']:
+                detail += f"，{entry['items']} 项"
+            if entry['bytes']:
+                detail += f"，{entry['bytes']} 字节"
+            print(f"  - {name}: {entry['seconds']:.3f}s{detail}")
+        if self.files:
+            print(f"  解析 {data['files_parsed']} 个文件：读取 {data['read_seconds']:.3f}s / {data['read_bytes']} 字节，"
+                  f"扫描与解析 {data['parse_seconds']:.3f}s")
+            for item in data['slowest']:
+                print(f"    · {item['file']}: 读取 {item['read'] * 1000:.1f}ms，解析 {item['parse'] * 1000:.1f}ms，"
+                      f"{item['bytes']} 字节")
+        rss = data['peak_rss']
+        if rss:
+            print(f"  峰值内存: 主进程 {rss['self'] / 1048576:.1f} MB，子进程 {rss['children'] / 1048576:.1f} MB")
+        if path:
+            write_output(path, json.dumps(data, ensure_ascii=False, indent=2, sort_keys=True))
+            print(f"  报告: {path}")
+
+def sitemap_urls(pages, dailies, entries):
+    """站点地图中的 (相对路径, lastmod)：首页、分页、归档页与全部日报
+
+    日报的 lastmod 取自解析缓存（见 update_lastmod()），列表页取其所列日报中最新的一个，
+    年度与总归档页取对应年份 / 全部日报中最新的一个。
+    """
+    lastmods = {d['filename']: entries.get(d['filename'], {}).get('lastmod') or daily_iso_date(d) for d in dailies}
+    by_year = {}
+    for daily in dailies:
+        year = daily['year']
+        by_year[year] = max(by_year.get(year, ''), lastmods[daily['filename']])
+    latest = max(lastmods.values())
+
+    urls = []
+    for page in pages:
+        if page['dailies']:
+            lastmod = max(lastmods[d['filename']] for d in page['dailies'])
+        else:
+            lastmod = by_year.get(page['path'].split('/')[1], latest) if page['path'].count('/') == 2 else latest
+        urls.append((page['path'], lastmod))
+    urls.extend((d['filename'], lastmods[d['filename']]) for d in dailies)
+    return urls
+
+def build_site(args, src_dir, cache_path, state, article_rows=None, build_stats=None):
+    """执行一次增量构建
+
+    Args:
+        args: 命令行参数
+        src_dir: 日报目录，未指定 --out 时同时是发布目录
+        cache_path: 解析缓存清单路径
+        state: 跨构建保留的状态（监听模式下复用）：
+            entries 解析缓存，page_signatures 已生成页面的签名，first 是否首次构建
+        article_rows: 需要先生成日报页面的 (日期, Article) 数据，见 build_dailies()
+        build_stats: BuildStats 实例，提供时额外记录每个文件的解析耗时
+
+    Returns:
+        解析出的日报列表，失败时返回 None
+    """
+    timer = build_stats or BuildStats()
+    OUTPUT_STATS.clear()
+    out_dir = publish_dir(args, src_dir)
+    images = None
+    if args.images or args.fetch_images:
+        images = ImagePipeline(src_dir, cache_path.parent / 'images', fetch=args.fetch_images, out_dir=out_dir)
+    writer = SiteWriter(out_dir, extract_css=args.extract_css, minify=args.minify, precompress=args.precompress,
+                        images=images, service_worker=args.service_worker, src_dir=src_dir)
+
+    # 从结构化数据批量生成日报
+    if article_rows is not None:
+        with timer.stage('build-dailies') as stage:
+            built = build_dailies(article_rows, src_dir)
+            stage['items'] = len(built)
+        print(f"✅ 从 {' + '.join(filter(None, (args.build_dailies, args.ingest)))} 生成 {len(built)} 期日报")
+
+    # 查找所有日报HTML文件（排除index.html等生成的页面）
+    with timer.stage('discovery') as stage:
+        html_files = []
+        for file in sorted(src_dir.glob('*.html')):
+            if file.name.lower() not in GENERATED_ROOT_PAGES:
+                html_files.append(file)
+        stage['items'] = len(html_files)
 
     if not html_files:
         print("未找到任何日报文件")
-        return
+        return None
 
     print(f"找到 {len(html_files)} 个日报文件，开始解析...")
 
-    # 解析所有文件
-    dailies = []
-    for filepath in html_files:
-        print(f"  解析: {filepath.name}")
-        info = parse_html_file(filepath)
-        if info:
-            dailies.append(info)
+    # 解析所有文件（命中缓存的文件不再重复解析）
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+    with timer.stage('parse') as stage:
+        dailies, entries, cache_stats = parse_with_cache(html_files, state['entries'], workers, build_stats)
+        stage['items'] = cache_stats['parsed']
+    state['entries'] = entries
+    print(f"缓存命中 {cache_stats['hit']} 个，重新解析 {cache_stats['parsed']} 个，移除 {cache_stats['evicted']} 个")
 
     if not dailies:
         print("没有成功解析任何文件")
-        return
+        return None
 
     # 按日期排序（最新的在前面）
-    dailies.sort(key=lambda x: (x['year'], x['month'].zfill(2), x['day'].zfill(2)), reverse=True)
+    dailies.sort(key=daily_sort_key, reverse=True)
 
     print(f"\n成功解析 {len(dailies)} 个日报")
     print(f"总文章数: {sum(d['article_count'] for d in dailies)}")
 
-    # 生成index.html
-    html_content = generate_index_html(dailies)
+    # 重复文章检测；去重只作用于后续生成的页面与数据，日报页面本身保持不变
+    if args.dedup is not None or args.suppress_duplicates:
+        with timer.stage('dedup') as stage:
+            groups = find_duplicates(dailies)
+            stage['items'] = sum(len(group['duplicates']) for group in groups)
+        write_duplicates_report(Path(args.dedup) if args.dedup else cache_path.parent / 'duplicates.json', groups)
+        if args.suppress_duplicates and groups:
+            dailies = suppress_duplicates(dailies, groups)
+            print(f"   已在生成的页面中去掉重复文章，剩余 {sum(d['article_count'] for d in dailies)} 篇")
 
-    # 写入文件
-    index_path = src_dir / 'index.html'
-    with open(index_path, 'w', encoding='utf-8') as f:
-        f.write(html_content)
+    # 生成首页、分页与归档页；签名未变的页面（监听模式下）直接跳过
+    extra_nav = [('🔍 搜索', 'search.html')] if args.search else []
+    if args.analytics:
+        extra_nav.append(('📊 统计', 'stats.html'))
+    if args.facets:
+        extra_nav += [(f'{icon} {label}', f'{kind}/index.html') for kind, (icon, label) in FACET_KINDS.items()]
+    site_url = resolve_site_url(args.site_url)
+    alternates = []
+    if args.feeds and site_url:
+        extra_nav.append(('📡 订阅', 'feed.xml'))
+        alternates = [(mime, label, name) for name, (mime, label, _) in FEED_FILES.items()]
+    sitemap = args.sitemap and site_url
+    with timer.stage('render'):
+        pages = plan_index_pages(dailies, args.per_page, extra_nav)
+        for page in pages:
+            page['alternates'] = alternates
+            if args.lazy_dailies:
+                page['daily_dir'] = f'{BRIEF_DIR}/'
+            if sitemap:
+                url = f"{site_url}/" if page['path'] == 'index.html' else f"{site_url}/{page['path']}"
+                description = page['section_title'] if page['path'] != 'index.html' else FEED_DESCRIPTION
+                page['head_meta'] = render_head_meta(url, f"{SITE_TITLE} - {page['title']}", description)
+        template_key = template_signature()
+    old_signatures = state['page_signatures']
+    new_signatures = {}
+    rendered = 0
+    for page in pages:
+        signature = page_signature(page, template_key)
+        new_signatures[page['path']] = signature
+        if old_signatures.get(page['path']) != signature or not (out_dir / page['path']).exists():
+            with timer.stage('render') as stage:
+                html = render_index_page(page)
+                stage['items'] += 1
+                stage['bytes'] += len(html.encode('utf-8'))
+            with timer.stage('write'):
+                writer.write_page(page['path'], html)
+            rendered += 1
+    state['page_signatures'] = new_signatures
+    with timer.stage('write'):
+        remove_stale_pages(out_dir, [page['path'] for page in pages])
 
-    print(f"\n✅ 成功生成 index.html")
+    index_path = out_dir / 'index.html'
+    print(f"\n✅ 成功生成 index.html 及 {len(pages) - 1} 个分页/归档页（本次渲染 {rendered} 个）")
     print(f"   路径: {index_path}")
-    print(f"\n各期日报:")
-    for d in dailies:
-        print(f"  - {d['date']} ({d['article_count']} 篇文章)")
+
+    # 全文搜索索引
+    if args.search:
+        with timer.stage('search'):
+            doc_total, term_total, shard_total = build_search_index(dailies, out_dir / 'search')
+            writer.write_page('search.html', render_search_page())
+        print(f"\n✅ 已生成搜索索引: {doc_total} 篇文章, {term_total} 个词项, {shard_total} 个分片")
+        print(f"   路径: {out_dir / 'search.html'}")
+
+    # 公众号 / 标签聚合页
+    if args.facets:
+        with timer.stage('facets') as stage:
+            facet_counts = write_facet_pages(dailies, writer)
+            stage['items'] = sum(facet_counts.values())
+        print(f"\n✅ 已生成聚合页: {facet_counts['source']} 个公众号, {facet_counts['tag']} 个标签")
+        print(f"   路径: {out_dir / 'source'}, {out_dir / 'tag'}")
+
+    # 精简版日报
+    if args.lazy_dailies:
+        with timer.stage('brief') as stage:
+            stage['items'] = write_brief_dailies(dailies, writer, site_url)
+        print(f"\n✅ 已生成 {stage['items']} 期精简版日报")
+        print(f"   路径: {out_dir / BRIEF_DIR}")
+
+    # 统计页
+    if args.analytics:
+        with timer.stage('analytics') as stage:
+            columns = ArticleColumns.from_dailies(dailies)
+            analytics = compute_analytics(columns)
+            write_output(out_dir / 'data' / 'stats.json', json.dumps(analytics, ensure_ascii=False, separators=(',', ':')))
+            writer.write_page('stats.html', render_stats_page(analytics))
+            stage['items'] = len(columns)
+        print(f"\n✅ 已生成统计页: {len(columns)} 篇文章, {len(analytics['sources'])} 个公众号, "
+              f"{len(analytics['weeks'])} 周（{'numpy' if np is not None else '纯 Python'}）")
+        print(f"   路径: {out_dir / 'stats.html'}, {out_dir / 'data' / 'stats.json'}")
+
+    # 订阅源
+    if args.feeds:
+        if site_url:
+            with timer.stage('feeds') as stage:
+                stage['items'] = write_feeds(dailies, out_dir, site_url, args.feed_per_article, args.feed_size)
+            print(f"\n✅ 已生成订阅源（{stage['items']} 个条目）: feed.xml, atom.xml, feed.json")
+        else:
+            print("\n⚠️ 未设置站点地址（--site-url 或 URL 环境变量），跳过订阅源生成")
+
+    # 站点地图与 robots.txt；lastmod 取自解析缓存，只在日报内容摘要变化时更新
+    if args.sitemap:
+        if site_url:
+            with timer.stage('sitemap') as stage:
+                urls = sitemap_urls(pages, dailies, entries)
+                shard_total = write_sitemap(out_dir, site_url, urls)
+                stage['items'] = len(urls)
+                for daily in dailies:
+                    writer.head_meta[daily['filename']] = daily_head_meta(daily, site_url)
+            print(f"\n✅ 已生成站点地图（{len(urls)} 个地址，{shard_total} 个文件）: sitemap.xml, robots.txt")
+        else:
+            print("\n⚠️ 未设置站点地址（--site-url 或 URL 环境变量），跳过站点地图生成")
+
+    # 日报页面的后处理（样式抽取、元数据等）：指定 --out 时处理后写到发布目录，日报源文件不变；
+    # 否则只有 --in-place 才原地改写，改写后刷新缓存签名，避免下次构建重复解析。
+    # 首次构建处理全部日报（参数可能与上次不同），监听模式下的重建只处理变化的日报
+    postprocess = (args.extract_css or args.minify or args.precompress or images is not None or writer.head_meta
+                   or args.service_worker)
+    separate = out_dir != src_dir
+    if postprocess and not separate and not args.in_place:
+        print("\n⚠️ 日报源文件保持不变，后处理只作用于生成的页面；"
+              "用 --out 发布到单独目录，或加 --in-place 原地改写日报")
+    with timer.stage('write') as stage:
+        if separate or (postprocess and args.in_place):
+            names = [f.name for f in html_files] if state['first'] else cache_stats['parsed_names']
+            for name in names:
+                writer.rewrite_page(name)
+        if separate:
+            publish_static_files(src_dir, out_dir, {f.name for f in html_files})
+        writer.finish(collect_stale=state['first'])
+        for name in writer.rewritten:
+            if name in entries:
+                entry = entries[name]
+                st = (src_dir / name).stat()
+                entry.update(source_sha256=entry.get('source_sha256') or entry['sha256'],
+                             size=st.st_size, mtime_ns=st.st_mtime_ns, sha256=file_digest(src_dir / name))
+        stage['bytes'] = writer.bytes_written
+    if args.extract_css:
+        print(f"\n✅ 共享样式表 {len(writer.referenced)} 个，本次改写 {len(writer.rewritten)} 个日报")
+    writer.report()
+
+    if not args.no_cache:
+        with timer.stage('cache'):
+            save_parse_cache(cache_path, entries)
+
+    # SQLite 归档库
+    if args.db is not None:
+        db_path = Path(args.db) if args.db else cache_path.parent / 'archive.sqlite'
+        with timer.stage('db') as stage:
+            db_stats = sync_archive_store(db_path, dailies)
+            stage['items'] = db_stats['updated']
+        fts = f"全文检索分词器 {db_stats['fts']}" if db_stats['fts'] else '当前 SQLite 不支持 FTS5，检索将使用 LIKE'
+        print(f"\n✅ 归档库已同步: 更新 {db_stats['updated']} 期，未变 {db_stats['unchanged']} 期，"
+              f"删除 {db_stats['deleted']} 期（{fts}）")
+        print(f"   路径: {db_path}")
+        if args.db_query:
+            rows = query_archive_store(db_path, args.db_query)
+            print(f"\n🔎 「{args.db_query}」共 {len(rows)} 条结果:")
+            for day, published, source, title, url in rows:
+                print(f"  - {published or day} [{source}] {title}")
+
+    # 导出结构化数据
+    if args.export is not None:
+        export_dir = Path(args.export) if args.export else out_dir / 'data'
+        with timer.stage('export') as stage:
+            article_total = export_archive(dailies, export_dir)
+            stage['items'] = article_total
+        print(f"\n✅ 已导出 {article_total} 篇文章的结构化数据")
+        print(f"   路径: {export_dir}")
+
+    # Service Worker：预缓存清单取自本次构建写出的最终文件
+    if args.service_worker:
+        with timer.stage('service-worker') as stage:
+            manifest = write_service_worker(out_dir, precache_paths(out_dir, dailies, args.sw_precache))
+            stage['items'] = len(manifest['files'])
+        print(f"\n✅ 已生成 sw.js: 预缓存 {len(manifest['files'])} 个文件，版本 {manifest['version']}")
+
+    # 链接与结构校验：放在最后，检查的是本次构建完成后的发布目录
+    state['problems'] = []
+    if args.validate or args.check_links:
+        validate_path = cache_path.parent / 'validate.json'
+        validate_cache = load_validate_cache(None if args.no_cache else validate_path)
+        with timer.stage('validate') as stage:
+            problems, validate_stats = validate_site(out_dir, validate_cache, {f.name for f in html_files}, site_url,
+                                                     args.check_links, args.link_workers)
+            stage['items'] = validate_stats['rechecked']
+        if not args.no_cache:
+            write_output(validate_path, json.dumps(validate_cache, ensure_ascii=False, sort_keys=True))
+        external = (f"，外部链接 {validate_stats['external']} 个（本次请求 {validate_stats['requested']} 个）"
+                    if args.check_links else '')
+        print(f"\n{'⚠️' if problems else '✅'} 校验 {validate_stats['pages']} 个页面（重新检查 {validate_stats['rechecked']} 个），"
+              f"本地链接 {validate_stats['links']} 个{external}，发现 {len(problems)} 个问题")
+        for rel_path, message in problems:
+            print(f"  - {rel_path}: {message}")
+        state['problems'] = problems
+
+    print(f"\n📝 写出 {OUTPUT_STATS['written']} 个文件，跳过 {OUTPUT_STATS['skipped']} 个内容未变的文件")
+
+    state['first'] = False
+    return dailies
+
+# 监听模式：轮询间隔（安装 watchdog 后改为事件驱动，轮询只作兜底）与去抖时间，单位秒
+WATCH_POLL_INTERVAL = 0.25
+WATCH_DEBOUNCE = 0.2
+
+def snapshot_sources(src_dir):
+    """记录日报与模板文件的 (mtime_ns, size)，用于判断是否有变化"""
+    paths = [f for f in src_dir.glob('*.html') if f.name.lower() not in GENERATED_ROOT_PAGES]
+    paths += [TEMPLATE_DIR / 'template_header.html', TEMPLATE_DIR / 'template_footer.html']
+    snapshot = {}
+    for path in paths:
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            continue
+        snapshot[str(path)] = (st.st_mtime_ns, st.st_size)
+    return snapshot
+
+def start_change_notifier(src_dir):
+    """有 watchdog 时注册文件系统事件，返回收到事件即置位的 threading.Event；否则返回 None"""
+    try:
+        from watchdog.observers import Observer
+        from watchdog.events import FileSystemEventHandler
+    except ImportError:
+        return None
+
+    wake = threading.Event()
+
+    class Handler(FileSystemEventHandler):
+        def on_any_event(self, event):
+            wake.set()
+
+    observer = Observer()
+    observer.schedule(Handler(), str(src_dir), recursive=False)
+    observer.schedule(Handler(), str(TEMPLATE_DIR), recursive=False)
+    observer.daemon = True
+    observer.start()
+    return wake
+
+def wait_for_changes(src_dir, previous, wake=None):
+    """阻塞直到日报或模板发生变化，并等到一批连续写入结束（去抖）
+
+    Returns:
+        (新快照, 变化的文件路径列表)
+    """
+    while True:
+        if wake is not None:
+            # 事件驱动：收到通知立即检查，同时每秒兜底检查一次
+            wake.wait(1.0)
+            wake.clear()
+        else:
+            time.sleep(WATCH_POLL_INTERVAL)
+        current = snapshot_sources(src_dir)
+        if current == previous:
+            continue
+        while True:
+            time.sleep(WATCH_DEBOUNCE)
+            settled = snapshot_sources(src_dir)
+            if settled == current:
+                break
+            current = settled
+        changed = sorted(k for k in set(previous) | set(current) if previous.get(k) != current.get(k))
+        return current, changed
+
+LIVE_RELOAD_SCRIPT = (
+    '<script>(function(){var v;new EventSource("/__livereload").onmessage=function(e){'
+    'if(v&&e.data!==v){location.reload();}v=e.data;};})();</script>'
+)
+
+class LiveReloadHandler(SimpleHTTPRequestHandler):
+    """本地预览：静态文件服务 + HTML 注入自动刷新脚本 + /__livereload 事件流"""
+
+    def do_GET(self):
+        if self.path == '/__livereload':
+            self._stream_build_versions()
+            return
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            path = os.path.join(path, 'index.html')
+        if not (path.endswith('.html') and os.path.isfile(path)):
+            super().do_GET()
+            return
+        with open(path, 'rb') as f:
+            body = f.read()
+        body = body.replace(b'</body>', LIVE_RELOAD_SCRIPT.encode('utf-8') + b'</body>', 1)
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream_build_versions(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        sent = None
+        try:
+            while True:
+                version = self.server.build_version
+                if version != sent:
+                    self.wfile.write(f'data: {version}\n\n'.encode('utf-8'))
+                    self.wfile.flush()
+                    sent = version
+                time.sleep(0.2)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+def start_dev_server(src_dir, port):
+    """在后台线程启动预览服务器，返回 server（build_version 递增即通知浏览器刷新）"""
+    server = ThreadingHTTPServer(('127.0.0.1', port), partial(LiveReloadHandler, directory=str(src_dir)))
+    server.daemon_threads = True
+    server.build_version = 1
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"\n🌐 预览地址: http://127.0.0.1:{port}/ （修改日报或模板后自动刷新）")
+    return server
+
+def watch_and_rebuild(args, src_dir, cache_path, state, server=None):
+    """监听日报与模板变化，去抖后增量重建，Ctrl+C 退出"""
+    wake = start_change_notifier(src_dir)
+    mode = 'watchdog 事件' if wake is not None else f'{WATCH_POLL_INTERVAL}s 轮询'
+    print(f"\n👀 正在监听 {src_dir} 与模板文件（{mode}），按 Ctrl+C 退出")
+    snapshot = snapshot_sources(src_dir)
+    try:
+        while True:
+            snapshot, changed = wait_for_changes(src_dir, snapshot, wake)
+            print(f"\n🔄 检测到变化: {', '.join(Path(p).name for p in changed)}")
+            started = time.perf_counter()
+            build_site(args, src_dir, cache_path, state)
+            # 构建过程中对日报的改写（样式抽取、压缩）不应再次触发重建
+            snapshot = snapshot_sources(src_dir)
+            if server is not None:
+                server.build_version += 1
+            print(f"⏱️ 重建耗时 {time.perf_counter() - started:.2f}s")
+    except KeyboardInterrupt:
+        print("\n已停止监听")
+
+def main(argv=None):
+    """主函数"""
+    args = parse_args(argv)
+
+    # 设置目录
+    script_dir = Path(__file__).parent
+    src_dir = Path(args.src) if args.src else script_dir / 'src'
+    cache_path = Path(args.cache) if args.cache else script_dir / '.cache' / 'parse_cache.json'
+
+    if not src_dir.exists():
+        print(f"错误: src 目录不存在: {src_dir}")
+        return 1
+
+    state = {
+        'entries': {} if args.no_cache else load_parse_cache(cache_path),
+        'page_signatures': {},
+        'first': True,
+    }
+    article_rows = load_article_source(args.build_dailies) if args.build_dailies else None
+    if args.ingest:
+        workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+        rows, ingest_stats = ingest_exports(args.ingest, workers)
+        rows, merge_stats = merge_ingested(rows, src_dir)
+        print(f"📥 导入 {ingest_stats['files']} 个文件：新增 {merge_stats['added']} 篇（{merge_stats['dates']} 期日报），"
+              f"跳过重复 {merge_stats['duplicate']} 篇、无法识别 {len(ingest_stats['skipped'])} 项")
+        for problem in ingest_stats['skipped']:
+            print(f"  - {problem}")
+        for name in merge_stats['conflicts']:
+            print(f"  - ⚠️ 已有日报 {name} 无法解析或找不到文章卡片，未并入该日期的文章")
+        article_rows = itertools.chain(article_rows or (), rows)
+
+    # --stats 记录各阶段耗时；--profile 另外用 cProfile 包裹整次构建
+    build_stats = BuildStats() if args.stats is not None or args.profile is not None else None
+    if args.profile is not None:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    dailies = build_site(args, src_dir, cache_path, state, article_rows, build_stats)
+    if args.profile is not None:
+        profiler.disable()
+        profile_path = Path(args.profile or script_dir / '.cache' / 'build.prof')
+        profile_path.parent.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(str(profile_path))
+        print(f"\n🔬 cProfile 结果（按累计耗时前 {PROFILE_TOP_N} 项，完整数据: {profile_path}）")
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(PROFILE_TOP_N)
+    if build_stats is not None:
+        build_stats.report(args.stats or script_dir / '.cache' / 'build_stats.json')
+
+    if dailies:
+        print(f"\n各期日报:")
+        for d in dailies:
+            print(f"  - {d['date']} ({d['article_count']} 篇文章)")
+
+    if args.watch or args.serve is not None:
+        server = start_dev_server(publish_dir(args, src_dir), args.serve) if args.serve is not None else None
+        watch_and_rebuild(args, src_dir, cache_path, state, server)
+
+    # 校验发现问题时以非零状态码退出，便于在 CI 中拦截
+    return 1 if state.get('problems') else 0
 
 if __name__ == '__main__':
     # Windows下设置UTF-8输出
-    import sys
     if sys.platform == 'win32':
-        import io
         sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
-    main()
+    sys.exit(main())
@@ -0,0 +1,53 @@
+"""--dedup 重复文章检测的测试"""
+
+import unittest
+
+from generate_index import Article, find_duplicates
+
+BODY = '本周人工智能领域的主要进展包括大模型推理成本持续下降、多家厂商发布新一代芯片以及开源社区的快速迭代。'
+OTHER_BODY = '新能源汽车销量再创新高，动力电池装机量同比大幅增长，充电基础设施建设进入加速阶段。'
+
+
+def daily(day, *articles):
+    return {'year': '2025', 'month': '11', 'day': str(day), 'filename': f'2025-11-{day:02d}.html',
+            'articles': list(articles)}
+
+
+def duplicate_titles(groups):
+    return [(group['original']['filename'], [(m['filename'], m['reason']) for m in group['duplicates']])
+            for group in groups]
+
+
+class FindDuplicatesTest(unittest.TestCase):
+    def test_recurring_short_title_is_not_duplicate(self):
+        groups = find_duplicates([
+            daily(14, Article(title='AI 早报', summary=[BODY], url='https://x/1')),
+            daily(15, Article(title='AI 早报', summary=[OTHER_BODY], url='https://x/2')),
+        ])
+        self.assertEqual(groups, [])
+
+    def test_short_title_with_similar_body_is_duplicate(self):
+        groups = find_duplicates([
+            daily(14, Article(title='AI 早报', summary=[BODY], url='https://x/1')),
+            daily(15, Article(title='AI 早报', summary=[BODY + '完'], url='https://x/2')),
+        ])
+        self.assertEqual(duplicate_titles(groups), [('2025-11-14.html', [('2025-11-15.html', 'minhash')])])
+
+    def test_short_title_with_same_url_is_duplicate(self):
+        groups = find_duplicates([
+            daily(14, Article(title='AI 早报', url='https://x/1#a')),
+            daily(15, Article(title='AI 早报', url='https://x/1')),
+        ])
+        self.assertEqual(duplicate_titles(groups), [('2025-11-14.html', [('2025-11-15.html', 'url')])])
+
+    def test_long_title_matches_exactly(self):
+        title = '锂电+半导体双重布局！超声波设备龙头先进封装即将爆发！'
+        groups = find_duplicates([
+            daily(14, Article(title=title, summary=[BODY], url='https://x/1')),
+            daily(15, Article(title=title, summary=[OTHER_BODY], url='https://x/2')),
+        ])
+        self.assertEqual(duplicate_titles(groups), [('2025-11-14.html', [('2025-11-15.html', 'title')])])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+"""--ingest 导入与已有日报合并的测试"""
+
+import io
+import json
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+import generate_index
+from generate_index import Article, append_article_cards, ingest_exports, merge_ingested, parse_html_file
+
+SRC_DIR = Path(__file__).resolve().parent.parent / 'src'
+DAILY = '2025-11-14.html'
+
+
+class MergeIngestedTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.src = self.tmp / 'src'
+        self.src.mkdir()
+        shutil.copy(SRC_DIR / DAILY, self.src / DAILY)
+        self.original = (self.src / DAILY).read_bytes()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def write_export(self, articles):
+        path = self.tmp / 'export.ndjson'
+        path.write_text('\n'.join(json.dumps(a, ensure_ascii=False) for a in articles), encoding='utf-8')
+        return path
+
+    def ingest(self, path):
+        with redirect_stdout(io.StringIO()):
+            rows, _ = ingest_exports(path)
+            return merge_ingested(rows, self.src)
+
+    def test_merge_keeps_existing_markup(self):
+        export = self.write_export([{
+            'msg_title': '新导入的文章', 'nickname': '新智元', 'create_time': '2025-11-14 21:30',
+            'content_url': 'https://mp.weixin.qq.com/s/new-article', 'digest': '导入文章的摘要。',
+        }])
+        rows, stats = self.ingest(export)
+        self.assertEqual(rows, [])
+        self.assertEqual((stats['added'], stats['dates'], stats['conflicts']), (1, 1, []))
+
+        merged = (self.src / DAILY).read_bytes().decode('utf-8')
+        original = self.original.decode('utf-8')
+        card = generate_index.render_article_card(parse_html_file(self.src / DAILY)['articles'][-1])
+        inserted = '\n' + card
+        self.assertIn(inserted, merged)
+        # 去掉插入的卡片后与原页面逐字节相同
+        self.assertEqual(merged.replace(inserted, '', 1), original)
+
+        titles = [article.title for article in parse_html_file(self.src / DAILY)['articles']]
+        original_titles = [article.title for article in parse_html_file(SRC_DIR / DAILY)['articles']]
+        self.assertEqual(titles, original_titles + ['新导入的文章'])
+
+        # 重复导入同一批导出不改写页面
+        rows, stats = self.ingest(export)
+        self.assertEqual((rows, stats['added'], stats['duplicate']), ([], 0, 1))
+        self.assertEqual((self.src / DAILY).read_bytes().decode('utf-8'), merged)
+
+    def test_new_date_goes_to_build_dailies(self):
+        export = self.write_export([{'title': '另一天', 'published': '2025-11-16 09:00', 'url': 'https://x/1'}])
+        rows, stats = self.ingest(export)
+        self.assertEqual([(day, article.title) for day, article in rows], [('2025-11-16', '另一天')])
+        self.assertEqual((self.src / DAILY).read_bytes(), self.original)
+
+    def test_page_without_cards_is_not_touched(self):
+        self.assertIsNone(append_article_cards('<html><body></body></html>', [Article(title='x')]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+"""--validate / --check-links 链接校验与 .cache/validate.json 缓存的测试"""
+
+import json
+import shutil
+import socket
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import generate_index
+from generate_index import (Article, check_external_links, check_link, load_validate_cache, render_article_card,
+                            validate_site)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """按路径返回固定状态码：/no-head 与 /forbidden-head 拒绝 HEAD，/missing 一律 404"""
+    HEAD_STATUS = {'/no-head': 405, '/forbidden-head': 403, '/missing': 404}
+    GET_STATUS = {'/missing': 404}
+
+    def respond(self, status):
+        self.server.requests.append((self.command, self.path))
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_HEAD(self):
+        self.respond(self.HEAD_STATUS.get(self.path, 200))
+
+    def do_GET(self):
+        self.respond(self.GET_STATUS.get(self.path, 200))
+
+    def log_message(self, *args):
+        pass
+
+
+def closed_port_url():
+    """一个没有进程监听的本地地址，请求时连接被拒绝"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    return f'http://127.0.0.1:{port}/'
+
+
+class ExternalLinkTest(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+        self.server.requests = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base = f'http://127.0.0.1:{self.server.server_address[1]}'
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_head_rejected_falls_back_to_get(self):
+        for path in ('/no-head', '/forbidden-head'):
+            self.assertEqual(check_link(self.base + path, timeout=5), (200, ''))
+            self.assertEqual(self.server.requests[-2:], [('HEAD', path), ('GET', path)])
+
+    def test_head_success_skips_get(self):
+        self.assertEqual(check_link(self.base + '/ok', timeout=5), (200, ''))
+        self.assertEqual(self.server.requests, [('HEAD', '/ok')])
+
+    def test_http_error_is_reported(self):
+        status, reason = check_link(self.base + '/missing', timeout=5)
+        self.assertEqual(status, 404)
+        self.assertEqual(self.server.requests, [('HEAD', '/missing')])
+
+    def test_connection_error_is_failure(self):
+        url = closed_port_url()
+        status, reason = check_link(url, timeout=5)
+        self.assertEqual(status, 0)
+        self.assertTrue(reason)
+
+        results = {}
+        check_external_links([url], results, workers=1)
+        self.assertFalse(results[url]['ok'])
+
+    def test_success_cached_failure_rechecked(self):
+        ok, missing, refused = self.base + '/ok', self.base + '/missing', closed_port_url()
+        results = {}
+        self.assertEqual(check_external_links([ok, missing, refused], results, workers=2), 3)
+        self.assertEqual([results[url]['ok'] for url in (ok, missing, refused)], [True, False, False])
+
+        # 成功的结果在有效期内复用，失败的每次都重新请求
+        self.server.requests.clear()
+        self.assertEqual(check_external_links([ok, missing, refused], results, workers=2), 2)
+        self.assertEqual(self.server.requests, [('HEAD', '/missing')])
+
+        # 过期的成功结果重新请求，不再被引用的地址被移除
+        results[ok]['checked'] -= generate_index.LINK_CHECK_TTL + 1
+        self.assertEqual(check_external_links([ok], results, workers=2), 1)
+        self.assertEqual(set(results), {ok})
+
+
+class ValidateCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.out = self.tmp / 'out'
+        self.out.mkdir()
+        self.cache_path = self.tmp / 'validate.json'
+        (self.out / 'index.html').write_text('<a href="2025-11-14.html">日报</a><a href="about.html">关于</a>',
+                                             encoding='utf-8')
+        (self.out / 'about.html').write_text('<a href="index.html">首页</a>', encoding='utf-8')
+        card = render_article_card(Article(title='标题', source='新智元', url='https://mp.weixin.qq.com/s/x'))
+        (self.out / '2025-11-14.html').write_text(card, encoding='utf-8')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def validate(self):
+        """模拟一次构建：从 validate.json 读缓存，校验后写回"""
+        cache = load_validate_cache(self.cache_path)
+        problems, stats = validate_site(self.out, cache, {'2025-11-14.html'})
+        self.cache_path.write_text(json.dumps(cache, ensure_ascii=False), encoding='utf-8')
+        return problems, stats
+
+    def test_unchanged_pages_reuse_cache(self):
+        problems, stats = self.validate()
+        self.assertEqual(problems, [])
+        self.assertEqual((stats['pages'], stats['rechecked'], stats['external']), (3, 3, 1))
+
+        problems, stats = self.validate()
+        self.assertEqual(problems, [])
+        self.assertEqual((stats['pages'], stats['rechecked']), (3, 0))
+
+    def test_changed_page_is_rechecked(self):
+        self.validate()
+        (self.out / 'about.html').write_text('<a href="gone.html">失效</a>', encoding='utf-8')
+        problems, stats = self.validate()
+        self.assertEqual(stats['rechecked'], 1)
+        self.assertEqual(problems, [('about.html', '链接目标不存在: gone.html')])
+
+    def test_cached_page_still_checks_link_targets(self):
+        self.validate()
+        (self.out / 'about.html').unlink()
+        problems, stats = self.validate()
+        self.assertEqual(stats['rechecked'], 0)
+        self.assertEqual(problems, [('index.html', '链接目标不存在: about.html')])
+        self.assertNotIn('about.html', json.loads(self.cache_path.read_text(encoding='utf-8'))['pages'])
+
+    def test_stale_cache_version_is_discarded(self):
+        self.validate()
+        data = json.loads(self.cache_path.read_text(encoding='utf-8'))
+        data['version'] = generate_index.VALIDATE_CACHE_VERSION + 1
+        self.cache_path.write_text(json.dumps(data), encoding='utf-8')
+        _, stats = self.validate()
+        self.assertEqual(stats['rechecked'], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()